@@ -1,10 +1,13 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from core.database import get_db
 from core.security import decode_access_token
+from core.tenancy import resolve_tenant_id
 from models.admin_user import AdminUser
+from services.audit_log import set_admin
+from services.homepage import homepage_publisher
 
 security = HTTPBearer()
 
@@ -39,4 +42,58 @@ def get_current_admin(
             detail="Admin not found"
         )
     
+    # Tokens issued before an admin moved tenants are no longer valid
+    tenant_id = payload.get("tid")
+    if tenant_id is not None and tenant_id != admin.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token tenant"
+        )
+    
+    # Audit events recorded on this request's session name the admin
+    set_admin(db, admin.id)
+    
     return admin
+
+def get_tenant_id(
+    request: Request,
+    db: Session = Depends(get_db),
+    x_tenant: Optional[str] = Header(None)
+) -> int:
+    """
+    Tenant of a public request, from the X-Tenant header or the Host.
+    Admin routes use current_admin.tenant_id instead.
+    """
+    return resolve_tenant_id(db, host=request.headers.get("host"), slug=x_tenant)
+
+def get_if_match_version(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    Parse an If-Match header carrying a resource version ("3", "\"3\"" or W/"3").
+    Returns None when the header is absent or "*" (no precondition).
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a resource version"
+        )
+    return int(value)
+
+def publish_homepage_on_write(
+    request: Request,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Router dependency for catalog endpoints: once a mutating request has
+    returned without raising (its changes are committed), schedule a
+    debounced homepage snapshot publish for the admin's tenant.
+    """
+    yield
+    if request.method in ("POST", "PUT", "PATCH", "DELETE"):
+        homepage_publisher.request(current_admin.tenant_id)
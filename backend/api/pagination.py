@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+SORT_DIRECTIONS = ("asc", "desc")
+
+
+def parse_fields(fields: str, allowed: list, required: tuple = ("id",)) -> list:
+    """
+    Columns requested with `fields=a,b,c` (all of `allowed` when omitted).
+    `required` columns are always returned.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return list(dict.fromkeys([*required, *requested]))
+
+
+def parse_sort(sort: str, allowed: dict) -> tuple:
+    """
+    `sort=rate` or `sort=-rate` into (column, descending). Only non-null
+    columns are sortable so keyset pagination stays exact.
+    """
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot sort by {name}. Allowed: {', '.join(allowed)}"
+        )
+    return allowed[name], descending
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    payload = json.dumps([_encode_value(sort_value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return _decode_value(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_page(query, sort_column, id_column, descending: bool, cursor: str, limit: int):
+    """
+    Order `query` by (sort column, id) and resume after `cursor`. One extra
+    row is fetched to tell whether another page follows.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        key = tuple_(sort_column, id_column)
+        after = tuple_(sort_value, row_id)
+        query = query.where(key < after if descending else key > after)
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+    return query.limit(limit + 1)
+
+
+def page_rows(rows: list, limit: int, sort_key: str) -> tuple:
+    """Trim the look-ahead row; returns (rows, next cursor or None)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_key], last["id"])
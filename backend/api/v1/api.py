@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.v1.endpoints import public, auth, table_groups, yarn_items, whatsapp_groups, broadcast
+from api.v1.endpoints import public, auth, table_groups, yarn_items, whatsapp_groups, broadcast, broadcast_schedules, export, price_sheets, audit_log
 
 api_router = APIRouter()
 
@@ -12,3 +12,7 @@ api_router.include_router(table_groups.router, prefix="/admin/table-groups", tag
 api_router.include_router(yarn_items.router, prefix="/admin", tags=["yarn-items"])
 api_router.include_router(whatsapp_groups.router, prefix="/admin/whatsapp", tags=["whatsapp"])
 api_router.include_router(broadcast.router, prefix="/admin", tags=["broadcast"])
+api_router.include_router(broadcast_schedules.router, prefix="/admin/broadcast-schedules", tags=["broadcast-schedules"])
+api_router.include_router(export.router, prefix="/admin/export", tags=["export"])
+api_router.include_router(price_sheets.router, prefix="/admin/price-sheets", tags=["price-sheets"])
+api_router.include_router(audit_log.router, prefix="/admin/audit-log", tags=["audit-log"])
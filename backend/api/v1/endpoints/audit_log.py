@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import datetime
+from typing import Optional
+from api.deps import get_db, get_current_admin
+from api.pagination import keyset_page, page_rows
+from core.config import settings
+from core.profiling import ProfiledRoute
+from models.admin_user import AdminUser
+from models.audit_log import AuditLog
+from schemas.audit_log import AuditLogPage
+from services.audit_log import AUDITED
+
+router = APIRouter(route_class=ProfiledRoute)
+
+ENTITIES = {entity for entity, _ in AUDITED.values()}
+
+@router.get("/", response_model=AuditLogPage)
+def get_audit_log(
+    limit: int = Query(100, ge=1, le=settings.ADMIN_LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    The tenant's catalog changes, newest first, one keyset page at a time (pass
+    `next_cursor` back as `cursor`). Filter by `entity` (and `entity_id`), by
+    `admin_id` and by a `since`/`until` change time range. Events are written
+    in batches, so the last second or so of changes may not be listed yet.
+    """
+    if entity is not None and entity not in ENTITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown entity {entity}. Allowed: {', '.join(sorted(ENTITIES))}"
+        )
+    if entity_id is not None and entity is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="entity_id requires entity")
+    
+    query = select(
+        AuditLog.id, AuditLog.entity, AuditLog.entity_id, AuditLog.action, AuditLog.changes,
+        AuditLog.admin_id, AdminUser.email.label("admin_email"), AuditLog.request_id, AuditLog.changed_at
+    ).outerjoin(AdminUser, AdminUser.id == AuditLog.admin_id).where(AuditLog.tenant_id == current_admin.tenant_id)
+    if entity is not None:
+        query = query.where(AuditLog.entity == entity)
+    if entity_id is not None:
+        query = query.where(AuditLog.entity_id == entity_id)
+    if admin_id is not None:
+        query = query.where(AuditLog.admin_id == admin_id)
+    if since is not None:
+        query = query.where(AuditLog.changed_at >= since)
+    if until is not None:
+        query = query.where(AuditLog.changed_at < until)
+    
+    query = keyset_page(query, AuditLog.changed_at, AuditLog.id, True, cursor, limit)
+    rows, next_cursor = page_rows([row._mapping for row in db.execute(query)], limit, "changed_at")
+    
+    return {"items": [dict(row) for row in rows], "next_cursor": next_cursor}
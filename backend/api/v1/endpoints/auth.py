@@ -4,14 +4,16 @@ from datetime import timedelta
 from typing import Optional
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from api.deps import get_db, get_current_admin
+from core.profiling import ProfiledRoute
 from core.security import verify_password, create_access_token, get_password_hash
 from core.config import settings
+from core.tenancy import DEFAULT_TENANT_ID
 from models.admin_user import AdminUser
 from schemas.admin import AdminLogin, AdminCreate, Token, AdminVerify
 
 security = HTTPBearer(auto_error=False)
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/login", response_model=Token)
 def admin_login(credentials: AdminLogin, db: Session = Depends(get_db)):
@@ -28,7 +30,7 @@ def admin_login(credentials: AdminLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(hours=settings.ACCESS_TOKEN_EXPIRE_HOURS)
     access_token = create_access_token(
-        data={"sub": admin.email},
+        data={"sub": admin.email, "tid": admin.tenant_id},
         expires_delta=access_token_expires
     )
     
@@ -60,18 +62,19 @@ def create_admin(
     - If admins exist, a valid admin token is required in Authorization header.
     """
     existing_count = db.query(AdminUser).count()
+    tenant_id = DEFAULT_TENANT_ID
     if existing_count > 0:
         if credentials is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin creation requires authentication")
-        # validate token and admin
-        _ = get_current_admin(db=db, credentials=credentials)
+        # validate token and admin; new admins join the creator's tenant
+        tenant_id = get_current_admin(db=db, credentials=credentials).tenant_id
 
     # Prevent duplicate admin emails
     if db.query(AdminUser).filter(AdminUser.email == admin_in.email).first():
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Admin with this email already exists")
 
     password_hash = get_password_hash(admin_in.password)
-    new_admin = AdminUser(email=admin_in.email, password_hash=password_hash)
+    new_admin = AdminUser(email=admin_in.email, password_hash=password_hash, tenant_id=tenant_id)
     db.add(new_admin)
     db.commit()
     db.refresh(new_admin)
@@ -1,17 +1,28 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import func
+from datetime import datetime, timedelta, date
 from typing import List
 from api.deps import get_db, get_current_admin
+from core.idempotency import IdempotentRoute
 from models.whatsapp_group import WhatsAppGroup
 from models.broadcast_history import BroadcastHistory
+from models.broadcast_message import BroadcastMessage
 from models.table_group import TableGroup
 from models.admin_user import AdminUser
-from schemas.broadcast import BroadcastRequest, BroadcastResponse, BroadcastResult, BroadcastHistoryResponse
-from services.whatsapp_service import send_to_multiple_groups
-from services.message_generator import generate_from_tables
+from schemas.broadcast import BroadcastRequest, BroadcastResponse, BroadcastResult, BroadcastHistoryResponse, BroadcastAnalyticsResponse
+from schemas.broadcast import BroadcastPreviewRequest, BroadcastPreviewResponse
+from services.broadcast_analytics import get_analytics
+from services.broadcast_preview import preview_tables, preview_custom
+from services.broadcast_scheduler import broadcast_scheduler, compute_send_times
+from services.catalog_snapshots import plan_catalog_messages
+from services.message_store import store_message
+from services.price_sheets import get_price_sheet
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
+
+logger = logging.getLogger(__name__)
 
 @router.post("/broadcast", response_model=BroadcastResponse)
 def send_broadcast(
@@ -22,9 +33,17 @@ def send_broadcast(
     """
     Send WhatsApp broadcast to selected groups.
     """
+    if broadcast_scheduler.draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down, retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    
     # Validate groups exist and are active
     groups = db.query(WhatsAppGroup).filter(
         WhatsAppGroup.id.in_(request.group_ids),
+        WhatsAppGroup.tenant_id == current_admin.tenant_id,
         WhatsAppGroup.is_active == True
     ).all()
     
@@ -34,108 +53,183 @@ def send_broadcast(
             detail="One or more groups not found or inactive"
         )
     
-    # Generate message
-    if request.message_type == "auto_generate":
-        message = generate_from_tables(db, request.table_group_ids)
+    # Generate messages: one for custom, per baseline snapshot for catalog broadcasts
+    if request.message_type == "custom":
+        message_hash = store_message(db, request.custom_message)
+        plans = {group.id: (message_hash, None) for group in groups}
     else:
-        message = request.custom_message
+        plans = {}
+        stored = {}
+        catalog_plans = plan_catalog_messages(
+            db, current_admin.tenant_id, request.group_ids, request.table_group_ids,
+            delta=request.message_type == "delta"
+        )
+        for group_id, plan in catalog_plans.items():
+            if plan is None:
+                continue
+            message, snapshot_hash = plan
+            if message not in stored:
+                stored[message] = store_message(db, message)
+            plans[group_id] = (stored[message], snapshot_hash)
+    
+    # Delta groups with nothing new are skipped instead of messaged
+    unchanged = [group for group in groups if group.id not in plans]
+    groups = [group for group in groups if group.id in plans]
     
     # Calculate send times
+    now = datetime.now()
     if request.send_immediately:
-        base_time = datetime.now() + timedelta(minutes=2)
-    else:
-        now = datetime.now()
+        base_time = now
+    elif request.scheduled_at is not None:
+        base_time = request.scheduled_at
+    elif request.scheduled_hour is not None and request.scheduled_minute is not None:
         base_time = now.replace(hour=request.scheduled_hour, minute=request.scheduled_minute, second=0, microsecond=0)
         if base_time < now:
             base_time += timedelta(days=1)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="scheduled_at or scheduled_hour/scheduled_minute required when not sending immediately"
+        )
+    
+    send_times = compute_send_times(
+        base_time,
+        len(groups),
+        policy=request.spread_policy,
+        interval_seconds=request.interval_seconds,
+        rate_per_minute=request.rate_per_minute,
+        window_minutes=request.window_minutes
+    )
     
-    # Create history entries
+    # Rendered (or reused from cache) once for all groups
+    attachment = None
+    if request.attach_price_sheet:
+        attachment = get_price_sheet(db, current_admin.tenant_id, request.table_group_ids, request.attach_price_sheet)
+    
+    # Create history entries; the scheduler sends each one at its scheduled time
     history_entries = []
-    for idx, group in enumerate(groups):
-        scheduled_time = base_time + timedelta(minutes=idx * 2)
-        
+    for group, scheduled_time in zip(groups, send_times):
+        message_hash, snapshot_hash = plans[group.id]
         history = BroadcastHistory(
+            tenant_id=current_admin.tenant_id,
             group_id=group.id,
-            message_text=message,
-            table_group_ids=request.table_group_ids if request.message_type == "auto_generate" else None,
+            message_hash=message_hash,
+            snapshot_hash=snapshot_hash,
+            table_group_ids=request.table_group_ids if request.message_type != "custom" else None,
             message_type=request.message_type,
             scheduled_for=scheduled_time,
-            status="pending"
+            status="pending",
+            attachment=attachment
         )
         db.add(history)
         history_entries.append((history, group, scheduled_time))
     
-    db.commit()
-    
-    # Send via pywhatkit
-    results = send_to_multiple_groups(
-        [{"id": g.id, "group_invite_id": g.group_invite_id, "group_name": g.group_name} for g in groups],
-        message,
-        base_time
-    )
-    
-    # Update history status
-    response_results = []
-    for (history, group, scheduled_time), result in zip(history_entries, results):
-        if result["status"] == "success":
-            history.status = "scheduled"
-        else:
-            history.status = "failed"
-            history.error_message = result.get("error")
-        
-        db.commit()
-        db.refresh(history)
-        
-        response_results.append(BroadcastResult(
+    db.flush()
+    response_results = [
+        BroadcastResult(
             history_id=history.id,
             group_id=group.id,
             group_name=group.group_name,
-            status=history.status,
-            scheduled_time=scheduled_time,
-            error=history.error_message
-        ))
+            status="pending",
+            scheduled_time=scheduled_time
+        )
+        for history, group, scheduled_time in history_entries
+    ]
+    response_results += [
+        BroadcastResult(group_id=group.id, group_name=group.group_name, status="unchanged")
+        for group in unchanged
+    ]
+    db.commit()
+    
+    # Ties this request's id to the history rows the scheduler will log against
+    logger.info(
+        "Broadcast scheduled",
+        extra={
+            "tenant_id": current_admin.tenant_id,
+            "history_ids": [history.id for history, _, _ in history_entries],
+            "message_type": request.message_type,
+        }
+    )
+    broadcast_scheduler.notify()
     
     return BroadcastResponse(
         status="success",
-        message=f"Messages scheduled for {len(groups)} groups",
+        message=f"Messages scheduled for {len(groups)} groups"
+        + (f", {len(unchanged)} unchanged since their last update" if unchanged else ""),
         results=response_results
     )
 
+@router.post("/broadcast/preview", response_model=BroadcastPreviewResponse)
+def preview_broadcast(
+    request: BroadcastPreviewRequest,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Render a broadcast message without scheduling anything, with its size,
+    segment count and the split into messages that fit the platform limit.
+    """
+    if request.message_type == "auto_generate":
+        return preview_tables(db, current_admin.tenant_id, request.table_group_ids)
+    return preview_custom(request.custom_message)
+
 @router.get("/broadcast/history", response_model=dict)
 def get_broadcast_history(
     limit: int = 20,
     offset: int = 0,
     status: str = None,
     group_id: int = None,
+    since: datetime = None,
+    until: datetime = None,
     db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
     Get broadcast history with filtering and pagination.
+    `since`/`until` bound scheduled_for so only the matching monthly partitions are scanned.
     """
-    query = db.query(BroadcastHistory).join(WhatsAppGroup)
-    
+    filters = [BroadcastHistory.tenant_id == current_admin.tenant_id]
     if status:
-        query = query.filter(BroadcastHistory.status == status)
+        filters.append(BroadcastHistory.status == status)
     if group_id:
-        query = query.filter(BroadcastHistory.group_id == group_id)
+        filters.append(BroadcastHistory.group_id == group_id)
+    if since:
+        filters.append(BroadcastHistory.scheduled_for >= since)
+    if until:
+        filters.append(BroadcastHistory.scheduled_for < until)
+    
+    total = db.query(func.count(BroadcastHistory.id)).filter(*filters).scalar()
     
-    total = query.count()
+    history = db.query(
+        BroadcastHistory,
+        WhatsAppGroup.group_name,
+        func.left(BroadcastMessage.body, 101).label("message_head")
+    ).join(WhatsAppGroup).outerjoin(BroadcastMessage).filter(*filters).order_by(
+        BroadcastHistory.scheduled_for.desc()
+    ).offset(offset).limit(limit).all()
     
-    history = query.order_by(BroadcastHistory.scheduled_for.desc()).offset(offset).limit(limit).all()
+    # Resolve table names for the whole page at once
+    table_group_ids = {tg_id for item, _, _ in history for tg_id in (item.table_group_ids or [])}
+    table_names = {}
+    if table_group_ids:
+        table_names = dict(db.query(TableGroup.id, TableGroup.table_name).filter(
+            TableGroup.id.in_(table_group_ids),
+            TableGroup.tenant_id == current_admin.tenant_id
+        ).all())
     
     # Format response
     history_data = []
-    for item in history:
+    for item, group_name, message_head in history:
         table_groups = None
         if item.table_group_ids:
-            table_groups = [tg.table_name for tg in db.query(TableGroup).filter(TableGroup.id.in_(item.table_group_ids)).all()]
+            table_groups = [table_names[tg_id] for tg_id in item.table_group_ids if tg_id in table_names]
         
+        message_head = message_head or ""
         history_data.append({
             "id": item.id,
             "group_id": item.group_id,
-            "group_name": item.group.group_name,
-            "message_preview": item.message_text[:100] + "..." if len(item.message_text) > 100 else item.message_text,
+            "group_name": group_name,
+            "message_preview": message_head[:100] + "..." if len(message_head) > 100 else message_head,
             "message_type": item.message_type,
             "table_groups": table_groups,
             "scheduled_for": item.scheduled_for,
@@ -151,3 +245,26 @@ def get_broadcast_history(
         "limit": limit,
         "offset": offset
     }
+
+@router.get("/broadcast/analytics", response_model=BroadcastAnalyticsResponse)
+def get_broadcast_analytics(
+    since: date = None,
+    until: date = None,
+    bucket: str = "day",
+    group_id: int = None,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Delivery stats from the daily rollups: totals, failure rate per group and
+    average scheduling delay per day or week. Defaults to the last 30 days.
+    """
+    if bucket not in ["day", "week"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bucket must be day or week")
+    
+    until = until or date.today() + timedelta(days=1)
+    since = since or until - timedelta(days=30)
+    if since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+    
+    return get_analytics(db, current_admin.tenant_id, since, until, bucket=bucket, group_id=group_id)
@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import datetime
+from itertools import islice
+from typing import List
+from api.deps import get_db, get_current_admin
+from core.profiling import ProfiledRoute
+from models.broadcast_schedule import BroadcastSchedule
+from models.whatsapp_group import WhatsAppGroup
+from models.admin_user import AdminUser
+from schemas.broadcast_schedule import BroadcastScheduleCreate, BroadcastScheduleUpdate, BroadcastScheduleResponse
+from services.cron import CronExpression
+from services.recurring_broadcasts import discard_queued
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Changing any of these invalidates occurrences that were materialized but not yet rendered
+RESCHEDULE_FIELDS = {"cron_expression", "group_ids", "table_group_ids", "message_type", "spread_policy", "interval_seconds", "rate_per_minute", "window_minutes", "is_active"}
+
+def _validate_groups(db: Session, tenant_id: int, group_ids: list):
+    found = db.query(WhatsAppGroup.id).filter(
+        WhatsAppGroup.id.in_(group_ids),
+        WhatsAppGroup.tenant_id == tenant_id
+    ).count()
+    if found != len(set(group_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="One or more groups not found"
+        )
+
+@router.get("/", response_model=List[BroadcastScheduleResponse])
+def get_broadcast_schedules(
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Get all recurring broadcast schedules.
+    """
+    return db.query(BroadcastSchedule).filter(
+        BroadcastSchedule.tenant_id == current_admin.tenant_id
+    ).order_by(BroadcastSchedule.created_at.desc()).all()
+
+@router.post("/", response_model=BroadcastScheduleResponse, status_code=status.HTTP_201_CREATED)
+def create_broadcast_schedule(
+    schedule: BroadcastScheduleCreate,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Create recurring broadcast schedule. Occurrences are materialized by the background worker.
+    """
+    _validate_groups(db, current_admin.tenant_id, schedule.group_ids)
+
+    new_schedule = BroadcastSchedule(**schedule.dict(), tenant_id=current_admin.tenant_id)
+    db.add(new_schedule)
+    db.commit()
+    db.refresh(new_schedule)
+
+    return new_schedule
+
+@router.put("/{schedule_id}", response_model=BroadcastScheduleResponse)
+def update_broadcast_schedule(
+    schedule_id: int,
+    schedule_update: BroadcastScheduleUpdate,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Update recurring broadcast schedule.
+    """
+    schedule = db.query(BroadcastSchedule).filter(
+        BroadcastSchedule.id == schedule_id,
+        BroadcastSchedule.tenant_id == current_admin.tenant_id
+    ).first()
+    if not schedule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast schedule not found")
+
+    update_data = schedule_update.dict(exclude_unset=True)
+    if "group_ids" in update_data:
+        _validate_groups(db, current_admin.tenant_id, update_data["group_ids"])
+
+    for field, value in update_data.items():
+        setattr(schedule, field, value)
+
+    if RESCHEDULE_FIELDS & update_data.keys():
+        discard_queued(db, schedule)
+
+    db.commit()
+    db.refresh(schedule)
+
+    return schedule
+
+@router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_broadcast_schedule(
+    schedule_id: int,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Delete recurring broadcast schedule. Unrendered occurrences are removed, sent history is kept.
+    """
+    schedule = db.query(BroadcastSchedule).filter(
+        BroadcastSchedule.id == schedule_id,
+        BroadcastSchedule.tenant_id == current_admin.tenant_id
+    ).first()
+    if not schedule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast schedule not found")
+
+    discard_queued(db, schedule)
+    db.delete(schedule)
+    db.commit()
+
+    return None
+
+@router.get("/{schedule_id}/occurrences")
+def preview_occurrences(
+    schedule_id: int,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Preview the next occurrence times of a schedule.
+    """
+    schedule = db.query(BroadcastSchedule).filter(
+        BroadcastSchedule.id == schedule_id,
+        BroadcastSchedule.tenant_id == current_admin.tenant_id
+    ).first()
+    if not schedule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast schedule not found")
+
+    cron = CronExpression(schedule.cron_expression)
+    occurrences = list(islice(cron.occurrences(datetime.now()), min(max(limit, 1), 100)))
+
+    return {
+        "schedule_id": schedule.id,
+        "cron_expression": schedule.cron_expression,
+        "occurrences": occurrences
+    }
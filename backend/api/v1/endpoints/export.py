@@ -0,0 +1,40 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from api.deps import get_db, get_current_admin
+from core.profiling import ProfiledRoute
+from models.admin_user import AdminUser
+from services.catalog_export import EXPORT_FORMATS, export_catalog
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/catalog")
+def export_catalog_file(
+    format: str = "csv",
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Stream the full catalog (tables and items in display order) as csv, ndjson,
+    arrow (IPC stream) or parquet. Rows are read page by page over server-side
+    cursors and sent as they are encoded.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    tenant_id = current_admin.tenant_id
+    # The auth lookup's transaction would otherwise stay open for the whole download
+    db.close()
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"catalog-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    
+    return StreamingResponse(
+        export_catalog(tenant_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List
+from api.deps import get_db, get_current_admin
+from core.profiling import ProfiledRoute
+from models.admin_user import AdminUser
+from services.price_sheets import SHEET_FORMATS, attachment_path, get_price_sheet, visible_table_ids
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/")
+def download_price_sheet(
+    request: Request,
+    format: str = "png",
+    table_group_ids: List[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Price sheet as PNG or PDF for the given table groups, or all homepage
+    tables combined when none are given. Sheets are cached by content hash.
+    """
+    if format not in SHEET_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(SHEET_FORMATS)}"
+        )
+    
+    tenant_id = current_admin.tenant_id
+    key = get_price_sheet(db, tenant_id, table_group_ids or visible_table_ids(db, tenant_id), format)
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No visible items in the selected tables")
+    
+    etag = f'"{key}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return FileResponse(
+        attachment_path(key),
+        media_type=SHEET_FORMATS[format],
+        filename=f"price-sheet.{format}",
+        headers={"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    )
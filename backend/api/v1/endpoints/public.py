@@ -1,50 +1,50 @@
-from fastapi import APIRouter, Depends
+import os
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from api.deps import get_db
-from models.table_group import TableGroup
-from models.yarn_item import YarnItem
-from schemas.yarn_item import YarnItemPublic
+from api.deps import get_db, get_tenant_id
+from core.config import settings
+from core.profiling import ProfiledRoute
+from services.homepage import ENCODINGS, current_snapshot, homepage_publisher, load_homepage
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+def _snapshot_response(request: Request, tenant_id: int, path: str) -> Response:
+    name = os.path.basename(path)
+    if settings.HOMEPAGE_SNAPSHOT_MODE == "redirect":
+        return RedirectResponse(f"{settings.HOMEPAGE_SNAPSHOT_URL.rstrip('/')}/{tenant_id}/{name}")
+    
+    headers = {"ETag": f'"{name.split(".")[1]}"', "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if settings.HOMEPAGE_SNAPSHOT_MODE == "accel":
+        # nginx sends the file itself (sendfile, gzip_static/brotli_static)
+        headers["X-Accel-Redirect"] = f"{settings.HOMEPAGE_SNAPSHOT_URL.rstrip('/')}/{tenant_id}/{name}"
+        return Response(media_type="application/json", headers=headers)
+    
+    accepted = request.headers.get("accept-encoding", "")
+    for encoding, suffix in ENCODINGS.items():
+        if encoding in accepted and os.path.exists(path + suffix):
+            headers["Content-Encoding"] = encoding
+            return FileResponse(path + suffix, media_type="application/json", headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
 
 @router.get("/homepage/tables")
-def get_homepage_tables(db: Session = Depends(get_db)):
+def get_homepage_tables(
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant_id: int = Depends(get_tenant_id)
+):
     """
     Public endpoint: Get all visible table groups with items for homepage.
+    The tenant comes from the Host (or X-Tenant) header. With
+    HOMEPAGE_SNAPSHOT_DIR set, the published snapshot is served (or
+    redirected to) without querying the database.
     """
-    # Query with proper relationship loading
-    table_groups = db.query(TableGroup).filter(
-        TableGroup.show_on_homepage == True
-    ).order_by(TableGroup.display_order).all()
-    
-    result = []
-    for tg in table_groups:
-        items = db.query(YarnItem).filter(
-            YarnItem.table_group_id == tg.id,
-            YarnItem.show_on_homepage == True
-        ).order_by(YarnItem.display_order).all()
-        
-        items_data = [
-            {
-                "id": item.id,
-                "serial_number": idx + 1,
-                "count": item.count,
-                "quality": item.quality,
-                "rate": float(item.rate)
-            }
-            for idx, item in enumerate(items)
-        ]
-        
-        result.append({
-            "id": tg.id,
-            "table_name": tg.table_name,
-            "display_order": tg.display_order,
-            "items": items_data
-        })
+    if settings.HOMEPAGE_SNAPSHOT_DIR:
+        path = current_snapshot(tenant_id)
+        if path is not None:
+            return _snapshot_response(request, tenant_id, path)
+        homepage_publisher.request(tenant_id)
     
-    return {
-        "tables": result,
-        "last_updated": max([tg.updated_at or tg.created_at for tg in table_groups], default=None)
-    }
+    return load_homepage(db, tenant_id)
@@ -1,35 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from api.deps import get_db, get_current_admin
+from sqlalchemy import select
+from typing import List, Optional
+from api.deps import get_db, get_current_admin, publish_homepage_on_write
+from api.pagination import parse_fields, parse_sort, keyset_page, page_rows
+from core.config import settings
+from core.idempotency import IdempotentRoute
 from models.table_group import TableGroup
-from models.yarn_item import YarnItem
 from models.admin_user import AdminUser
-from schemas.table_group import TableGroupCreate, TableGroupUpdate, TableGroupResponse
+from schemas.table_group import TableGroupCreate, TableGroupUpdate, TableGroupResponse, TableGroupListItem
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(publish_homepage_on_write)])
 
-@router.get("/", response_model=List[TableGroupResponse])
+LIST_FIELDS = {
+    "id": TableGroup.id,
+    "table_name": TableGroup.table_name,
+    "display_order": TableGroup.display_order,
+    "show_on_homepage": TableGroup.show_on_homepage,
+    "item_count": TableGroup.item_count,
+    "visible_item_count": TableGroup.visible_item_count,
+    "created_at": TableGroup.created_at,
+    "updated_at": TableGroup.updated_at,
+}
+SORT_FIELDS = {name: LIST_FIELDS[name] for name in ("display_order", "id", "table_name", "created_at")}
+
+def _table_group_dict(tg: TableGroup) -> dict:
+    # Mapped columns only; tg.__dict__ would also carry SQLAlchemy's instance state
+    return {name: getattr(tg, name) for name in LIST_FIELDS}
+
+@router.get("/", response_model=List[TableGroupListItem], response_model_exclude_unset=True)
 def get_table_groups(
+    response: Response,
+    limit: int = Query(settings.ADMIN_LIST_MAX_LIMIT, ge=1, le=settings.ADMIN_LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "display_order",
+    q: Optional[str] = None,
+    show_on_homepage: Optional[bool] = None,
     db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
-    Get all table groups with item counts.
+    Get table groups with item counts, one keyset page at a time. The next page's cursor
+    is returned in the X-Next-Cursor header. `fields=` limits the returned columns,
+    `sort=` takes a column name (prefix `-` for descending) and `q` matches the table name.
+    Item counts are kept on the row by triggers, so no item is read.
     """
-    table_groups = db.query(
-        TableGroup,
-        func.count(YarnItem.id).label("item_count")
-    ).outerjoin(YarnItem).group_by(TableGroup.id).order_by(TableGroup.display_order).all()
+    selected = parse_fields(fields, list(LIST_FIELDS))
+    sort_column, descending = parse_sort(sort, SORT_FIELDS)
+    sort_key = sort.lstrip("-")
+    columns = list(dict.fromkeys([*selected, sort_key]))
+    
+    query = select(*[LIST_FIELDS[name] for name in columns]).where(TableGroup.tenant_id == current_admin.tenant_id)
+    if q:
+        query = query.where(TableGroup.table_name.ilike(f"%{q}%"))
+    if show_on_homepage is not None:
+        query = query.where(TableGroup.show_on_homepage == show_on_homepage)
     
-    return [
-        {
-            **tg.__dict__,
-            "item_count": count
-        }
-        for tg, count in table_groups
-    ]
+    query = keyset_page(query, sort_column, TableGroup.id, descending, cursor, limit)
+    rows, next_cursor = page_rows([row._mapping for row in db.execute(query)], limit, sort_key)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [{name: row[name] for name in selected} for row in rows]
 
 @router.post("/", response_model=TableGroupResponse, status_code=status.HTTP_201_CREATED)
 def create_table_group(
@@ -41,19 +74,22 @@ def create_table_group(
     Create new table group.
     """
     # Check duplicate
-    existing = db.query(TableGroup).filter(TableGroup.table_name == table_group.table_name).first()
+    existing = db.query(TableGroup).filter(
+        TableGroup.tenant_id == current_admin.tenant_id,
+        TableGroup.table_name == table_group.table_name
+    ).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Table group with this name already exists"
         )
     
-    new_table_group = TableGroup(**table_group.dict())
+    new_table_group = TableGroup(**table_group.dict(), tenant_id=current_admin.tenant_id)
     db.add(new_table_group)
     db.commit()
     db.refresh(new_table_group)
     
-    return {**new_table_group.__dict__, "item_count": 0}
+    return _table_group_dict(new_table_group)
 
 @router.put("/{table_group_id}", response_model=TableGroupResponse)
 def update_table_group(
@@ -65,7 +101,7 @@ def update_table_group(
     """
     Update table group.
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
+    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id, TableGroup.tenant_id == current_admin.tenant_id).first()
     if not tg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
@@ -76,9 +112,7 @@ def update_table_group(
     db.commit()
     db.refresh(tg)
     
-    item_count = db.query(func.count(YarnItem.id)).filter(YarnItem.table_group_id == tg.id).scalar()
-    
-    return {**tg.__dict__, "item_count": item_count}
+    return _table_group_dict(tg)
 
 @router.delete("/{table_group_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_table_group(
@@ -89,7 +123,7 @@ def delete_table_group(
     """
     Delete table group (cascades to items).
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
+    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id, TableGroup.tenant_id == current_admin.tenant_id).first()
     if not tg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
@@ -111,7 +145,10 @@ def reorder_table_groups(
     updated_count = 0
     
     for table_order in tables_order:
-        tg = db.query(TableGroup).filter(TableGroup.id == table_order["id"]).first()
+        tg = db.query(TableGroup).filter(
+            TableGroup.id == table_order["id"],
+            TableGroup.tenant_id == current_admin.tenant_id
+        ).first()
         if tg:
             tg.display_order = table_order["display_order"]
             updated_count += 1
@@ -1,12 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from typing import List
 from api.deps import get_db, get_current_admin
+from core.config import settings
+from core.profiling import ProfiledRoute
 from models.whatsapp_group import WhatsAppGroup
 from models.admin_user import AdminUser
-from schemas.whatsapp import WhatsAppGroupCreate, WhatsAppGroupUpdate, WhatsAppGroupResponse
+from schemas.whatsapp import (
+    WhatsAppGroupCreate, WhatsAppGroupUpdate, WhatsAppGroupResponse,
+    WhatsAppGroupImport, WhatsAppGroupImportResponse, parse_invite_id
+)
+from services.invite_links import invite_link_checker, parse_import_csv
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.get("/groups", response_model=List[WhatsAppGroupResponse])
 def get_whatsapp_groups(
@@ -16,7 +24,9 @@ def get_whatsapp_groups(
     """
     Get all WhatsApp groups.
     """
-    groups = db.query(WhatsAppGroup).order_by(WhatsAppGroup.created_at.desc()).all()
+    groups = db.query(WhatsAppGroup).filter(
+        WhatsAppGroup.tenant_id == current_admin.tenant_id
+    ).order_by(WhatsAppGroup.created_at.desc()).all()
     return groups
 
 @router.post("/groups", response_model=WhatsAppGroupResponse, status_code=status.HTTP_201_CREATED)
@@ -42,7 +52,8 @@ def create_whatsapp_group(
     new_group = WhatsAppGroup(
         group_name=group.group_name,
         group_invite_id=group_invite_id,
-        is_active=group.is_active
+        is_active=group.is_active,
+        tenant_id=current_admin.tenant_id
     )
     db.add(new_group)
     db.commit()
@@ -50,6 +61,91 @@ def create_whatsapp_group(
     
     return new_group
 
+@router.post("/groups/import", response_model=WhatsAppGroupImportResponse)
+def import_whatsapp_groups(
+    data: WhatsAppGroupImport,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Add many WhatsApp groups from invite links (a list, CSV text, or both) in one
+    INSERT ... ON CONFLICT DO NOTHING RETURNING. Invalid links, links repeated in the
+    import and links already registered are reported instead of failing the import;
+    a link registered by another tenant is reported as invalid without saying whose.
+    Groups without a name are named after their invite id. New groups get a link
+    health check shortly after.
+    """
+    rows = [(item.group_invite_link, item.group_name) for item in data.groups]
+    if data.csv:
+        rows.extend(parse_import_csv(data.csv))
+    if len(rows) > settings.WHATSAPP_IMPORT_MAX_GROUPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.WHATSAPP_IMPORT_MAX_GROUPS} groups per import"
+        )
+    
+    names, links, duplicates, invalid = {}, {}, [], []
+    for link, name in rows:
+        try:
+            invite_id = parse_invite_id(link)
+        except ValueError as e:
+            invalid.append({"value": link, "detail": str(e)})
+            continue
+        if invite_id in names:
+            duplicates.append(invite_id)
+            continue
+        names[invite_id] = ((name or "").strip() or invite_id)[:100]
+        links[invite_id] = link
+    
+    created = []
+    if names:
+        created = db.scalars(
+            insert(WhatsAppGroup)
+            .values([
+                {"group_name": name, "group_invite_id": invite_id, "is_active": data.is_active, "tenant_id": current_admin.tenant_id}
+                for invite_id, name in names.items()
+            ])
+            .on_conflict_do_nothing(index_elements=["group_invite_id"])
+            .returning(WhatsAppGroup)
+        ).all()
+        db.commit()
+        invite_link_checker.request([group.id for group in created])
+    
+    created_ids = {group.group_invite_id for group in created}
+    conflicts = [invite_id for invite_id in names if invite_id not in created_ids]
+    existing = []
+    if conflicts:
+        own = set(db.scalars(
+            select(WhatsAppGroup.group_invite_id).where(
+                WhatsAppGroup.tenant_id == current_admin.tenant_id,
+                WhatsAppGroup.group_invite_id.in_(conflicts)
+            )
+        ))
+        existing = [invite_id for invite_id in conflicts if invite_id in own]
+        invalid.extend(
+            {"value": links[invite_id], "detail": "Invite link cannot be added"}
+            for invite_id in conflicts if invite_id not in own
+        )
+    return {
+        "created": sorted(created, key=lambda group: group.id),
+        "existing": existing,
+        "duplicates": duplicates,
+        "invalid": invalid
+    }
+
+@router.post("/groups/check-links", status_code=status.HTTP_202_ACCEPTED)
+def check_whatsapp_group_links(
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Queue an invite link check of the tenant's active groups now rather than at the
+    next interval. Groups whose links keep coming back dead are deactivated.
+    """
+    if not settings.WHATSAPP_LINK_CHECK_ENABLED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Invite link checks are disabled")
+    invite_link_checker.request(tenant_id=current_admin.tenant_id)
+    return {"queued": True}
+
 @router.put("/groups/{group_id}", response_model=WhatsAppGroupResponse)
 def update_whatsapp_group(
     group_id: int,
@@ -60,7 +156,7 @@ def update_whatsapp_group(
     """
     Update WhatsApp group.
     """
-    group = db.query(WhatsAppGroup).filter(WhatsAppGroup.id == group_id).first()
+    group = db.query(WhatsAppGroup).filter(WhatsAppGroup.id == group_id, WhatsAppGroup.tenant_id == current_admin.tenant_id).first()
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="WhatsApp group not found")
     
@@ -82,7 +178,7 @@ def delete_whatsapp_group(
     """
     Delete WhatsApp group.
     """
-    group = db.query(WhatsAppGroup).filter(WhatsAppGroup.id == group_id).first()
+    group = db.query(WhatsAppGroup).filter(WhatsAppGroup.id == group_id, WhatsAppGroup.tenant_id == current_admin.tenant_id).first()
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="WhatsApp group not found")
     
@@ -1,33 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from api.deps import get_db, get_current_admin
+from sqlalchemy import select, update, values, column, cast, or_, Integer, Numeric
+from decimal import Decimal
+from typing import List, Optional
+from api.deps import get_db, get_current_admin, publish_homepage_on_write, get_if_match_version
+from api.pagination import parse_fields, parse_sort, keyset_page, page_rows
+from core.config import settings
+from core.idempotency import IdempotentRoute
 from models.yarn_item import YarnItem
 from models.table_group import TableGroup
 from models.admin_user import AdminUser
-from schemas.yarn_item import YarnItemCreate, YarnItemUpdate, YarnItemResponse
+from schemas.yarn_item import (
+    YarnItemCreate, YarnItemUpdate, YarnItemResponse, YarnItemListResponse,
+    YarnItemBulkRateUpdate, YarnItemBulkRateResponse
+)
+from schemas.repricing import RepricingRequest, RepricingResponse
+from services.repricing import reprice
+from services.audit_log import AUDITED, record
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute, dependencies=[Depends(publish_homepage_on_write)])
 
-@router.get("/table-groups/{table_group_id}/items")
+LIST_FIELDS = {
+    "id": YarnItem.id,
+    "table_group_id": YarnItem.table_group_id,
+    "count": YarnItem.count,
+    "quality": YarnItem.quality,
+    "rate": YarnItem.rate,
+    "display_order": YarnItem.display_order,
+    "show_on_homepage": YarnItem.show_on_homepage,
+    "version": YarnItem.version,
+    "created_at": YarnItem.created_at,
+    "updated_at": YarnItem.updated_at,
+}
+SORT_FIELDS = {name: LIST_FIELDS[name] for name in ("display_order", "id", "rate", "count", "quality", "created_at")}
+AUDITED_FIELDS = AUDITED[YarnItem][1]
+
+@router.get(
+    "/table-groups/{table_group_id}/items",
+    response_model=YarnItemListResponse,
+    response_model_exclude_unset=True
+)
 def get_yarn_items(
     table_group_id: int,
+    limit: int = Query(settings.ADMIN_LIST_MAX_LIMIT, ge=1, le=settings.ADMIN_LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "display_order",
+    q: Optional[str] = None,
+    show_on_homepage: Optional[bool] = None,
+    min_rate: Optional[Decimal] = None,
+    max_rate: Optional[Decimal] = None,
     db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
-    Get all items for a table group.
+    Get items for a table group, one keyset page at a time (pass `next_cursor` back as `cursor`).
+    `fields=` limits the returned columns, `sort=` takes a column name (prefix `-` for descending)
+    and `q` matches count or quality.
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
-    if not tg:
+    table_name = db.query(TableGroup.table_name).filter(
+        TableGroup.id == table_group_id,
+        TableGroup.tenant_id == current_admin.tenant_id
+    ).scalar()
+    if table_name is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
-    items = db.query(YarnItem).filter(YarnItem.table_group_id == table_group_id).order_by(YarnItem.display_order).all()
+    selected = parse_fields(fields, list(LIST_FIELDS))
+    sort_column, descending = parse_sort(sort, SORT_FIELDS)
+    sort_key = sort.lstrip("-")
+    columns = list(dict.fromkeys([*selected, sort_key]))
+    
+    # tenant_id leads the (tenant_id, table_group_id, display_order) index
+    query = select(*[LIST_FIELDS[name] for name in columns]).where(
+        YarnItem.tenant_id == current_admin.tenant_id,
+        YarnItem.table_group_id == table_group_id
+    )
+    if q:
+        pattern = f"%{q}%"
+        query = query.where(or_(YarnItem.count.ilike(pattern), YarnItem.quality.ilike(pattern)))
+    if show_on_homepage is not None:
+        query = query.where(YarnItem.show_on_homepage == show_on_homepage)
+    if min_rate is not None:
+        query = query.where(YarnItem.rate >= min_rate)
+    if max_rate is not None:
+        query = query.where(YarnItem.rate <= max_rate)
+    
+    query = keyset_page(query, sort_column, YarnItem.id, descending, cursor, limit)
+    rows, next_cursor = page_rows([row._mapping for row in db.execute(query)], limit, sort_key)
     
     return {
         "table_group_id": table_group_id,
-        "table_name": tg.table_name,
-        "items": items
+        "table_name": table_name,
+        "items": [{name: row[name] for name in selected} for row in rows],
+        "next_cursor": next_cursor
     }
 
 @router.post("/table-groups/{table_group_id}/items", response_model=YarnItemResponse, status_code=status.HTTP_201_CREATED)
@@ -40,11 +105,11 @@ def create_yarn_item(
     """
     Create new yarn item in table group.
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
+    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id, TableGroup.tenant_id == current_admin.tenant_id).first()
     if not tg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
-    new_item = YarnItem(**item.dict(), table_group_id=table_group_id)
+    new_item = YarnItem(**item.dict(), table_group_id=table_group_id, tenant_id=tg.tenant_id)
     db.add(new_item)
     db.commit()
     db.refresh(new_item)
@@ -61,7 +126,7 @@ def batch_create_yarn_items(
     """
     Batch create multiple yarn items in table group.
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
+    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id, TableGroup.tenant_id == current_admin.tenant_id).first()
     if not tg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
@@ -75,7 +140,8 @@ def batch_create_yarn_items(
             rate=item_data.get("rate", 0),
             display_order=item_data.get("display_order", 0),
             show_on_homepage=item_data.get("show_on_homepage", True),
-            table_group_id=table_group_id
+            table_group_id=table_group_id,
+            tenant_id=tg.tenant_id
         )
         db.add(new_item)
         created_items.append(new_item)
@@ -97,7 +163,7 @@ def reorder_yarn_items(
     """
     Reorder yarn items within a table group.
     """
-    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
+    tg = db.query(TableGroup).filter(TableGroup.id == table_group_id, TableGroup.tenant_id == current_admin.tenant_id).first()
     if not tg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table group not found")
     
@@ -121,25 +187,142 @@ def reorder_yarn_items(
 def update_yarn_item(
     item_id: int,
     item_update: YarnItemUpdate,
+    response: Response,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     db: Session = Depends(get_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
-    Update yarn item.
+    Update yarn item in a single UPDATE ... RETURNING.
+    With If-Match, the update only applies if the item is still at that version (412 otherwise).
     """
-    item = db.query(YarnItem).filter(YarnItem.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Yarn item not found")
-    
     update_data = item_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(item, field, value)
+    audited = [field for field in AUDITED_FIELDS if field in update_data]
+    
+    # Lock and capture the audited old values in the same statement, since RETURNING only sees new values
+    before = (
+        select(YarnItem.id, *[getattr(YarnItem, field) for field in audited])
+        .where(YarnItem.id == item_id, YarnItem.tenant_id == current_admin.tenant_id)
+        .with_for_update()
+        .subquery("before")
+    )
+    conditions = [YarnItem.id == before.c.id]
+    if expected_version is not None:
+        conditions.append(YarnItem.version == expected_version)
+    
+    row = db.execute(
+        update(YarnItem)
+        .where(*conditions)
+        .values(**update_data, version=YarnItem.version + 1)
+        .returning(YarnItem, *[before.c[field] for field in audited])
+        .execution_options(synchronize_session=False)
+    ).first()
     
+    if row is None:
+        db.rollback()
+        current_version = db.query(YarnItem.version).filter(
+            YarnItem.id == item_id,
+            YarnItem.tenant_id == current_admin.tenant_id
+        ).scalar()
+        if current_version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Yarn item not found")
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Yarn item was modified (current version {current_version})",
+            headers={"ETag": f'"{current_version}"'}
+        )
+    
+    item = row[0]
+    record(db, item.tenant_id, "yarn_item", item.id, "update", {
+        field: (old, getattr(item, field)) for field, old in zip(audited, row[1:])
+    })
+    
+    # Keep the RETURNING row loaded so serializing it needs no further SELECT
+    db.expunge(item)
     db.commit()
-    db.refresh(item)
+    response.headers["ETag"] = f'"{item.version}"'
     
     return item
 
+@router.post("/yarn-items/bulk-rate-update", response_model=YarnItemBulkRateResponse)
+def bulk_rate_update_yarn_items(
+    data: YarnItemBulkRateUpdate,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Apply many rate changes as one UPDATE ... FROM (VALUES ...) RETURNING.
+    Rows whose version no longer matches are reported as conflicts; the rest still apply.
+    """
+    # Last entry wins for duplicate ids
+    requested = {change.id: change for change in data.updates}
+    if not requested:
+        return {"updated": [], "conflicts": [], "not_found": []}
+    
+    changes = values(
+        column("id", Integer),
+        column("rate", Numeric(10, 2)),
+        column("version", Integer),
+        name="changes"
+    ).data([(change.id, change.rate, change.version) for change in requested.values()])
+    
+    # Old rates for the audit log, locked and read in the same statement
+    before = (
+        select(YarnItem.id, YarnItem.rate.label("old_rate"))
+        .where(YarnItem.id.in_(list(requested)), YarnItem.tenant_id == current_admin.tenant_id)
+        .with_for_update()
+        .subquery("before")
+    )
+    expected = cast(changes.c.version, Integer)
+    rows = db.execute(
+        update(YarnItem)
+        .where(
+            YarnItem.id == cast(changes.c.id, Integer),
+            YarnItem.id == before.c.id,
+            or_(expected.is_(None), YarnItem.version == expected)
+        )
+        .values(rate=cast(changes.c.rate, Numeric(10, 2)), version=YarnItem.version + 1)
+        .returning(YarnItem.id, YarnItem.rate, YarnItem.version, before.c.old_rate)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for row in rows:
+        record(db, current_admin.tenant_id, "yarn_item", row.id, "update", {"rate": (row.old_rate, row.rate)})
+    db.commit()
+    
+    updated = [{"id": row.id, "rate": row.rate, "version": row.version} for row in rows]
+    
+    # Only failed rows cost a second query
+    missing = set(requested) - {row.id for row in rows}
+    conflicts, not_found = [], []
+    if missing:
+        current = dict(db.query(YarnItem.id, YarnItem.version).filter(
+            YarnItem.id.in_(missing),
+            YarnItem.tenant_id == current_admin.tenant_id
+        ).all())
+        for item_id in sorted(missing):
+            if item_id in current:
+                conflicts.append({
+                    "id": item_id,
+                    "expected_version": requested[item_id].version,
+                    "current_version": current[item_id]
+                })
+            else:
+                not_found.append(item_id)
+    
+    return {"updated": updated, "conflicts": conflicts, "not_found": not_found}
+
+@router.post("/yarn-items/reprice", response_model=RepricingResponse)
+def reprice_yarn_items(
+    request: RepricingRequest,
+    db: Session = Depends(get_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Mass repricing by percentage and/or delta with optional rounding and clamps.
+    With dry_run the computed changes are returned without being applied.
+    """
+    return reprice(db, current_admin.tenant_id, request.filter, request.rule, request.dry_run, admin_id=current_admin.id)
+
 @router.delete("/yarn-items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_yarn_item(
     item_id: int,
@@ -149,7 +332,7 @@ def delete_yarn_item(
     """
     Delete yarn item.
     """
-    item = db.query(YarnItem).filter(YarnItem.id == item_id).first()
+    item = db.query(YarnItem).filter(YarnItem.id == item_id, YarnItem.tenant_id == current_admin.tenant_id).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Yarn item not found")
     
@@ -170,10 +353,13 @@ def bulk_update_yarn_items(
     update_list = updates.get("updates", [])
     updated_count = 0
     
-    for update in update_list:
-        item = db.query(YarnItem).filter(YarnItem.id == update["id"]).first()
+    for item_update in update_list:
+        item = db.query(YarnItem).filter(
+            YarnItem.id == item_update["id"],
+            YarnItem.tenant_id == current_admin.tenant_id
+        ).first()
         if item:
-            item.display_order = update.get("display_order", item.display_order)
+            item.display_order = item_update.get("display_order", item.display_order)
             updated_count += 1
     
     db.commit()
@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.15) -> list:
+    """
+    Compare two benchmark result documents endpoint by endpoint.
+
+    An endpoint regresses when its p95 latency grows, or its throughput drops,
+    by more than `threshold` (a fraction), or when it issues more queries per request.
+    Returns a list of human readable regression descriptions.
+    """
+    regressions = []
+
+    for name, cur in current.get("endpoints", {}).items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+
+        base_p95 = base["latency_ms"]["p95"]
+        cur_p95 = cur["latency_ms"]["p95"]
+        if base_p95 and cur_p95 > base_p95 * (1 + threshold):
+            regressions.append(f"{name}: p95 {base_p95:.2f}ms -> {cur_p95:.2f}ms")
+
+        base_rps = base["throughput_rps"]
+        cur_rps = cur["throughput_rps"]
+        if base_rps and cur_rps < base_rps * (1 - threshold):
+            regressions.append(f"{name}: throughput {base_rps:.1f}rps -> {cur_rps:.1f}rps")
+
+        base_queries = base.get("queries_per_request")
+        cur_queries = cur.get("queries_per_request")
+        if base_queries is not None and cur_queries is not None and cur_queries > base_queries:
+            regressions.append(f"{name}: queries/request {base_queries:.1f} -> {cur_queries:.1f}")
+
+        if cur["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {cur['errors']}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare_results(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Query plan regression check.
+
+Runs the homepage and admin list endpoints against a seeded catalog,
+captures every SELECT they issue and asserts on its EXPLAIN plan: the
+expected indexes are used, no listed table is sequentially scanned and the
+table group list never reads yarn_items. Exit code 1 on a regression (a
+missing index, a sequential scan, or an endpoint that issued no query to
+check), so CI can run it against a disposable database:
+
+    python -m benchmarks.plan_check --reset --tables 20 --items 200
+    python -m benchmarks.plan_check --no-seed --natural --output results/plans.json
+
+By default plans are made with `enable_seqscan = off`, which asks whether a
+usable index exists at all and so gives the same answer on a tiny CI
+catalog as on production data. `--natural` keeps the planner's own choice,
+which is only meaningful on a realistically sized catalog.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import httpx
+from sqlalchemy import event, text
+from core.config import settings
+from core.database import SessionLocal, engine
+from benchmarks.seed import load_context, reset_database, seed_catalog
+
+API_PREFIX = "/api/v1"
+
+# Node types that read a table without an index
+SEQUENTIAL = {"Seq Scan", "Parallel Seq Scan"}
+
+# Leading request id comment added with LOG_SQL_COMMENTS
+LEADING_COMMENT = re.compile(r"^\s*/\*.*?\*/\s*", re.S)
+
+
+def build_checks(ctx: dict) -> list:
+    """
+    (name, path, expectations). `indexes` maps an index that must appear in
+    some plan to the node types allowed for it (None for any); `no_seq_scan`
+    and `not_read` list tables that must not be scanned sequentially or at all.
+    """
+    table_id = ctx["table_group_ids"][0]
+    return [
+        ("homepage", f"{API_PREFIX}/homepage/tables", {
+            "indexes": {
+                "ix_table_groups_tenant_display_order": None,
+                "ix_yarn_items_homepage": {"Index Only Scan"},
+            },
+            "no_seq_scan": {"table_groups", "yarn_items"},
+        }),
+        ("admin_table_groups", f"{API_PREFIX}/admin/table-groups/", {
+            "indexes": {"ix_table_groups_tenant_display_order": None},
+            "no_seq_scan": {"table_groups"},
+            "not_read": {"yarn_items"},
+        }),
+        ("admin_items", f"{API_PREFIX}/admin/table-groups/{table_id}/items", {
+            "indexes": {"ix_yarn_items_tenant_table_display_order": None},
+            "no_seq_scan": {"yarn_items"},
+        }),
+    ]
+
+
+class StatementRecorder:
+    """Records the SELECT statements (with parameters) executed on an engine while attached."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if LEADING_COMMENT.sub("", statement).upper().startswith("SELECT"):
+            with self._lock:
+                self.statements.append((statement, parameters))
+
+    def take(self) -> list:
+        with self._lock:
+            statements, self.statements = self.statements, []
+        return statements
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        return False
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(statement: str, parameters, natural: bool) -> dict:
+    with engine.connect() as conn:
+        with conn.begin():
+            if not natural:
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            row = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).first()
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def check_plans(plans: list, expect: dict) -> list:
+    """Failure messages for one endpoint's plans."""
+    failures = []
+    nodes = [node for plan in plans for node in plan_nodes(plan)]
+    for index, node_types in expect.get("indexes", {}).items():
+        used = [node["Node Type"] for node in nodes if node.get("Index Name") == index]
+        if not used:
+            failures.append(f"index {index} is not used")
+        elif node_types and not node_types & set(used):
+            failures.append(f"index {index} is read by {', '.join(sorted(set(used)))}, expected {', '.join(sorted(node_types))}")
+    for node in nodes:
+        relation = node.get("Relation Name")
+        if node["Node Type"] in SEQUENTIAL and relation in expect.get("no_seq_scan", ()):
+            failures.append(f"sequential scan on {relation}")
+        if relation in expect.get("not_read", ()):
+            failures.append(f"{relation} is read ({node['Node Type']})")
+    return list(dict.fromkeys(failures))
+
+
+async def capture(checks: list, token: str) -> dict:
+    from main import app
+
+    statements = {}
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    with StatementRecorder(engine) as recorder:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for name, path, _ in checks:
+                response = await client.get(path)
+                response.raise_for_status()
+                statements[name] = recorder.take()
+    return statements
+
+
+def vacuum_analyze():
+    # Fresh statistics, and a visibility map so index-only scans are costed as such
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE table_groups, yarn_items"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Assert index usage of the catalog read paths")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables before seeding")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse an already seeded catalog")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--items", type=int, default=100, help="Items per table group")
+    parser.add_argument("--natural", action="store_true", help="Leave sequential scans enabled while planning")
+    parser.add_argument("--output", default=None, help="Where to write the plans as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Plans of the live queries, not of a published file or a throttled response
+    settings.HOMEPAGE_SNAPSHOT_DIR = None
+    settings.RATE_LIMIT_ENABLED = False
+
+    if args.reset:
+        reset_database()
+
+    db = SessionLocal()
+    try:
+        if args.no_seed:
+            ctx = load_context(db)
+        else:
+            ctx = seed_catalog(db, args.tables, args.items, 0, 0, seed=args.seed)
+    finally:
+        db.close()
+
+    if not ctx["table_group_ids"]:
+        sys.exit("No table groups to check; seed a catalog first")
+
+    checks = build_checks(ctx)
+    statements = asyncio.run(capture(checks, ctx["token"]))
+    vacuum_analyze()
+
+    report, failed = {}, False
+    for name, _, expect in checks:
+        plans = [explain(statement, parameters, args.natural) for statement, parameters in statements[name]]
+        failures = check_plans(plans, expect) if plans else ["no SELECT was captured"]
+        report[name] = {"failures": failures, "plans": plans}
+        failed = failed or bool(failures)
+        print(f"{'FAIL' if failures else 'ok':<5} {name}")
+        for failure in failures:
+            print(f"      {failure}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Plans written to {args.output}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Rate limiter overhead, without a database:
+
+    python -m benchmarks.rate_limit --calls 200000 --keys 10000
+    python -m benchmarks.rate_limit --requests 5000 --output results/rate-limit.json
+
+Times `take()` for each backend over many client keys, then the same
+request through a bare FastAPI app with and without the middleware. For the
+overhead on real endpoints, compare `python -m benchmarks.run` reports made
+with and without `--rate-limit`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import httpx
+from fastapi import FastAPI
+import core.rate_limit as rate_limit
+from core.rate_limit import MemoryBackend, SharedBackend, rate_limit_middleware
+
+PATH = "/api/v1/homepage/tables"
+
+# High enough that no measured call is throttled
+UNLIMITED = (1e9, 1e9)
+
+
+def time_backend(backend, calls: int, keys: int) -> dict:
+    rate, burst = UNLIMITED
+    started = time.perf_counter()
+    for i in range(calls):
+        backend.take(f"{PATH}|10.0.{(i % keys) // 256}.{i % 256}", rate, burst)
+    elapsed = time.perf_counter() - started
+    return {"calls": calls, "keys": keys, "us_per_call": round(elapsed / calls * 1e6, 3)}
+
+
+def build_app(limited: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get(PATH)
+    def homepage():
+        return {"tables": []}
+
+    if limited:
+        app.middleware("http")(rate_limit_middleware)
+    return app
+
+
+async def time_requests(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(requests, 100)):
+            await client.get(PATH)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get(PATH)
+            assert response.status_code == 200
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure rate limiter overhead")
+    parser.add_argument("--calls", type=int, default=100000, help="take() calls per backend")
+    parser.add_argument("--keys", type=int, default=10000, help="Distinct client IPs")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per middleware run")
+    parser.add_argument("--output", default=None, help="Where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    shared_path = os.path.join(tempfile.mkdtemp(), "rate-limit")
+    backends = {"memory": MemoryBackend(), "shared": SharedBackend(path=shared_path)}
+    report = {"backends": {}, "middleware": {}}
+
+    for name, backend in backends.items():
+        report["backends"][name] = stats = time_backend(backend, args.calls, args.keys)
+        print(f"take() {name:<8} {stats['us_per_call']:>8.2f}us")
+
+    rate_limit._limits = {PATH: UNLIMITED}
+    baseline = asyncio.run(time_requests(build_app(limited=False), args.requests))
+    report["middleware"]["none"] = {"us_per_request": round(baseline, 3)}
+    print(f"request  {'none':<8} {baseline:>8.2f}us")
+    for name, backend in backends.items():
+        rate_limit._backend = backend
+        per_request = asyncio.run(time_requests(build_app(limited=True), args.requests))
+        report["middleware"][name] = {
+            "us_per_request": round(per_request, 3),
+            "overhead_us": round(per_request - baseline, 3),
+        }
+        print(f"request  {name:<8} {per_request:>8.2f}us  (+{per_request - baseline:.2f}us)")
+    os.remove(shared_path)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+API benchmark harness.
+
+Seeds a synthetic catalog, drives the real FastAPI app and writes a JSON report:
+
+    python -m benchmarks.run --reset --tables 20 --items 200 --groups 300 --history 50000
+    python -m benchmarks.run --mode uvicorn --concurrency 64 --baseline results/main.json
+    python -m benchmarks.run --rate-limit --baseline results/main.json   # limiter overhead
+
+Run from the backend directory against a disposable database (DATABASE_URL).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+import httpx
+from core.config import settings
+from core.database import SessionLocal, engine
+from models.yarn_item import YarnItem
+from benchmarks.seed import load_context, reset_database, seed_catalog
+from benchmarks.query_counter import QueryCounter
+from benchmarks.compare import compare_results
+
+API_PREFIX = "/api/v1"
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def build_scenarios(ctx: dict, args) -> list:
+    """
+    Build (name, request_factory) pairs. A factory maps a request index to
+    (method, url, json_body) so every request of a run is reproducible.
+    """
+    table_group_ids = ctx["table_group_ids"]
+    group_ids = ctx["group_ids"]
+    target_table = table_group_ids[0]
+    batch_table = table_group_ids[-1]
+
+    db = SessionLocal()
+    try:
+        item_ids = [
+            row.id for row in db.query(YarnItem.id).filter(
+                YarnItem.table_group_id == target_table
+            ).order_by(YarnItem.display_order)
+        ]
+    finally:
+        db.close()
+
+    def homepage(i):
+        return "GET", f"{API_PREFIX}/homepage/tables", None
+
+    def admin_table_groups(i):
+        return "GET", f"{API_PREFIX}/admin/table-groups/", None
+
+    def admin_items(i):
+        table_id = table_group_ids[i % len(table_group_ids)]
+        return "GET", f"{API_PREFIX}/admin/table-groups/{table_id}/items", None
+
+    def batch_create(i):
+        items = [
+            {"count": "30s", "quality": f"Batch {i}-{n}", "rate": 250.5, "display_order": n}
+            for n in range(args.batch_size)
+        ]
+        return "POST", f"{API_PREFIX}/admin/table-groups/{batch_table}/items/batch", {"items": items}
+
+    def reorder(i):
+        ordered = item_ids if i % 2 == 0 else list(reversed(item_ids))
+        items = [{"id": item_id, "display_order": pos} for pos, item_id in enumerate(ordered)]
+        return "PUT", f"{API_PREFIX}/admin/table-groups/{target_table}/items/reorder", {"items": items}
+
+    def broadcast(i):
+        body = {
+            "group_ids": group_ids[:args.broadcast_groups],
+            "message_type": "custom",
+            "custom_message": f"Benchmark broadcast {i}",
+            "send_immediately": True,
+        }
+        return "POST", f"{API_PREFIX}/admin/broadcast", body
+
+    def history(i):
+        return "GET", f"{API_PREFIX}/admin/broadcast/history?limit=20&offset={(i % 10) * 20}", None
+
+    scenarios = [
+        ("homepage", homepage),
+        ("admin_table_groups", admin_table_groups),
+        ("admin_items", admin_items),
+        ("batch_create", batch_create),
+        ("reorder", reorder),
+        ("broadcast", broadcast),
+        ("history", history),
+    ]
+    if not group_ids:
+        scenarios = [s for s in scenarios if s[0] != "broadcast"]
+    if args.only:
+        scenarios = [s for s in scenarios if s[0] in args.only]
+    return scenarios
+
+
+async def run_scenario(client: httpx.AsyncClient, factory, requests: int, concurrency: int, counter) -> dict:
+    """
+    Issue `requests` calls from `concurrency` concurrent clients and collect stats.
+    """
+    latencies = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            method, url, body = factory(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    if counter:
+        counter.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    queries = counter.reset() if counter else None
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "queries_per_request": round(queries / requests, 2) if queries is not None and requests else None,
+    }
+
+
+async def run_all(client: httpx.AsyncClient, scenarios: list, args, counter) -> dict:
+    results = {}
+    for name, factory in scenarios:
+        # Warm connection pools and caches before measuring
+        await run_scenario(client, factory, min(args.warmup, args.requests), 1, None)
+        results[name] = await run_scenario(client, factory, args.requests, args.concurrency, counter)
+        stats = results[name]
+        print(
+            f"{name:<20} {stats['throughput_rps']:>9.1f} rps  "
+            f"p50 {stats['latency_ms']['p50']:>8.2f}ms  "
+            f"p95 {stats['latency_ms']['p95']:>8.2f}ms  "
+            f"p99 {stats['latency_ms']['p99']:>8.2f}ms  "
+            f"queries/req {stats['queries_per_request']}  errors {stats['errors']}"
+        )
+    return results
+
+
+def start_uvicorn(app, host: str, port: int):
+    """Run uvicorn in a background thread of this process so queries can still be counted."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def benchmark(args, ctx: dict) -> dict:
+    from main import app
+
+    headers = {"Authorization": f"Bearer {ctx['token']}"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    scenarios = build_scenarios(ctx, args)
+
+    if args.mode == "asgi":
+        transport = httpx.ASGITransport(app=app)
+        with QueryCounter(engine) as counter:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+                return await run_all(client, scenarios, args, counter)
+
+    if args.mode == "uvicorn":
+        server, thread = start_uvicorn(app, args.host, args.port)
+        try:
+            with QueryCounter(engine) as counter:
+                async with httpx.AsyncClient(
+                    base_url=f"http://{args.host}:{args.port}", headers=headers, limits=limits, timeout=60
+                ) as client:
+                    return await run_all(client, scenarios, args, counter)
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    # External server: statements run in another process and cannot be counted
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=60) as client:
+        return await run_all(client, scenarios, args, None)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Yarn Trading Platform API")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn", "external"], default="asgi")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL for --mode external")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables before seeding")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse an already seeded catalog")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--items", type=int, default=100, help="Items per table group")
+    parser.add_argument("--groups", type=int, default=50, help="WhatsApp groups")
+    parser.add_argument("--history", type=int, default=5000, help="Broadcast history rows")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20, help="Items per batch create request")
+    parser.add_argument("--broadcast-groups", type=int, default=10, help="Groups per broadcast request")
+    parser.add_argument("--only", nargs="*", help="Run only the named endpoints")
+    parser.add_argument("--output", default=None, help="Where to write the JSON report")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression as a fraction")
+    parser.add_argument(
+        "--rate-limit", action="store_true",
+        help="Keep the rate limiting middleware installed, with limits no run can reach, to measure its overhead"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # One client IP sends every request, so real limits would throttle the run
+    if args.rate_limit:
+        settings.RATE_LIMITS = {path: [1e9, 1e9] for path in settings.RATE_LIMITS}
+    else:
+        settings.RATE_LIMIT_ENABLED = False
+
+    # --mode uvicorn runs the lifespan: background workers would send the seeded overdue
+    # broadcasts, probe the fake invite links and deactivate groups mid-run
+    settings.SCHEDULER_ENABLED = False
+    settings.RECURRING_ENABLED = False
+    settings.HISTORY_MAINTENANCE_ENABLED = False
+    settings.WHATSAPP_LINK_CHECK_ENABLED = False
+
+    if args.reset:
+        reset_database()
+
+    db = SessionLocal()
+    try:
+        if args.no_seed:
+            ctx = load_context(db)
+        else:
+            ctx = seed_catalog(db, args.tables, args.items, args.groups, args.history, seed=args.seed)
+    finally:
+        db.close()
+
+    if not ctx["table_group_ids"]:
+        sys.exit("No table groups to benchmark; seed a catalog first")
+
+    endpoints = asyncio.run(benchmark(args, ctx))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "mode": args.mode,
+            "catalog": {
+                "seed": args.seed,
+                "tables": args.tables,
+                "items_per_table": args.items,
+                "groups": args.groups,
+                "history_rows": args.history,
+            },
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "rate_limit": args.rate_limit,
+        },
+        "endpoints": endpoints,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.mode}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
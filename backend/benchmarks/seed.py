@@ -0,0 +1,159 @@
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from core.database import Base, engine
+from core.security import get_password_hash, create_access_token
+from models.tenant import Tenant
+from models.admin_user import AdminUser
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+from models.whatsapp_group import WhatsAppGroup
+from models.broadcast_history import BroadcastHistory
+from services.message_store import store_message
+from services.history_retention import ensure_partitions
+from core.tenancy import create_default_tenant
+
+BENCHMARK_ADMIN_EMAIL = "benchmark@example.com"
+BENCHMARK_ADMIN_PASSWORD = "benchmark"
+
+COUNTS = ["2/20s", "2/30s", "2/40s", "10s", "16s", "20s", "24s", "30s", "32s", "40s", "60s"]
+QUALITIES = [
+    "Cotton Carded", "Cotton Combed", "Cotton Compact", "Polyester Spun",
+    "PC 52/48", "PV 65/35", "Viscose Vortex", "Slub", "Melange", "Open End",
+]
+STATUSES = ["pending", "scheduled", "sent", "failed"]
+
+# Rows per INSERT statement when seeding large catalogs
+CHUNK_SIZE = 1000
+
+# Seeded history is spread over the 90 days before this, whenever the seed runs
+SEED_BASE_TIME = datetime(2026, 1, 1)
+
+
+def reset_database():
+    """
+    Drop and recreate every table. Only point this at a disposable database.
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Seeded history reaches 90 days back from SEED_BASE_TIME
+    with engine.begin() as conn:
+        create_default_tenant(conn)
+        ensure_partitions(conn, since=min(SEED_BASE_TIME.date(), date.today()) - timedelta(days=92))
+
+
+def _insert_chunked(db: Session, model, rows: list):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def _ensure_admin(db: Session):
+    admin = db.query(AdminUser).filter(AdminUser.email == BENCHMARK_ADMIN_EMAIL).first()
+    if not admin:
+        admin = AdminUser(
+            email=BENCHMARK_ADMIN_EMAIL,
+            password_hash=get_password_hash(BENCHMARK_ADMIN_PASSWORD)
+        )
+        db.add(admin)
+
+
+def seed_catalog(
+    db: Session,
+    tables: int,
+    items_per_table: int,
+    groups: int,
+    history_rows: int,
+    seed: int = 42,
+    base_time: datetime = SEED_BASE_TIME
+) -> dict:
+    """
+    Seed a reproducible synthetic catalog.
+
+    The same arguments and seed always produce the same rows (history is
+    timed relative to `base_time`, not the clock), so two benchmark runs
+    against freshly seeded databases are directly comparable.
+    Returns the ids the benchmark scenarios need along with an admin token.
+    """
+    rng = random.Random(seed)
+
+    _ensure_admin(db)
+
+    table_groups = [
+        TableGroup(
+            table_name=f"Bench Table {seed}-{idx + 1}",
+            display_order=idx,
+            show_on_homepage=rng.random() > 0.1
+        )
+        for idx in range(tables)
+    ]
+    db.add_all(table_groups)
+
+    whatsapp_groups = [
+        WhatsAppGroup(
+            group_name=f"Bench Group {idx + 1}",
+            group_invite_id=f"B{seed}x{idx:06d}",
+            is_active=True
+        )
+        for idx in range(groups)
+    ]
+    db.add_all(whatsapp_groups)
+    db.flush()
+
+    table_group_ids = [tg.id for tg in table_groups]
+    group_ids = [g.id for g in whatsapp_groups]
+
+    item_rows = []
+    for table_group_id in table_group_ids:
+        for idx in range(items_per_table):
+            item_rows.append({
+                "table_group_id": table_group_id,
+                "count": rng.choice(COUNTS),
+                "quality": rng.choice(QUALITIES),
+                "rate": Decimal(rng.randrange(15000, 45000)) / 100,
+                "display_order": idx,
+                "show_on_homepage": rng.random() > 0.05,
+            })
+    _insert_chunked(db, YarnItem, item_rows)
+
+    # A handful of distinct bodies, as real broadcasts reuse one message per send
+    message_hashes = [
+        store_message(db, f"Benchmark broadcast {idx}\n" + "x" * rng.randrange(200, 2000))
+        for idx in range(min(history_rows, 50))
+    ]
+
+    history = []
+    if group_ids:
+        for idx in range(history_rows):
+            scheduled_for = base_time - timedelta(minutes=rng.randrange(0, 60 * 24 * 90))
+            status = rng.choice(STATUSES)
+            history.append({
+                "group_id": rng.choice(group_ids),
+                "message_hash": rng.choice(message_hashes),
+                "table_group_ids": rng.sample(table_group_ids, min(3, len(table_group_ids))) or None,
+                "message_type": "auto_generate",
+                "scheduled_for": scheduled_for,
+                "sent_at": scheduled_for + timedelta(seconds=rng.randrange(0, 300)) if status == "sent" else None,
+                "status": status,
+            })
+    _insert_chunked(db, BroadcastHistory, history)
+
+    db.commit()
+
+    return {
+        "token": create_access_token(data={"sub": BENCHMARK_ADMIN_EMAIL}),
+        "table_group_ids": table_group_ids,
+        "group_ids": group_ids,
+    }
+
+
+def load_context(db: Session) -> dict:
+    """The ids and admin token of an already seeded catalog, for runs that skip seeding."""
+    _ensure_admin(db)
+    db.commit()
+    return {
+        "token": create_access_token(data={"sub": BENCHMARK_ADMIN_EMAIL}),
+        "table_group_ids": [row.id for row in db.query(TableGroup.id).order_by(TableGroup.id)],
+        "group_ids": [row.id for row in db.query(WhatsAppGroup.id).order_by(WhatsAppGroup.id)],
+    }
@@ -1,9 +1,12 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5                        # Connections kept open per worker process
+    DB_MAX_OVERFLOW: int = 10                    # Extra connections per worker under load
     
     # JWT
     SECRET_KEY: str
@@ -13,6 +16,151 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
+    # Production server (gunicorn.conf.py)
+    WEB_CONCURRENCY: int = 0                     # Worker processes; 0 = one per CPU core
+    SERVER_BIND: str = "0.0.0.0:8000"
+    SERVER_BACKLOG: int = 2048                   # Pending connections queued by the kernel
+    SERVER_KEEPALIVE_SECONDS: int = 65           # Longer than the load balancer's idle timeout
+    SERVER_TIMEOUT_SECONDS: int = 60             # Unresponsive workers are killed after this
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30    # Must exceed SHUTDOWN_DRAIN_SECONDS
+    SERVER_MAX_REQUESTS: int = 10000             # Recycle a worker after this many requests
+    SERVER_MAX_REQUESTS_JITTER: int = 1000       # So workers do not all restart together
+    SERVER_PRELOAD: bool = True                  # Import the app once in the master, then fork
+    SERVER_WARMUP: bool = True                   # Prime the DB pool and catalog before serving
+    # Proxies whose X-Forwarded-For is believed (comma-separated IPs). The rate limiter keys on the
+    # resulting client IP: leave out the load balancer and every visitor shares its bucket; use "*"
+    # while the app is reachable directly and clients can spoof their way past the limits.
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    
+    # Rate limiting: one token bucket per client IP and route, checked before any database work
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"           # memory (per process) | shared (all processes on this host)
+    RATE_LIMITS: Dict[str, List[float]] = {      # Path -> [requests per minute, burst]
+        "/api/v1/homepage/tables": [120.0, 30.0],
+        "/api/v1/admin/login": [10.0, 5.0],
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000            # memory: buckets kept per process, least recently used dropped
+    RATE_LIMIT_SHARED_PATH: str = "/dev/shm/hstraders-rate-limit"
+    RATE_LIMIT_SHARED_SLOTS: int = 65536         # shared: bucket slots in the memory-mapped table
+    
+    # Multi-tenancy
+    DEFAULT_TENANT_SLUG: str = "default"
+    TENANT_CACHE_SECONDS: float = 60.0               # Host/slug -> tenant lookups are cached this long
+    TENANT_CACHE_SIZE: int = 1024                    # Known hosts/slugs cached (least recently used dropped)
+    TENANT_MISS_CACHE_SIZE: int = 256                # Unknown hosts/slugs cached, kept apart so they cannot evict known ones
+    TENANT_BROADCAST_RATE_PER_MINUTE: float = 60.0   # Per-tenant send cap unless the tenant overrides it
+    
+    # Broadcast scheduling
+    BROADCAST_SPREAD_POLICY: str = "fixed"       # fixed | rate | window
+    BROADCAST_INTERVAL_SECONDS: float = 120.0    # fixed: gap between consecutive groups
+    BROADCAST_RATE_PER_MINUTE: float = 30.0      # rate: sends per minute
+    BROADCAST_WINDOW_MINUTES: float = 10.0       # window: spread all groups across this window
+    SCHEDULER_ENABLED: bool = True
+    # Advisory-lock shards shared by all worker processes. Each process takes one; shards still free
+    # SCHEDULER_RECOVERY_SECONDS later are taken over, so more shards than processes only delays
+    # those rows by that interval instead of stranding them.
+    SCHEDULER_SHARDS: int = 1
+    SCHEDULER_POLL_SECONDS: float = 2.0
+    SCHEDULER_HORIZON_SECONDS: float = 300.0     # Only rows due within this window are held in memory
+    SCHEDULER_MAX_QUEUE: int = 10000
+    SCHEDULER_BATCH_SIZE: int = 200
+    SCHEDULER_SEND_CONCURRENCY: int = 8
+    SCHEDULER_LEASE_SECONDS: float = 120.0       # Claimed rows not heartbeated for this long are recovered
+    SCHEDULER_RECOVERY_SECONDS: float = 60.0     # Interval of the stale-claim recovery sweep
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0         # On shutdown, wait this long for in-flight sends
+    
+    # Recurring broadcasts
+    RECURRING_ENABLED: bool = True
+    RECURRING_POLL_SECONDS: float = 30.0
+    RECURRING_MATERIALIZE_AHEAD_HOURS: float = 24.0  # History rows are created this far ahead
+    RECURRING_RENDER_LEAD_SECONDS: float = 120.0     # Messages are rendered this long before sending
+    RECURRING_BATCH_SIZE: int = 1000                 # Rows per INSERT when materializing
+    
+    # Idempotency-Key handling for mutating admin requests
+    IDEMPOTENCY_TTL_SECONDS: int = 86400         # Completed responses are replayed for this long
+    IDEMPOTENCY_LOCK_SECONDS: int = 120          # An in-flight claim lapses after this (request died)
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0       # Duplicates wait this long for the first request
+    IDEMPOTENCY_POLL_SECONDS: float = 0.25       # Recheck interval while waiting on another process
+    
+    # WhatsApp group import and invite link health checks
+    WHATSAPP_IMPORT_MAX_GROUPS: int = 1000       # Links per import request
+    WHATSAPP_LINK_CHECK_ENABLED: bool = True
+    WHATSAPP_LINK_CHECK_INTERVAL_HOURS: float = 24.0
+    WHATSAPP_LINK_CHECK_URL: str = "https://chat.whatsapp.com/{invite_id}"  # Point at a local fake endpoint to test
+    WHATSAPP_LINK_CHECK_CONCURRENCY: int = 10    # Requests in flight at once
+    WHATSAPP_LINK_CHECK_TIMEOUT: float = 10.0
+    WHATSAPP_LINK_DEAD_MARKERS: List[str] = []   # Page text of a revoked link; 404/410 always count as dead
+    WHATSAPP_LINK_DEAD_AFTER: int = 2            # Consecutive dead checks before a group is deactivated
+    WHATSAPP_LINK_MAX_DEAD_FRACTION: float = 0.5 # A run finding more dead links than this deactivates nothing
+    
+    # Broadcast preview
+    WHATSAPP_MESSAGE_LIMIT: int = 4096           # Characters per WhatsApp text message
+    PREVIEW_CACHE_SIZE: int = 256                # Memoized previews per process
+    
+    # Broadcast history partitioning and retention
+    HISTORY_MAINTENANCE_ENABLED: bool = True
+    HISTORY_MAINTENANCE_INTERVAL_HOURS: float = 24.0
+    HISTORY_PARTITIONS_AHEAD: int = 3                 # Monthly partitions created in advance
+    HISTORY_RETENTION_MONTHS: int = 12                # Older partitions are archived and dropped; 0 keeps all
+    HISTORY_ARCHIVE_DIR: str = "archive/broadcast_history"
+    
+    # Admin listings
+    ADMIN_LIST_MAX_LIMIT: int = 1000             # Largest (and default) page size
+    
+    # Admin audit log, written behind the request in batches
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10000                # Events held in memory; more spill to AUDIT_SPILL_DIR
+    AUDIT_BATCH_SIZE: int = 500                  # Rows per multi-row INSERT
+    AUDIT_FLUSH_SECONDS: float = 1.0             # Longest an event waits for its batch to fill
+    AUDIT_RETRY_SECONDS: float = 5.0             # Pause after a failed write before the next attempt
+    AUDIT_SPILL_DIR: str = "cache/audit"         # JSON lines the database could not take in time
+    
+    # Static homepage snapshots (disabled unless HOMEPAGE_SNAPSHOT_DIR is set)
+    HOMEPAGE_SNAPSHOT_DIR: Optional[str] = None  # Shared by every instance that serves or writes the catalog
+    HOMEPAGE_SNAPSHOT_MODE: str = "serve"        # serve (file from Python) | redirect (to URL) | accel (X-Accel-Redirect)
+    HOMEPAGE_SNAPSHOT_URL: Optional[str] = None  # redirect/accel: where the web server exposes HOMEPAGE_SNAPSHOT_DIR
+    HOMEPAGE_SNAPSHOT_KEEP: int = 5              # Published versions kept per tenant
+    HOMEPAGE_PUBLISH_DEBOUNCE_SECONDS: float = 2.0   # Publish once writes are quiet for this long...
+    HOMEPAGE_PUBLISH_MAX_DELAY_SECONDS: float = 10.0 # ...or this long after the first write at the latest
+    
+    # Catalog export
+    EXPORT_PAGE_SIZE: int = 10000                # Rows per short read transaction
+    EXPORT_FETCH_SIZE: int = 1000                # Rows per server-side cursor fetch and response chunk
+    
+    # Price sheets (PNG/PDF)
+    PRICE_SHEET_WORKERS: int = 2                 # Render processes
+    PRICE_SHEET_RENDER_TIMEOUT: float = 30.0
+    PRICE_SHEET_CACHE_DIR: str = "cache/price_sheets"
+    PRICE_SHEET_CACHE_MAX_AGE_DAYS: float = 7.0  # Sheets unused this long are pruned by history maintenance; 0 keeps all
+    PRICE_SHEET_FONT: Optional[str] = None       # TTF path; Pillow's bundled font otherwise
+    PRICE_SHEET_CURRENCY: str = "Rs"             # Use "₹" with a font that has the glyph
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"                     # json | text
+    LOG_QUEUE_SIZE: int = 10000                  # Records beyond this are dropped rather than blocking
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0           # Fraction of requests (or records outside requests) that keep DEBUG logs
+    LOG_REQUESTS: bool = True                    # One structured line per request
+    LOG_UVICORN_ACCESS: bool = False             # Uvicorn's own access log duplicates LOG_REQUESTS
+    LOG_SQL_COMMENTS: bool = False               # Prefix SQL with /* request_id=... */ for database-side logs
+    
+    # Profiling (development/staging only)
+    PROFILING_ENABLED: bool = False              # Profile every request
+    PROFILING_HEADER_ENABLED: bool = False       # Profile requests sent with an X-Profile header
+    PROFILING_SLOW_REQUEST_MS: float = 500.0
+    PROFILING_N_PLUS_ONE_THRESHOLD: int = 5      # Repeats of one statement before it is flagged
+    PROFILING_SAMPLE_RATE: float = 0.0           # Fraction of profiled requests run under cProfile
+    PROFILING_DUMP_DIR: Optional[str] = None     # Write .prof files for sampled requests here
+    
+    @model_validator(mode="after")
+    def check_homepage_snapshot_url(self):
+        # Fail at startup rather than on every homepage request
+        if self.HOMEPAGE_SNAPSHOT_MODE not in ("serve", "redirect", "accel"):
+            raise ValueError(f"Unknown HOMEPAGE_SNAPSHOT_MODE: {self.HOMEPAGE_SNAPSHOT_MODE}")
+        if self.HOMEPAGE_SNAPSHOT_MODE != "serve" and not self.HOMEPAGE_SNAPSHOT_URL:
+            raise ValueError(f"HOMEPAGE_SNAPSHOT_URL is required with HOMEPAGE_SNAPSHOT_MODE={self.HOMEPAGE_SNAPSHOT_MODE}")
+        return self
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,16 +1,19 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from .config import settings
+from .log import current_request_id
+from .profiling import current_profile, record_statement
 
 # Configure engine with connection pooling and SSL settings
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Verify connections before using them
     pool_recycle=300,    # Recycle connections after 5 minutes
-    pool_size=5,         # Number of connections to maintain
-    max_overflow=10,     # Maximum overflow connections
+    pool_size=settings.DB_POOL_SIZE,        # Number of connections to maintain
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Maximum overflow connections
     connect_args={
         "connect_timeout": 10,
         "keepalives": 1,
@@ -19,6 +22,34 @@ engine = create_engine(
         "keepalives_count": 5,
     }
 )
+
+# Per-request SQL profiling (see core.profiling); a no-op unless a profile is active
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if starts:
+        record_statement(statement, parameters, (time.perf_counter() - starts.pop()) * 1000)
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+if settings.LOG_SQL_COMMENTS:
+    # Tag statements with the request id so database-side logs can be correlated
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _comment_request_id(conn, cursor, statement, parameters, context, executemany):
+        request_id = current_request_id()
+        if request_id:
+            statement = f"/* request_id={request_id} */ {statement}"
+        return statement, parameters
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+from core.database import engine
+from core.profiling import ProfiledRoute
+from core.security import decode_access_token
+from models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# Recomputed by Response on replay
+_SKIPPED_HEADERS = {"content-length"}
+
+# Requests running in this process, so local duplicates wake as soon as they finish
+_in_flight = {}
+_last_purge = 0.0
+
+
+def _claim(key: str, fingerprint: str):
+    """
+    Claim `key` for this request. Returns (True, None) when claimed, otherwise
+    (False, existing row in flight or completed); the row is None if it vanished
+    meanwhile. Expired rows are taken over.
+    """
+    global _last_purge
+    with engine.begin() as conn:
+        if time.time() - _last_purge > 60:
+            _last_purge = time.time()
+            conn.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
+
+        lock_until = func.now() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        statement = insert(IdempotencyKey).values(key=key, fingerprint=fingerprint, expires_at=lock_until)
+        claimed = conn.execute(
+            statement.on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "fingerprint": fingerprint,
+                    "status_code": None,
+                    "headers": None,
+                    "body": None,
+                    "created_at": func.now(),
+                    "expires_at": lock_until,
+                },
+                where=IdempotencyKey.expires_at < func.now()
+            ).returning(IdempotencyKey.key)
+        ).first()
+        if claimed:
+            return True, None
+        return False, conn.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.headers, IdempotencyKey.body)
+            .where(IdempotencyKey.key == key)
+        ).first()
+
+
+def _complete(key: str, response: Response):
+    headers = [[name, value] for name, value in response.headers.items() if name not in _SKIPPED_HEADERS]
+    with engine.begin() as conn:
+        conn.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(
+                status_code=response.status_code,
+                headers=headers,
+                body=bytes(response.body),
+                expires_at=func.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            )
+        )
+
+
+def _release(key: str):
+    with engine.begin() as conn:
+        conn.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+
+
+def _owner(request: Request):
+    """Tenant and admin from the bearer token, or None so the handler answers 401 itself."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return f"{payload.get('tid')}:{payload['sub']}"
+
+
+def _replay(row) -> Response:
+    response = Response(content=row.body, status_code=row.status_code)
+    for name, value in row.headers or []:
+        response.headers.append(name, value)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+class IdempotentRoute(ProfiledRoute):
+    """
+    Route class for admin routers whose mutations clients may retry.
+
+    A POST/PUT/PATCH/DELETE with an `Idempotency-Key` header runs once per
+    admin and key. The response (status, headers, body) is stored in
+    `idempotency_keys` and replayed for `IDEMPOTENCY_TTL_SECONDS` without
+    calling the handler. A duplicate that arrives while the first request is
+    still running waits for its response. Reusing a key for a different
+    request is a 422. Errors (raised HTTPExceptions and 5xx responses) are
+    not stored, so the retry runs again.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not self.methods & MUTATING_METHODS:
+            return handler
+
+        async def idempotent_handler(request: Request) -> Response:
+            header = request.headers.get("idempotency-key")
+            owner = _owner(request) if header else None
+            if owner is None:
+                return await handler(request)
+            if len(header) > MAX_KEY_LENGTH:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+                )
+
+            key = hashlib.sha256(f"{owner}\n{header}".encode("utf-8")).hexdigest()
+            # Starlette caches the body on the request, so the handler can still read it
+            fingerprint = hashlib.sha256(
+                f"{request.method} {request.url.path}?{request.url.query}\n".encode("utf-8") + await request.body()
+            ).hexdigest()
+
+            deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+            while True:
+                claimed, row = await run_in_threadpool(_claim, key, fingerprint)
+                if claimed:
+                    break
+                if row is None:
+                    continue
+                if row.fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used for a different request"
+                    )
+                if row.status_code is not None:
+                    return _replay(row)
+                if time.monotonic() >= deadline:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress"
+                    )
+                local = _in_flight.get(key)
+                if local is not None:
+                    try:
+                        await asyncio.wait_for(local.wait(), settings.IDEMPOTENCY_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+            done = _in_flight[key] = asyncio.Event()
+            stored = False
+            try:
+                response = await handler(request)
+                if response.status_code < 500 and hasattr(response, "body"):
+                    try:
+                        await run_in_threadpool(_complete, key, response)
+                        stored = True
+                    except Exception:
+                        # The work is done either way; a retry will run it again
+                        logger.warning("Could not store idempotent response", exc_info=True)
+                return response
+            finally:
+                if not stored:
+                    try:
+                        await run_in_threadpool(_release, key)
+                    except Exception:
+                        logger.warning("Could not release idempotency key", exc_info=True)
+                _in_flight.pop(key, None)
+                done.set()
+
+        return idempotent_handler
@@ -0,0 +1,216 @@
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import Request
+from .config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_log_context = contextvars.ContextVar("log_context", default={})
+# Per-request decision for sampled debug logs; None outside requests
+_debug_sampled = contextvars.ContextVar("debug_sampled", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "context"}
+
+_listener = None
+_dropped = 0
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Add fields to every log record emitted inside the block (this thread/task only)."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp records with the request id and log context. Runs in the emitting
+    thread, before the record crosses the queue, so contextvars are still visible.
+    """
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        record.context = _log_context.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep only a sample of DEBUG records. Inside a request the decision is made
+    once per request so a sampled request keeps all of its debug lines.
+    """
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or settings.LOG_DEBUG_SAMPLE_RATE >= 1.0:
+            return True
+        sampled = _debug_sampled.get()
+        if sampled is None:
+            sampled = random.random() < settings.LOG_DEBUG_SAMPLE_RATE
+        return sampled
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(getattr(record, "context", None) or {})
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development; extra fields are appended as JSON."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        line = super().format(record)
+        extra = {**(getattr(record, "context", None) or {})}
+        extra.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        return f"{line} {json.dumps(extra, default=str, ensure_ascii=False)}" if extra else line
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueue without ever blocking the caller; when the queue is full the
+    record is dropped and counted instead.
+    """
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+    def prepare(self, record):
+        # Resolve the message and traceback here; the listener thread only formats
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """
+    Route all logging through a bounded queue drained by a background listener,
+    so request and worker threads never wait on log I/O.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(DebugSamplingFilter())
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    # Send uvicorn's own loggers through the same pipeline
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    if not settings.LOG_UVICORN_ACCESS:
+        logging.getLogger("uvicorn.access").disabled = True
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def restart_logging():
+    """
+    Start a fresh listener in a forked worker. Threads do not survive fork, so
+    the listener of a parent that imported the app (gunicorn preload) is gone.
+    """
+    global _listener
+    _listener = None
+    setup_logging()
+
+
+def shutdown_logging():
+    """Flush queued records; called last during application shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        if _dropped:
+            sys.stderr.write(f"logging: dropped {_dropped} records because the log queue was full\n")
+
+
+logger = logging.getLogger("request")
+
+
+async def request_id_middleware(request: Request, call_next):
+    """
+    Give every request an id (the caller's X-Request-ID when valid), expose it
+    to logs through contextvars and echo it in the response.
+    """
+    incoming = request.headers.get(REQUEST_ID_HEADER)
+    request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+    request_token = _request_id.set(request_id)
+    sampled_token = _debug_sampled.set(random.random() < settings.LOG_DEBUG_SAMPLE_RATE)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        if settings.LOG_REQUESTS:
+            logger.info(
+                "request",
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                }
+            )
+        _debug_sampled.reset(sampled_token)
+        _request_id.reset(request_token)
@@ -0,0 +1,214 @@
+import asyncio
+import cProfile
+import contextvars
+import functools
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from fastapi import Request
+from fastapi.routing import APIRoute
+from .config import settings
+
+logger = logging.getLogger("profiling")
+
+PROFILE_HEADER = "X-Profile"
+
+# Keep at most this many individual statements per request in the log record
+MAX_RECORDED_STATEMENTS = 200
+
+_current_profile = contextvars.ContextVar("request_profile", default=None)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Collapse placeholders so the same query with different parameters
+    (including expanded IN lists of different length) maps to one key.
+    """
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    return " ".join(statement.split())
+
+
+class RequestProfile:
+    """
+    SQL statements executed while serving one request.
+    """
+
+    def __init__(self, method: str, path: str, sampled: bool = False):
+        self.method = method
+        self.path = path
+        self.sampled = sampled
+        self.statement_count = 0
+        self.db_ms = 0.0
+        self.statements = []
+        self.groups = {}
+        self.profiler = None
+
+    def record(self, statement: str, parameters, duration_ms: float):
+        self.statement_count += 1
+        self.db_ms += duration_ms
+
+        key = normalize_statement(statement)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {"count": 0, "total_ms": 0.0, "params": set()}
+        group["count"] += 1
+        group["total_ms"] += duration_ms
+        group["params"].add(repr(parameters))
+
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append({"statement": key, "ms": round(duration_ms, 3)})
+
+    def n_plus_one_suspects(self, threshold: int) -> list:
+        """
+        Statements repeated at least `threshold` times with differing parameters,
+        e.g. a `.first()` lookup inside a loop.
+        """
+        return [
+            {"statement": key, "count": group["count"], "total_ms": round(group["total_ms"], 3)}
+            for key, group in self.groups.items()
+            if group["count"] >= threshold and len(group["params"]) > 1
+        ]
+
+    def server_timing(self, total_ms: float, suspects: list) -> str:
+        parts = [
+            f'db;dur={self.db_ms:.2f};desc="{self.statement_count} queries"',
+            f"app;dur={max(total_ms - self.db_ms, 0):.2f}",
+            f"total;dur={total_ms:.2f}",
+        ]
+        if suspects:
+            parts.append(f'nplus1;desc="{len(suspects)} suspects"')
+        return ", ".join(parts)
+
+    def hot_paths(self, limit: int = 25) -> str:
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def record_statement(statement: str, parameters, duration_ms: float):
+    """Called from the engine event hooks in core.database."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, parameters, duration_ms)
+
+
+def _should_profile(request: Request) -> bool:
+    if settings.PROFILING_ENABLED:
+        return True
+    return settings.PROFILING_HEADER_ENABLED and PROFILE_HEADER in request.headers
+
+
+def _should_sample(request: Request) -> bool:
+    if settings.PROFILING_HEADER_ENABLED and request.headers.get(PROFILE_HEADER) == "cprofile":
+        return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def _dump_profile(profile: RequestProfile):
+    if not settings.PROFILING_DUMP_DIR:
+        return None
+    os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+    name = f"{int(time.time() * 1000)}-{profile.method}-{profile.path.strip('/').replace('/', '_')}.prof"
+    path = os.path.join(settings.PROFILING_DUMP_DIR, name)
+    profile.profiler.dump_stats(path)
+    return path
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Record SQL for profiled requests, emit a Server-Timing header and log slow
+    requests and N+1 suspects as structured JSON.
+    """
+    if not _should_profile(request):
+        return await call_next(request)
+
+    profile = RequestProfile(request.method, request.url.path, sampled=_should_sample(request))
+    token = _current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current_profile.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    suspects = profile.n_plus_one_suspects(settings.PROFILING_N_PLUS_ONE_THRESHOLD)
+    response.headers["Server-Timing"] = profile.server_timing(total_ms, suspects)
+
+    slow = total_ms >= settings.PROFILING_SLOW_REQUEST_MS
+    record = {
+        "event": "slow_request" if slow else "request_profile",
+        "method": profile.method,
+        "path": profile.path,
+        "status": response.status_code,
+        "total_ms": round(total_ms, 3),
+        "db_ms": round(profile.db_ms, 3),
+        "query_count": profile.statement_count,
+        "n_plus_one": suspects,
+    }
+    if slow or suspects:
+        record["statements"] = profile.statements
+    if profile.profiler is not None:
+        record["profile_dump"] = _dump_profile(profile)
+        record["hot_paths"] = profile.hot_paths()
+
+    if slow or suspects:
+        logger.warning(record["event"], extra={"profile": record})
+    else:
+        logger.debug(record["event"], extra={"profile": record})
+
+    return response
+
+
+def _profiled(endpoint):
+    """
+    Wrap an endpoint so sampled requests run under cProfile. Sync endpoints
+    execute in the threadpool, so the profiler has to be enabled inside the
+    wrapped call rather than in the middleware.
+    """
+    if getattr(endpoint, "_profiled", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None or not profile.sampled:
+                return await endpoint(*args, **kwargs)
+            profile.profiler = cProfile.Profile()
+            profile.profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None or not profile.sampled:
+                return endpoint(*args, **kwargs)
+            profile.profiler = cProfile.Profile()
+            return profile.profiler.runcall(endpoint, *args, **kwargs)
+
+    wrapper._profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class used by the API routers so sampled requests can be profiled.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
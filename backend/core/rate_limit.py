@@ -0,0 +1,134 @@
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from core.config import settings
+
+# Shared table slot: key hash, tokens, last refill (wall clock, comparable across processes)
+_SLOT = struct.Struct("<Qdd")
+# Slots probed per key before the least recently used one is taken over
+_PROBES = 8
+
+
+def _refill(tokens: float, last: float, now: float, rate: float, capacity: float) -> tuple:
+    """Token bucket step: returns (tokens left, seconds until a token is available)."""
+    tokens = min(capacity, tokens + max(0.0, now - last) * rate)
+    if tokens >= 1.0:
+        return tokens - 1.0, 0.0
+    return tokens, (1.0 - tokens) / rate
+
+
+class MemoryBackend:
+    """
+    Buckets in a dict of this process, least recently used dropped past
+    `max_keys`. Each worker process limits on its own.
+    """
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.time()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (capacity, now))
+            tokens, wait = _refill(tokens, last, now, rate, capacity)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SharedBackend:
+    """
+    Buckets in a fixed-size hash table in a memory-mapped file (tmpfs by
+    default), so every process on the host shares them whether or not
+    gunicorn preloaded the app. Access is serialized with flock.
+
+    A key that finds no free slot among its probes takes over the least
+    recently touched one. An idle bucket refills, so evicting one only
+    forgets a client that was no longer being throttled.
+    """
+
+    def __init__(self, path: str = None, slots: int = None):
+        self.path = path or settings.RATE_LIMIT_SHARED_PATH
+        self.slots = slots or settings.RATE_LIMIT_SHARED_SLOTS
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # flock is per open file, so a forked child needs its own descriptor
+        if self._pid == os.getpid():
+            return
+        size = self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        digest = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+        now = time.time()
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, tokens, last = None, capacity, now
+                oldest, oldest_last = None, math.inf
+                for probe in range(_PROBES):
+                    position = ((digest + probe) % self.slots) * _SLOT.size
+                    slot_key, slot_tokens, slot_last = _SLOT.unpack_from(self._map, position)
+                    if slot_key == digest:
+                        offset, tokens, last = position, slot_tokens, slot_last
+                        break
+                    if slot_key == 0:
+                        slot_last = -1.0  # Free slots are taken first
+                    if slot_last < oldest_last:
+                        oldest, oldest_last = position, slot_last
+                if offset is None:
+                    offset = oldest
+
+                tokens, wait = _refill(tokens, last, now, rate, capacity)
+                _SLOT.pack_into(self._map, offset, digest, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return wait
+
+
+BACKENDS = {"memory": MemoryBackend, "shared": SharedBackend}
+
+# Path -> (tokens per second, burst)
+_limits = {path: (per_minute / 60.0, burst) for path, (per_minute, burst) in settings.RATE_LIMITS.items()}
+_backend = BACKENDS[settings.RATE_LIMIT_BACKEND]()
+
+
+async def rate_limit_middleware(request: Request, call_next):
+    """
+    Throttle configured routes per client IP. Rejected requests get a 429
+    with Retry-After before any dependency (and so any database session) runs.
+    """
+    limit = _limits.get(request.url.path)
+    # CORS preflights must not spend the tokens of the request they announce
+    if limit is None or request.method == "OPTIONS":
+        return await call_next(request)
+
+    rate, burst = limit
+    client = request.client.host if request.client else "unknown"
+    wait = _backend.take(f"{request.url.path}|{client}", rate, burst)
+    if wait:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests"},
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+    return await call_next(request)
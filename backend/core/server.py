@@ -0,0 +1,52 @@
+import logging
+import time
+from uvicorn_worker import UvicornWorker
+from core.config import settings
+from core.database import SessionLocal, engine
+from models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+
+class ProductionWorker(UvicornWorker):
+    """
+    Gunicorn worker running the app on uvloop and httptools. Keep-alive,
+    backlog and max-requests come from gunicorn.conf.py.
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "proxy_headers": True,
+        "server_header": False,
+    }
+
+
+def warm_up():
+    """
+    Run in each worker before it accepts traffic: open the pool's connections
+    and render every active tenant's homepage once, so the first requests do
+    not pay for connection setup and cold database pages.
+    """
+    # Imported here so gunicorn.conf.py can load this module before the app
+    from services.homepage import load_homepage
+
+    started = time.perf_counter()
+    connections = [engine.connect() for _ in range(settings.DB_POOL_SIZE)]
+    for connection in connections:
+        connection.exec_driver_sql("SELECT 1")
+    for connection in connections:
+        connection.close()
+
+    db = SessionLocal()
+    try:
+        tenant_ids = [row.id for row in db.query(Tenant.id).filter(Tenant.is_active == True)]
+        for tenant_id in tenant_ids:
+            load_homepage(db, tenant_id)
+    finally:
+        db.close()
+
+    logger.info(
+        "Worker warmed up",
+        extra={"connections": len(connections), "tenants": len(tenant_ids), "ms": round((time.perf_counter() - started) * 1000, 1)}
+    )
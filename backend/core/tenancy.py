@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import engine
+from models.tenant import Tenant
+
+# Existing single-tenant data belongs here (every tenant_id column defaults to it)
+DEFAULT_TENANT_ID = 1
+
+# Host/slug -> tenant id, least recently used dropped past the size. Misses
+# (keys are client-controlled) go to a small cache of their own so a flood of
+# unknown hosts cannot evict known tenants.
+_cache = OrderedDict()
+_misses = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def create_default_tenant(conn: Connection):
+    conn.execute(text(
+        "INSERT INTO tenants (id, slug, name, is_active) VALUES (:id, :slug, :name, true) "
+        "ON CONFLICT DO NOTHING"
+    ), {"id": DEFAULT_TENANT_ID, "slug": settings.DEFAULT_TENANT_SLUG, "name": "Default"})
+    conn.execute(text(
+        "SELECT setval(pg_get_serial_sequence('tenants', 'id'), (SELECT max(id) FROM tenants))"
+    ))
+
+
+def ensure_default_tenant():
+    """Create the default tenant at startup so pre-tenancy rows stay valid."""
+    with engine.begin() as conn:
+        create_default_tenant(conn)
+
+
+def _remember(cache: OrderedDict, key: tuple, entry: tuple, size: int):
+    cache[key] = entry
+    cache.move_to_end(key)
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _lookup(db: Session, kind: str, value: str):
+    """Tenant id by slug or host, cached for TENANT_CACHE_SECONDS (None when unknown)."""
+    key = (kind, value)
+    now = time.monotonic()
+    with _cache_lock:
+        for cache in (_cache, _misses):
+            cached = cache.get(key)
+            if cached and cached[1] > now:
+                cache.move_to_end(key)
+                return cached[0]
+
+    column = Tenant.slug if kind == "slug" else Tenant.host
+    tenant_id = db.query(Tenant.id).filter(column == value, Tenant.is_active == True).scalar()
+    with _cache_lock:
+        if tenant_id is None:
+            _cache.pop(key, None)
+            _remember(_misses, key, (None, now + settings.TENANT_CACHE_SECONDS), settings.TENANT_MISS_CACHE_SIZE)
+        else:
+            _misses.pop(key, None)
+            _remember(_cache, key, (tenant_id, now + settings.TENANT_CACHE_SECONDS), settings.TENANT_CACHE_SIZE)
+    return tenant_id
+
+
+def resolve_tenant_id(db: Session, host: str = None, slug: str = None) -> int:
+    """
+    Tenant of a public request: an explicit X-Tenant slug, then the Host
+    header, then the default tenant.
+    """
+    if slug:
+        tenant_id = _lookup(db, "slug", slug)
+        if tenant_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown tenant")
+        return tenant_id
+    if host:
+        tenant_id = _lookup(db, "host", host.split(":")[0].lower())
+        if tenant_id is not None:
+            return tenant_id
+    return DEFAULT_TENANT_ID
@@ -0,0 +1,46 @@
+"""
+Production server: `gunicorn -c gunicorn.conf.py main:app` (see the Dockerfile).
+Everything is configured through Settings (core/config.py).
+"""
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.config import settings
+
+bind = settings.SERVER_BIND
+workers = settings.WEB_CONCURRENCY or multiprocessing.cpu_count()
+worker_class = "core.server.ProductionWorker"
+backlog = settings.SERVER_BACKLOG
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+preload_app = settings.SERVER_PRELOAD
+# Passed on to uvicorn's proxy header handling, which sets the client IP the rate limiter sees
+forwarded_allow_ips = settings.SERVER_FORWARDED_ALLOW_IPS
+# Logging goes through the app's own pipeline (core.log); gunicorn only logs to stderr
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Connections and the log listener thread inherited from the master must not be shared
+    from core.database import engine
+    from core.log import restart_logging
+    engine.dispose(close=False)
+    restart_logging()
+
+
+def post_worker_init(worker):
+    if not settings.SERVER_WARMUP:
+        return
+    from core.server import warm_up
+    try:
+        warm_up()
+    except Exception:
+        # A cold worker is still better than no worker
+        worker.log.exception("Worker warmup failed")
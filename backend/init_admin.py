@@ -1,12 +1,15 @@
 from sqlalchemy.orm import Session
 from core.database import SessionLocal, engine, Base
+from models.tenant import Tenant
 from models.admin_user import AdminUser
 from core.security import get_password_hash
 from core.config import settings
+from core.tenancy import ensure_default_tenant
 
 def init_db():
     """Initialize database with admin user."""
     Base.metadata.create_all(bind=engine)
+    ensure_default_tenant()
     
     db: Session = SessionLocal()
     
@@ -1,27 +1,84 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
 from core.database import Base, engine
+from core.log import setup_logging, shutdown_logging, request_id_middleware
+from core.profiling import profiling_middleware
+from core.rate_limit import rate_limit_middleware
 from api.v1.api import api_router
+from services.broadcast_scheduler import broadcast_scheduler
+from services.recurring_broadcasts import recurring_broadcast_worker
+from services.history_retention import history_maintenance_worker, prepare_partitions
+from services.broadcast_analytics import install_rollup_triggers
+from services.catalog_counters import install_item_count_triggers
+from services.price_sheets import shutdown_pool
+from services.homepage import homepage_publisher
+from services.audit_log import audit_writer
+from services.invite_links import invite_link_checker
+from core.tenancy import ensure_default_tenant
+
+setup_logging()
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+ensure_default_tenant()
+prepare_partitions()
+install_rollup_triggers()
+install_item_count_triggers()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SCHEDULER_ENABLED:
+        broadcast_scheduler.start()
+    if settings.RECURRING_ENABLED:
+        recurring_broadcast_worker.start()
+    if settings.HISTORY_MAINTENANCE_ENABLED:
+        history_maintenance_worker.start()
+    if settings.HOMEPAGE_SNAPSHOT_DIR:
+        homepage_publisher.start()
+    if settings.AUDIT_ENABLED:
+        audit_writer.start()
+    if settings.WHATSAPP_LINK_CHECK_ENABLED:
+        invite_link_checker.start()
+    yield
+    invite_link_checker.stop()
+    audit_writer.stop()
+    homepage_publisher.stop()
+    history_maintenance_worker.stop()
+    recurring_broadcast_worker.stop()
+    broadcast_scheduler.stop()
+    shutdown_pool()
+    shutdown_logging()
 
 app = FastAPI(
     title="Yarn Trading Platform API",
     description="Backend API for yarn trading with WhatsApp automation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# CORS
+# SQL profiling (development/staging)
+if settings.PROFILING_ENABLED or settings.PROFILING_HEADER_ENABLED:
+    app.middleware("http")(profiling_middleware)
+
+# Per-IP throttling of public and login routes, ahead of any database work
+if settings.RATE_LIMIT_ENABLED:
+    app.middleware("http")(rate_limit_middleware)
+
+# CORS; added after the limiter so its 429s carry CORS headers and preflights never reach it
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID", "Idempotent-Replayed", "Retry-After"],
 )
 
+# Request ids for log correlation; added last so it wraps everything else
+app.middleware("http")(request_id_middleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,108 @@
+import argparse
+import json
+from datetime import date
+from sqlalchemy import text
+from core.database import Base, engine
+from models.tenant import Tenant
+from models.admin_user import AdminUser
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+from models.whatsapp_group import WhatsAppGroup
+from models.broadcast_message import BroadcastMessage
+from models.broadcast_schedule import BroadcastSchedule
+from models.broadcast_history import BroadcastHistory
+from models.broadcast_rollup import BroadcastDailyRollup
+from services.history_retention import ensure_partitions, run_maintenance
+from services.broadcast_analytics import rebuild_rollups
+from core.tenancy import create_default_tenant
+
+LEGACY_TABLE = "broadcast_history_legacy"
+
+
+def _column_names(conn, table: str) -> set:
+    return set(conn.execute(text(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = :table"
+    ), {"table": table}).scalars())
+
+
+def migrate():
+    """
+    Convert a pre-partitioning broadcast_history table: message bodies move
+    into broadcast_messages and rows are copied into monthly partitions.
+    """
+    with engine.begin() as conn:
+        relkind = conn.execute(text(
+            "SELECT relkind FROM pg_class WHERE relname = 'broadcast_history'"
+        )).scalar()
+        if relkind == "p":
+            print("ℹ️  broadcast_history is already partitioned")
+            return
+        if relkind is None:
+            Base.metadata.create_all(bind=conn)
+            create_default_tenant(conn)
+            ensure_partitions(conn)
+            print("✅ Created partitioned broadcast_history")
+            return
+
+        # Move the old table and every name it owns out of the way
+        conn.execute(text(f"ALTER TABLE broadcast_history RENAME TO {LEGACY_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT broadcast_history_pkey TO {LEGACY_TABLE}_pkey"))
+        conn.execute(text(f"ALTER SEQUENCE broadcast_history_id_seq RENAME TO {LEGACY_TABLE}_id_seq"))
+        conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT IF EXISTS uq_broadcast_history_occurrence"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_broadcast_history_id"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_broadcast_history_pending_scheduled_for"))
+
+        Base.metadata.create_all(bind=conn)
+        create_default_tenant(conn)
+
+        oldest = conn.execute(text(f"SELECT min(scheduled_for) FROM {LEGACY_TABLE}")).scalar()
+        ensure_partitions(conn, since=oldest.date() if oldest else date.today())
+
+        conn.execute(text(f"""
+            INSERT INTO broadcast_messages (hash, body)
+            SELECT DISTINCT encode(sha256(convert_to(message_text, 'UTF8')), 'hex'), message_text
+            FROM {LEGACY_TABLE}
+            ON CONFLICT (hash) DO NOTHING
+        """))
+
+        columns = ["id", "group_id", "table_group_ids", "message_type", "scheduled_for",
+                   "sent_at", "status", "error_message", "created_at"]
+        columns += [c for c in ("schedule_id", "occurrence_at", "tenant_id", "attachment", "snapshot_hash", "claimed_by", "lease_expires_at") if c in _column_names(conn, LEGACY_TABLE)]
+        column_list = ", ".join(columns)
+        copied = conn.execute(text(f"""
+            INSERT INTO broadcast_history ({column_list}, message_hash)
+            SELECT {column_list}, encode(sha256(convert_to(message_text, 'UTF8')), 'hex')
+            FROM {LEGACY_TABLE}
+        """)).rowcount
+
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('broadcast_history', 'id'), "
+            "COALESCE((SELECT max(id) FROM broadcast_history), 0) + 1, false)"
+        ))
+        conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+    print(f"✅ Migrated {copied} broadcast history rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broadcast history partitioning and retention")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Convert an existing broadcast_history table to the partitioned layout")
+    archive = subparsers.add_parser("maintain", help="Create partitions and archive old ones now")
+    archive.add_argument("--retention-months", type=int, default=None)
+    archive.add_argument("--archive-dir", default=None)
+    subparsers.add_parser("rebuild-rollups", help="Recompute broadcast analytics rollups from history")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate()
+    elif args.command == "rebuild-rollups":
+        rebuild_rollups()
+        print("✅ Rebuilt broadcast rollups")
+    else:
+        summary = run_maintenance(retention_months=args.retention_months, archive_dir=args.archive_dir)
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+from sqlalchemy import text
+from core.database import Base, engine, SessionLocal
+from core.security import get_password_hash
+from core.tenancy import DEFAULT_TENANT_ID, create_default_tenant
+from models.tenant import Tenant
+from models.admin_user import AdminUser
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+from models.whatsapp_group import WhatsAppGroup
+from models.broadcast_message import BroadcastMessage
+from models.broadcast_schedule import BroadcastSchedule
+from models.broadcast_history import BroadcastHistory
+from models.repricing_run import RepricingRun
+
+TENANT_SCOPED = [AdminUser, TableGroup, YarnItem, WhatsAppGroup, BroadcastSchedule, BroadcastHistory, RepricingRun]
+
+
+def migrate():
+    """
+    Add tenant_id (existing rows join the default tenant) and the tenant-leading
+    indexes to a database created before multi-tenancy. Safe to re-run.
+    """
+    with engine.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        create_default_tenant(conn)
+
+        for model in TENANT_SCOPED:
+            table = model.__table__
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS tenant_id INTEGER NOT NULL "
+                f"DEFAULT {DEFAULT_TENANT_ID} REFERENCES tenants(id) ON DELETE CASCADE"
+            ))
+            for index in table.indexes:
+                if "tenant_id" in index.columns:
+                    index.create(bind=conn, checkfirst=True)
+
+        # Table names are unique per tenant instead of globally
+        conn.execute(text("ALTER TABLE table_groups DROP CONSTRAINT IF EXISTS table_groups_table_name_key"))
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = 'uq_table_groups_tenant_name'"
+        )).first()
+        if not exists:
+            conn.execute(text(
+                "ALTER TABLE table_groups ADD CONSTRAINT uq_table_groups_tenant_name UNIQUE (tenant_id, table_name)"
+            ))
+
+    print("✅ Tenant columns and indexes are in place")
+
+
+def create(slug: str, name: str, host: str = None, rate: float = None, admin_email: str = None, admin_password: str = None):
+    db = SessionLocal()
+    try:
+        if db.query(Tenant).filter(Tenant.slug == slug).first():
+            print(f"ℹ️  Tenant already exists: {slug}")
+            return
+        tenant = Tenant(slug=slug, name=name, host=host.lower() if host else None, broadcast_rate_per_minute=rate)
+        db.add(tenant)
+        db.flush()
+        if admin_email:
+            db.add(AdminUser(email=admin_email, password_hash=get_password_hash(admin_password), tenant_id=tenant.id))
+        db.commit()
+        print(f"✅ Tenant created: {slug} (id {tenant.id})")
+        if admin_email:
+            print(f"✅ Admin user created: {admin_email}")
+    finally:
+        db.close()
+
+
+def list_tenants():
+    db = SessionLocal()
+    try:
+        for tenant in db.query(Tenant).order_by(Tenant.id):
+            print(f"{tenant.id}\t{tenant.slug}\t{tenant.name}\t{tenant.host or '-'}\t"
+                  f"{tenant.broadcast_rate_per_minute or 'default'}/min\t{'active' if tenant.is_active else 'inactive'}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tenant management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Add tenant columns and indexes to an existing database")
+    create_parser = subparsers.add_parser("create", help="Create a tenant")
+    create_parser.add_argument("slug")
+    create_parser.add_argument("name")
+    create_parser.add_argument("--host", default=None, help="Public hostname served for this tenant")
+    create_parser.add_argument("--rate", type=float, default=None, help="Broadcast sends per minute")
+    create_parser.add_argument("--admin-email", default=None, help="Also create the tenant's first admin")
+    create_parser.add_argument("--admin-password", default=None)
+    subparsers.add_parser("list", help="List tenants")
+    args = parser.parse_args()
+    if args.command == "create" and args.admin_email and not args.admin_password:
+        parser.error("--admin-password is required with --admin-email")
+
+    if args.command == "migrate":
+        migrate()
+    elif args.command == "create":
+        create(args.slug, args.name, args.host, args.rate, args.admin_email, args.admin_password)
+    else:
+        list_tenants()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from core.database import Base
+
+class AuditLog(Base):
+    """
+    Admin changes to the catalog, written behind the request in batches by
+    services.audit_log. No foreign keys: rows outlive the admins, tenants and
+    items they mention, and a batch never fails on one of them.
+    """
+    __tablename__ = "audit_log"
+    
+    id = Column(BigInteger, primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    admin_id = Column(Integer, nullable=True)       # None for changes made outside a request (scripts)
+    request_id = Column(String(64), nullable=True)
+    entity = Column(String(30), nullable=False)     # yarn_item | table_group
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String(10), nullable=False)     # create | update | delete
+    changes = Column(JSONB, nullable=False)         # {"field": [old, new], ...}
+    # When the change was committed, not when the batch reached the database
+    changed_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        # The log reads a tenant's changes newest first, optionally for one entity or admin
+        Index("ix_audit_log_tenant_changed", "tenant_id", "changed_at", "id"),
+        Index("ix_audit_log_tenant_entity", "tenant_id", "entity", "entity_id", "changed_at", "id"),
+        Index("ix_audit_log_tenant_admin", "tenant_id", "admin_id", "changed_at", "id"),
+    )
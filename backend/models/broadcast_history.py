@@ -1,21 +1,65 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, ARRAY, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
 
 class BroadcastHistory(Base):
+    """
+    Range-partitioned by `scheduled_for` month (see services.history_retention),
+    so the database primary key is (id, scheduled_for). The ORM identity is `id` alone.
+    """
     __tablename__ = "broadcast_history"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, server_default="1")
     group_id = Column(Integer, ForeignKey("whatsapp_groups.id", ondelete="CASCADE"), nullable=False)
-    message_text = Column(Text, nullable=False)
+    # Null only while a recurring occurrence is waiting to be rendered
+    message_hash = Column(String(64), ForeignKey("broadcast_messages.hash"), nullable=True, index=True)
     table_group_ids = Column(ARRAY(Integer), nullable=True)
     message_type = Column(String(20), nullable=False)
-    scheduled_for = Column(DateTime(timezone=True), nullable=False)
+    scheduled_for = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     sent_at = Column(DateTime(timezone=True), nullable=True)
     status = Column(String(20), default="pending", nullable=False)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set for rows materialized from a recurring schedule
+    schedule_id = Column(Integer, ForeignKey("broadcast_schedules.id", ondelete="SET NULL"), nullable=True)
+    occurrence_at = Column(DateTime(timezone=True), nullable=True)
+    # Price sheet cache key ("<sha256>.png"/".pdf") sent along with the message
+    attachment = Column(String(80), nullable=True)
+    # Catalog state the message reflects (auto_generate/delta), the baseline for the next delta
+    snapshot_hash = Column(String(64), nullable=True, index=True)
+    # Scheduler process that claimed the row and until when its claim holds;
+    # set while status is "sending" (claimed) or "in_progress" (send started)
+    claimed_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
     
-    # Relationship
+    # Relationships
     group = relationship("WhatsAppGroup", back_populates="broadcasts")
+    schedule = relationship("BroadcastSchedule", back_populates="broadcasts")
+    message = relationship("BroadcastMessage")
+    
+    __table_args__ = (
+        # Scheduler scans pending rows in send order
+        Index("ix_broadcast_history_pending_scheduled_for", "scheduled_for", postgresql_where=(status == "pending")),
+        # Recovery sweep looks for claims whose lease ran out
+        Index(
+            "ix_broadcast_history_claimed_lease", "lease_expires_at",
+            postgresql_where=status.in_(["sending", "in_progress"])
+        ),
+        # Last catalog snapshot sent to a group
+        Index(
+            "ix_broadcast_history_group_snapshot", "group_id", "sent_at",
+            postgresql_where=(status == "sent") & snapshot_hash.isnot(None)
+        ),
+        # History listing per tenant, newest first
+        Index("ix_broadcast_history_tenant_scheduled_for", "tenant_id", "scheduled_for"),
+        # One row per group per schedule occurrence, so materialization is idempotent
+        UniqueConstraint("schedule_id", "occurrence_at", "group_id", "scheduled_for", name="uq_broadcast_history_occurrence"),
+        {"postgresql_partition_by": "RANGE (scheduled_for)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+    
+    @property
+    def message_text(self):
+        return self.message.body if self.message else None
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from core.database import Base
+
+class BroadcastMessage(Base):
+    """
+    Message bodies stored once and referenced from broadcast history by SHA-256 hash.
+    """
+    __tablename__ = "broadcast_messages"
+    
+    hash = Column(String(64), primary_key=True)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
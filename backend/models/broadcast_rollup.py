@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date, Float, BigInteger
+from core.database import Base
+
+class BroadcastDailyRollup(Base):
+    """
+    Per-day, per-group broadcast counters kept current by database triggers on
+    broadcast_history (see services.broadcast_analytics). Rows outlive archived
+    history partitions, so long-range stats stay available.
+    """
+    __tablename__ = "broadcast_daily_rollups"
+    
+    day = Column(Date, primary_key=True)
+    group_id = Column(Integer, primary_key=True, index=True)
+    total = Column(Integer, default=0, nullable=False)
+    pending = Column(Integer, default=0, nullable=False)
+    sent = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    # Sum of (sent_at - scheduled_for) over sent rows, for average delay
+    delay_seconds_sum = Column(Float, default=0, nullable=False)
+    delay_count = Column(BigInteger, default=0, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, ARRAY, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from core.database import Base
+
+class BroadcastSchedule(Base):
+    __tablename__ = "broadcast_schedules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True, server_default="1")
+    name = Column(String(100), nullable=False)
+    cron_expression = Column(String(100), nullable=False)
+    group_ids = Column(ARRAY(Integer), nullable=False)
+    message_type = Column(String(20), nullable=False)
+    table_group_ids = Column(ARRAY(Integer), nullable=True)
+    custom_message = Column(Text, nullable=True)
+    spread_policy = Column(String(20), nullable=True)
+    interval_seconds = Column(Float, nullable=True)
+    rate_per_minute = Column(Float, nullable=True)
+    window_minutes = Column(Float, nullable=True)
+    is_active = Column(Boolean, default=True)
+    materialized_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationship
+    broadcasts = relationship("BroadcastHistory", back_populates="schedule", passive_deletes=True)
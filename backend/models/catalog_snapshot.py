@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime
+from sqlalchemy.sql import func
+from core.database import Base
+
+class CatalogSnapshot(Base):
+    """
+    Catalog state as sent in a broadcast, zlib-compressed JSON stored once per
+    SHA-256 of its content and referenced from broadcast history. Delta
+    broadcasts diff against the last one sent to a group (see services.catalog_snapshots).
+    """
+    __tablename__ = "catalog_snapshots"
+    
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
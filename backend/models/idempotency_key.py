@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from core.database import Base
+
+class IdempotencyKey(Base):
+    """
+    Responses of mutating admin requests sent with an Idempotency-Key header
+    (see core.idempotency). `status_code` is null while the first request runs.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    # SHA-256 of the admin identity and the header value
+    key = Column(String(64), primary_key=True)
+    # SHA-256 of method, path, query and body; a reused key must match it
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(JSONB, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # In flight: when the claim lapses if its request died; completed: when the response is forgotten
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from core.database import Base
+
+class RepricingRun(Base):
+    """
+    One row per applied mass repricing: the filter and rule used and the
+    per-item rate changes, recorded once for the whole batch.
+    """
+    __tablename__ = "repricing_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True, server_default="1")
+    admin_id = Column(Integer, ForeignKey("admin_users.id", ondelete="SET NULL"), nullable=True)
+    filters = Column(JSON, nullable=False)
+    rule = Column(JSON, nullable=False)
+    changed_count = Column(Integer, default=0, nullable=False)
+    changes = Column(JSON, nullable=False)  # [{"id", "old_rate", "new_rate"}, ...]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
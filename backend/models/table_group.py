@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -7,11 +7,21 @@ class TableGroup(Base):
     __tablename__ = "table_groups"
     
     id = Column(Integer, primary_key=True, index=True)
-    table_name = Column(String(100), unique=True, nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, server_default="1")
+    table_name = Column(String(100), nullable=False)
     display_order = Column(Integer, default=0, nullable=False)
     show_on_homepage = Column(Boolean, default=True)
+    # Maintained by triggers on yarn_items (services/catalog_counters.py); never set them here
+    item_count = Column(Integer, nullable=False, server_default="0")
+    visible_item_count = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship
     items = relationship("YarnItem", back_populates="table_group", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "table_name", name="uq_table_groups_tenant_name"),
+        # Homepage and admin lists read one tenant's tables in display order
+        Index("ix_table_groups_tenant_display_order", "tenant_id", "display_order"),
+    )
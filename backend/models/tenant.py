@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
+from sqlalchemy.sql import func
+from core.database import Base
+
+class Tenant(Base):
+    """
+    A trader/shop hosted on this deployment. Every catalog, group, broadcast
+    and admin row belongs to exactly one tenant.
+    """
+    __tablename__ = "tenants"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String(50), unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
+    # Public homepage requests for this host resolve to the tenant
+    host = Column(String(255), unique=True, nullable=True)
+    # Overrides TENANT_BROADCAST_RATE_PER_MINUTE
+    broadcast_rate_per_minute = Column(Float, nullable=True)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
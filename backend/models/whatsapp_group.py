@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -7,10 +7,19 @@ class WhatsAppGroup(Base):
     __tablename__ = "whatsapp_groups"
     
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, server_default="1")
     group_name = Column(String(100), nullable=False)
     group_invite_id = Column(String(50), unique=True, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Invite link health (services/invite_links.py): ok | dead | unknown, and consecutive dead checks
+    link_status = Column(String(20), nullable=True)
+    link_checked_at = Column(DateTime(timezone=True), nullable=True)
+    link_failures = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
     broadcasts = relationship("BroadcastHistory", back_populates="group", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_whatsapp_groups_tenant_created_at", "tenant_id", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -7,14 +7,29 @@ class YarnItem(Base):
     __tablename__ = "yarn_items"
     
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, server_default="1")
     table_group_id = Column(Integer, ForeignKey("table_groups.id", ondelete="CASCADE"), nullable=False)
     count = Column(String(50), nullable=False)
     quality = Column(String(100), nullable=False)
     rate = Column(Numeric(10, 2), nullable=False)
     display_order = Column(Integer, default=0, nullable=False)
     show_on_homepage = Column(Boolean, default=True)
+    # Bumped on every content update; clients send it back in If-Match
+    version = Column(Integer, default=1, server_default="1", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship
     table_group = relationship("TableGroup", back_populates="items")
+    
+    __table_args__ = (
+        # Admin item lists read a tenant's items per table in display order
+        Index("ix_yarn_items_tenant_table_display_order", "tenant_id", "table_group_id", "display_order"),
+        # Homepage reads only visible items and only these columns: an index-only scan
+        Index(
+            "ix_yarn_items_homepage",
+            "tenant_id", "table_group_id", "display_order",
+            postgresql_include=["id", "count", "quality", "rate"],
+            postgresql_where=show_on_homepage == True
+        ),
+    )
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class AuditLogEntry(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    action: str
+    changes: Dict[str, List[Any]]     # field -> [old, new]
+    admin_id: Optional[int] = None
+    admin_email: Optional[str] = None
+    request_id: Optional[str] = None
+    changed_at: datetime
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogEntry]
+    next_cursor: Optional[str] = None
@@ -1,15 +1,72 @@
 from pydantic import BaseModel, validator
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, List
 
 class BroadcastRequest(BaseModel):
     group_ids: List[int]
-    message_type: str  # 'auto_generate' or 'custom'
+    message_type: str  # 'auto_generate', 'delta' (changes since the group's last catalog) or 'custom'
     table_group_ids: Optional[List[int]] = None
     custom_message: Optional[str] = None
     send_immediately: bool = True
     scheduled_hour: Optional[int] = None
     scheduled_minute: Optional[int] = None
+    scheduled_at: Optional[datetime] = None  # Exact start time, takes precedence over hour/minute
+    spread_policy: Optional[str] = None  # 'fixed', 'rate' or 'window'; defaults to settings
+    interval_seconds: Optional[float] = None
+    rate_per_minute: Optional[float] = None
+    window_minutes: Optional[float] = None
+    attach_price_sheet: Optional[str] = None  # 'png' or 'pdf', auto_generate only
+    
+    @validator('message_type')
+    def validate_message_type(cls, v):
+        if v not in ['auto_generate', 'delta', 'custom']:
+            raise ValueError('message_type must be auto_generate, delta or custom')
+        return v
+    
+    @validator('spread_policy')
+    def validate_spread_policy(cls, v):
+        if v is not None and v not in ['fixed', 'rate', 'window']:
+            raise ValueError('spread_policy must be fixed, rate or window')
+        return v
+    
+    @validator('interval_seconds')
+    def validate_interval(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('interval_seconds cannot be negative')
+        return v
+    
+    @validator('rate_per_minute', 'window_minutes')
+    def validate_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('must be greater than zero')
+        return v
+    
+    @validator('table_group_ids')
+    def validate_auto_generate(cls, v, values):
+        if values.get('message_type') in ['auto_generate', 'delta'] and not v:
+            raise ValueError('table_group_ids required for auto_generate and delta')
+        return v
+    
+    @validator('custom_message')
+    def validate_custom(cls, v, values):
+        if values.get('message_type') == 'custom' and not v:
+            raise ValueError('custom_message required for custom type')
+        return v
+    
+    @validator('attach_price_sheet')
+    def validate_attachment(cls, v, values):
+        if v is None:
+            return v
+        if v not in ['png', 'pdf']:
+            raise ValueError('attach_price_sheet must be png or pdf')
+        if values.get('message_type') != 'auto_generate':
+            raise ValueError('attach_price_sheet requires auto_generate')
+        return v
+
+class BroadcastPreviewRequest(BaseModel):
+    message_type: str = "auto_generate"  # 'auto_generate' or 'custom'
+    table_group_ids: Optional[List[int]] = None
+    custom_message: Optional[str] = None
     
     @validator('message_type')
     def validate_message_type(cls, v):
@@ -29,6 +86,16 @@ class BroadcastRequest(BaseModel):
             raise ValueError('custom_message required for custom type')
         return v
 
+class BroadcastPreviewResponse(BaseModel):
+    message: str
+    characters: int
+    segments: int  # Messages needed at the platform limit
+    limit: int
+    exceeds_limit: bool
+    warning: Optional[str] = None
+    parts: List[str]  # The message split at table boundaries to fit the limit
+    cached: bool
+
 class BroadcastResult(BaseModel):
     history_id: Optional[int] = None
     group_id: int
@@ -57,3 +124,26 @@ class BroadcastHistoryResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class BroadcastStats(BaseModel):
+    total: int
+    pending: int
+    sent: int
+    failed: int
+    failure_rate: float
+    avg_delay_seconds: Optional[float] = None
+
+class BroadcastGroupStats(BroadcastStats):
+    group_id: int
+    group_name: Optional[str] = None
+
+class BroadcastBucketStats(BroadcastStats):
+    bucket_start: date
+
+class BroadcastAnalyticsResponse(BaseModel):
+    since: date
+    until: date
+    bucket: str
+    totals: BroadcastStats
+    groups: List[BroadcastGroupStats]
+    buckets: List[BroadcastBucketStats]
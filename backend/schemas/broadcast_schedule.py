@@ -0,0 +1,89 @@
+from pydantic import BaseModel, validator
+from datetime import datetime
+from typing import Optional, List
+from services.cron import CronExpression
+
+class BroadcastScheduleBase(BaseModel):
+    name: str
+    cron_expression: str
+    group_ids: List[int]
+    message_type: str  # 'auto_generate' or 'custom'
+    table_group_ids: Optional[List[int]] = None
+    custom_message: Optional[str] = None
+    spread_policy: Optional[str] = None
+    interval_seconds: Optional[float] = None
+    rate_per_minute: Optional[float] = None
+    window_minutes: Optional[float] = None
+    is_active: bool = True
+    
+    @validator('cron_expression')
+    def validate_cron(cls, v):
+        CronExpression(v)
+        return v.strip()
+    
+    @validator('group_ids')
+    def validate_groups(cls, v):
+        if not v:
+            raise ValueError('group_ids cannot be empty')
+        return v
+    
+    @validator('message_type')
+    def validate_message_type(cls, v):
+        if v not in ['auto_generate', 'custom']:
+            raise ValueError('message_type must be auto_generate or custom')
+        return v
+    
+    @validator('table_group_ids')
+    def validate_auto_generate(cls, v, values):
+        if values.get('message_type') == 'auto_generate' and not v:
+            raise ValueError('table_group_ids required for auto_generate')
+        return v
+    
+    @validator('custom_message')
+    def validate_custom(cls, v, values):
+        if values.get('message_type') == 'custom' and not v:
+            raise ValueError('custom_message required for custom type')
+        return v
+    
+    @validator('spread_policy')
+    def validate_spread_policy(cls, v):
+        if v is not None and v not in ['fixed', 'rate', 'window']:
+            raise ValueError('spread_policy must be fixed, rate or window')
+        return v
+
+class BroadcastScheduleCreate(BroadcastScheduleBase):
+    pass
+
+class BroadcastScheduleUpdate(BaseModel):
+    name: Optional[str] = None
+    cron_expression: Optional[str] = None
+    group_ids: Optional[List[int]] = None
+    table_group_ids: Optional[List[int]] = None
+    custom_message: Optional[str] = None
+    spread_policy: Optional[str] = None
+    interval_seconds: Optional[float] = None
+    rate_per_minute: Optional[float] = None
+    window_minutes: Optional[float] = None
+    is_active: Optional[bool] = None
+    
+    @validator('cron_expression')
+    def validate_cron(cls, v):
+        if v is not None:
+            CronExpression(v)
+            return v.strip()
+        return v
+    
+    @validator('spread_policy')
+    def validate_spread_policy(cls, v):
+        if v is not None and v not in ['fixed', 'rate', 'window']:
+            raise ValueError('spread_policy must be fixed, rate or window')
+        return v
+
+class BroadcastScheduleResponse(BroadcastScheduleBase):
+    id: int
+    materialized_until: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
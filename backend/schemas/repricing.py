@@ -0,0 +1,59 @@
+from pydantic import BaseModel, validator
+from decimal import Decimal
+from typing import Optional, List
+
+class RepricingFilter(BaseModel):
+    table_group_ids: Optional[List[int]] = None
+    quality: Optional[str] = None  # Case-insensitive, '*' matches anything
+    count: Optional[str] = None    # Case-insensitive, '*' matches anything
+
+class RepricingRule(BaseModel):
+    percent: Decimal = Decimal("0")  # e.g. 2.5 raises rates by 2.5%
+    delta: Decimal = Decimal("0")    # Added after the percentage
+    round_to: Optional[Decimal] = None  # 0.5 or 1.0
+    min_rate: Optional[Decimal] = None
+    max_rate: Optional[Decimal] = None
+    
+    @validator('percent')
+    def validate_percent(cls, v):
+        if v <= -100:
+            raise ValueError('percent must be greater than -100')
+        return v
+    
+    @validator('round_to')
+    def validate_round_to(cls, v):
+        if v is not None and v not in (Decimal("0.5"), Decimal("1")):
+            raise ValueError('round_to must be 0.5 or 1.0')
+        return v
+    
+    @validator('max_rate')
+    def validate_clamps(cls, v, values):
+        min_rate = values.get('min_rate')
+        if v is not None and min_rate is not None and v < min_rate:
+            raise ValueError('max_rate must not be below min_rate')
+        return v
+
+class RepricingRequest(BaseModel):
+    filter: RepricingFilter
+    rule: RepricingRule
+    dry_run: bool = False
+    
+    @validator('filter')
+    def validate_filter(cls, v):
+        if not (v.table_group_ids or v.quality or v.count):
+            raise ValueError('filter needs table_group_ids, quality or count')
+        return v
+
+class RepricingChange(BaseModel):
+    id: int
+    table_group_id: int
+    count: str
+    quality: str
+    old_rate: Decimal
+    new_rate: Decimal
+
+class RepricingResponse(BaseModel):
+    dry_run: bool
+    changed_count: int
+    run_id: Optional[int] = None
+    changes: List[RepricingChange]
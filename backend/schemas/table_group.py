@@ -15,9 +15,21 @@ class TableGroupUpdate(BaseModel):
     display_order: Optional[int] = None
     show_on_homepage: Optional[bool] = None
 
+class TableGroupListItem(BaseModel):
+    """Admin listing row; only the columns requested with `fields=` are set."""
+    id: int
+    table_name: Optional[str] = None
+    display_order: Optional[int] = None
+    show_on_homepage: Optional[bool] = None
+    item_count: Optional[int] = None
+    visible_item_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class TableGroupResponse(TableGroupBase):
     id: int
     item_count: int = 0
+    visible_item_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
     
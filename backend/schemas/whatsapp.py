@@ -1,8 +1,20 @@
 from pydantic import BaseModel, validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import re
 
+INVITE_LINK = re.compile(r'chat\.whatsapp\.com/([A-Za-z0-9]+)')
+# Length of whatsapp_groups.group_invite_id
+INVITE_ID_MAX_LENGTH = 50
+
+def parse_invite_id(link: str) -> str:
+    match = INVITE_LINK.search(link)
+    if not match:
+        raise ValueError('Invalid WhatsApp group invite link format')
+    if len(match.group(1)) > INVITE_ID_MAX_LENGTH:
+        raise ValueError(f'Invite id is longer than {INVITE_ID_MAX_LENGTH} characters')
+    return match.group(1)
+
 class WhatsAppGroupBase(BaseModel):
     group_name: str
     is_active: bool = True
@@ -12,10 +24,7 @@ class WhatsAppGroupCreate(WhatsAppGroupBase):
     
     @validator('group_invite_link')
     def extract_invite_id(cls, v):
-        match = re.search(r'chat\.whatsapp\.com/([A-Za-z0-9]+)', v)
-        if not match:
-            raise ValueError('Invalid WhatsApp group invite link format')
-        return match.group(1)
+        return parse_invite_id(v)
 
 class WhatsAppGroupUpdate(BaseModel):
     group_name: Optional[str] = None
@@ -24,7 +33,29 @@ class WhatsAppGroupUpdate(BaseModel):
 class WhatsAppGroupResponse(WhatsAppGroupBase):
     id: int
     group_invite_id: str
+    link_status: Optional[str] = None
+    link_checked_at: Optional[datetime] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
+
+class WhatsAppGroupImportItem(BaseModel):
+    group_invite_link: str
+    group_name: Optional[str] = None
+
+class WhatsAppGroupImport(BaseModel):
+    """Links as a list, as CSV text (a link and optional name per line), or both."""
+    groups: List[WhatsAppGroupImportItem] = []
+    csv: Optional[str] = None
+    is_active: bool = True
+
+class WhatsAppGroupImportError(BaseModel):
+    value: str
+    detail: str
+
+class WhatsAppGroupImportResponse(BaseModel):
+    created: List[WhatsAppGroupResponse]
+    existing: List[str]       # Invite ids this tenant had already registered
+    duplicates: List[str]     # Invite ids repeated within the import
+    invalid: List[WhatsAppGroupImportError]
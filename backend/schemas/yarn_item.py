@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class YarnItemBase(BaseModel):
     count: str
@@ -23,15 +23,58 @@ class YarnItemUpdate(BaseModel):
 class YarnItemResponse(YarnItemBase):
     id: int
     table_group_id: int
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class YarnItemListItem(BaseModel):
+    """Admin listing row; only the columns requested with `fields=` are set."""
+    id: int
+    table_group_id: Optional[int] = None
+    count: Optional[str] = None
+    quality: Optional[str] = None
+    rate: Optional[Decimal] = None
+    display_order: Optional[int] = None
+    show_on_homepage: Optional[bool] = None
+    version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class YarnItemListResponse(BaseModel):
+    table_group_id: int
+    table_name: str
+    items: List[YarnItemListItem]
+    next_cursor: Optional[str] = None
+
 class YarnItemPublic(BaseModel):
     id: int
     serial_number: int
     count: str
     quality: str
     rate: Decimal
+
+class YarnItemRateUpdate(BaseModel):
+    id: int
+    rate: Decimal
+    version: Optional[int] = None  # Expected current version; omit to update unconditionally
+
+class YarnItemBulkRateUpdate(BaseModel):
+    updates: List[YarnItemRateUpdate]
+
+class YarnItemRateResult(BaseModel):
+    id: int
+    rate: Decimal
+    version: int
+
+class YarnItemRateConflict(BaseModel):
+    id: int
+    expected_version: int
+    current_version: int
+
+class YarnItemBulkRateResponse(BaseModel):
+    updated: List[YarnItemRateResult]
+    conflicts: List[YarnItemRateConflict]
+    not_found: List[int]
@@ -0,0 +1,294 @@
+import glob
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import engine
+from core.log import current_request_id
+from models.audit_log import AuditLog
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+
+logger = logging.getLogger(__name__)
+
+# Audited models: entity name and the columns whose changes are recorded
+AUDITED = {
+    YarnItem: ("yarn_item", ("table_group_id", "count", "quality", "rate", "display_order", "show_on_homepage")),
+    TableGroup: ("table_group", ("table_name", "display_order", "show_on_homepage")),
+}
+
+# Session.info keys: the acting admin, and the events of the open transaction
+ADMIN_KEY = "audit_admin_id"
+PENDING_KEY = "audit_events"
+
+# Spill files are named after the process that wrote (or is replaying) them
+_SPILL_NAME = re.compile(r"^(spill|replay)-(\d+)\.jsonl$")
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def set_admin(db: Session, admin_id: int):
+    """Attribute the session's changes to an admin (done by get_current_admin)."""
+    db.info[ADMIN_KEY] = admin_id
+
+
+def record(db: Session, tenant_id: int, entity: str, entity_id: int, action: str, changes: dict):
+    """
+    Add a change (`{field: (old, new)}`) to the session's open transaction.
+    It is queued when the transaction commits and dropped if it rolls back.
+    ORM flushes are recorded automatically; call this for UPDATE statements.
+    """
+    if not settings.AUDIT_ENABLED:
+        return
+    changes = {field: [_plain(old), _plain(new)] for field, (old, new) in changes.items() if old != new}
+    if not changes:
+        return
+    db.info.setdefault(PENDING_KEY, []).append({
+        "tenant_id": tenant_id,
+        "admin_id": db.info.get(ADMIN_KEY),
+        "request_id": current_request_id(),
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+    })
+
+
+def _flushed_changes(session: Session):
+    """(object, action, changes) for audited objects in the flush that just ran."""
+    for action, objects in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            audited = AUDITED.get(type(obj))
+            if audited is None:
+                continue
+            state = inspect(obj)
+            if action == "update":
+                changes = {}
+                for field in audited[1]:
+                    # Attribute history never loads an unloaded column
+                    history = state.attrs[field].history
+                    if history.added:
+                        changes[field] = (history.deleted[0] if history.deleted else None, history.added[0])
+            elif action == "create":
+                changes = {field: (None, state.dict.get(field)) for field in audited[1]}
+            else:
+                changes = {field: (state.dict.get(field), None) for field in audited[1]}
+            yield obj, action, changes
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session, flush_context):
+    # new/dirty/deleted and attribute history still describe the flush here, and new rows have ids
+    for obj, action, changes in _flushed_changes(session):
+        record(session, obj.tenant_id, AUDITED[type(obj)][0], obj.id, action, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        changed_at = datetime.now(timezone.utc)
+        for audit_event in events:
+            audit_event["changed_at"] = changed_at
+        audit_writer.submit(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def _encode(audit_event: dict) -> str:
+    return json.dumps({**audit_event, "changed_at": _plain(audit_event["changed_at"])}, separators=(",", ":"))
+
+
+def _decode(line: str) -> dict:
+    audit_event = json.loads(line)
+    audit_event["changed_at"] = datetime.fromisoformat(audit_event["changed_at"])
+    return audit_event
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AuditWriter:
+    """
+    Background thread that writes audit events behind the request.
+
+    Committed events go to a bounded in-memory queue and are inserted in
+    multi-row batches of up to `batch_size`, at most `flush_seconds` after
+    the first of them. When the queue is full (the database is slow or down)
+    or a batch fails, events are appended to a per-process JSON lines file in
+    `spill_dir` instead, and replayed once writes succeed again. Files left
+    by processes that died are replayed by whichever process claims them
+    first. Events still in memory when a process is killed are lost.
+    """
+
+    def __init__(self, queue_size: int = None, batch_size: int = None, flush_seconds: float = None,
+                 retry_seconds: float = None, spill_dir: str = None):
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_seconds = flush_seconds or settings.AUDIT_FLUSH_SECONDS
+        self.retry_seconds = retry_seconds or settings.AUDIT_RETRY_SECONDS
+        self.spill_dir = spill_dir or settings.AUDIT_SPILL_DIR
+        self._queue = queue.Queue(maxsize=queue_size or settings.AUDIT_QUEUE_SIZE)
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_replay = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        # Whatever is still queued is written now or spilled for the next start
+        while True:
+            batch = self._take(wait=False)
+            if not batch:
+                break
+            self._write_or_spill(batch)
+
+    def submit(self, events: list):
+        if self._thread is None:
+            # No writer in this process (scripts): write in the caller
+            self._write_or_spill(events)
+            return
+        overflow = []
+        for audit_event in events:
+            try:
+                self._queue.put_nowait(audit_event)
+            except queue.Full:
+                overflow.append(audit_event)
+        if overflow:
+            logger.warning("Audit queue full, spilling events to disk", extra={"events": len(overflow)})
+            self._spill(overflow)
+
+    def _take(self, wait: bool = True) -> list:
+        """Up to batch_size events; waits for the first, then at most flush_seconds for the rest."""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_seconds) if wait else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic() if wait else 0
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, events: list):
+        # executemany of one INSERT: psycopg2 sends it as multi-row VALUES pages
+        with engine.begin() as conn:
+            conn.execute(insert(AuditLog), events)
+
+    def _write_or_spill(self, events: list) -> bool:
+        try:
+            self._write(events)
+            return True
+        except Exception:
+            logger.warning("Audit write failed, spilling events to disk", exc_info=True, extra={"events": len(events)})
+            self._spill(events)
+            return False
+
+    def _spill_path(self, kind: str = "spill", pid: int = None) -> str:
+        return os.path.join(self.spill_dir, f"{kind}-{pid or os.getpid()}.jsonl")
+
+    def _spill(self, events: list):
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(), "a", encoding="utf-8") as f:
+                f.writelines(_encode(audit_event) + "\n" for audit_event in events)
+
+    def _claim_spilled(self):
+        """Rename the next replayable file to this process's replay file; returns its path or None."""
+        claimed = self._spill_path("replay")
+        if os.path.exists(claimed):
+            return claimed  # Left over from an earlier replay that stopped midway
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "*.jsonl"))):
+            match = _SPILL_NAME.match(os.path.basename(path))
+            if match is None:
+                continue
+            pid = int(match.group(2))
+            # Another live process is appending to (or replaying) its own file
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            try:
+                # Under the lock so this process's own spills start a new file
+                with self._spill_lock:
+                    os.rename(path, claimed)
+                return claimed
+            except FileNotFoundError:
+                continue  # Claimed by another process first
+        return None
+
+    def _replay_spilled(self) -> bool:
+        """Write spilled events back in batches; False if the database is still failing."""
+        while True:
+            path = self._claim_spilled()
+            if path is None:
+                return True
+            with open(path, encoding="utf-8") as f:
+                lines = (line for line in f if line.strip())
+                while True:
+                    batch = [_decode(line) for line in itertools.islice(lines, self.batch_size)]
+                    if not batch:
+                        break
+                    try:
+                        self._write(batch)
+                    except Exception:
+                        logger.warning("Audit replay failed, keeping events on disk", exc_info=True)
+                        self._spill(batch + [_decode(line) for line in lines])
+                        os.remove(path)
+                        return False
+            os.remove(path)
+            logger.info("Replayed spilled audit events", extra={"file": os.path.basename(path)})
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take()
+            if batch and not self._write_or_spill(batch):
+                self._stop.wait(self.retry_seconds)
+                continue
+            if time.monotonic() >= self._next_replay:
+                self._next_replay = time.monotonic() + self.retry_seconds
+                try:
+                    self._replay_spilled()
+                except Exception:
+                    logger.exception("Audit spill replay failed")
+
+
+audit_writer = AuditWriter()
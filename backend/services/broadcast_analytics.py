@@ -0,0 +1,192 @@
+import logging
+from datetime import date
+from sqlalchemy import text, func
+from sqlalchemy.orm import Session
+from core.database import engine
+from models.broadcast_rollup import BroadcastDailyRollup
+from models.whatsapp_group import WhatsAppGroup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TRIGGER = "broadcast_history_rollup"
+
+# Transaction-level advisory lock so concurrent workers install triggers once
+ROLLUP_LOCK_KEY = 7304
+
+# Applies one history row's contribution (sign = 1 to add, -1 to remove) to its day/group counters.
+# Anything that is not yet sent or failed (queued, pending, sending) counts as pending.
+ROLLUP_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION broadcast_rollup_add(
+    p_scheduled_for timestamptz, p_group_id integer, p_status text, p_sent_at timestamptz, p_sign integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO broadcast_daily_rollups AS r
+        (day, group_id, total, pending, sent, failed, delay_seconds_sum, delay_count)
+    VALUES (
+        p_scheduled_for::date,
+        p_group_id,
+        p_sign,
+        CASE WHEN p_status IN ('sent', 'failed') THEN 0 ELSE p_sign END,
+        CASE WHEN p_status = 'sent' THEN p_sign ELSE 0 END,
+        CASE WHEN p_status = 'failed' THEN p_sign ELSE 0 END,
+        CASE WHEN p_status = 'sent' AND p_sent_at IS NOT NULL
+             THEN p_sign * extract(epoch FROM p_sent_at - p_scheduled_for) ELSE 0 END,
+        CASE WHEN p_status = 'sent' AND p_sent_at IS NOT NULL THEN p_sign ELSE 0 END
+    )
+    ON CONFLICT (day, group_id) DO UPDATE SET
+        total = r.total + EXCLUDED.total,
+        pending = r.pending + EXCLUDED.pending,
+        sent = r.sent + EXCLUDED.sent,
+        failed = r.failed + EXCLUDED.failed,
+        delay_seconds_sum = r.delay_seconds_sum + EXCLUDED.delay_seconds_sum,
+        delay_count = r.delay_count + EXCLUDED.delay_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION broadcast_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM broadcast_rollup_add(OLD.scheduled_for, OLD.group_id, OLD.status, OLD.sent_at, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM broadcast_rollup_add(NEW.scheduled_for, NEW.group_id, NEW.status, NEW.sent_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+ROLLUP_TRIGGERS = f"""
+CREATE TRIGGER {ROLLUP_TRIGGER}_insert_delete
+    AFTER INSERT OR DELETE ON broadcast_history
+    FOR EACH ROW EXECUTE FUNCTION broadcast_rollup_apply();
+
+CREATE TRIGGER {ROLLUP_TRIGGER}_update
+    AFTER UPDATE OF status, sent_at, scheduled_for, group_id ON broadcast_history
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.sent_at IS DISTINCT FROM NEW.sent_at
+          OR OLD.scheduled_for IS DISTINCT FROM NEW.scheduled_for
+          OR OLD.group_id IS DISTINCT FROM NEW.group_id)
+    EXECUTE FUNCTION broadcast_rollup_apply();
+"""
+
+REBUILD_ROLLUPS = """
+INSERT INTO broadcast_daily_rollups
+    (day, group_id, total, pending, sent, failed, delay_seconds_sum, delay_count)
+SELECT
+    scheduled_for::date,
+    group_id,
+    count(*),
+    count(*) FILTER (WHERE status NOT IN ('sent', 'failed')),
+    count(*) FILTER (WHERE status = 'sent'),
+    count(*) FILTER (WHERE status = 'failed'),
+    COALESCE(sum(extract(epoch FROM sent_at - scheduled_for)) FILTER (WHERE status = 'sent' AND sent_at IS NOT NULL), 0),
+    count(*) FILTER (WHERE status = 'sent' AND sent_at IS NOT NULL)
+FROM broadcast_history
+GROUP BY 1, 2
+"""
+
+
+def install_rollup_triggers():
+    """
+    Create the rollup functions and triggers if missing. On first install the
+    rollups are rebuilt from existing history while writes are blocked, so no
+    change is missed or double counted.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+        conn.execute(text(ROLLUP_FUNCTIONS))
+
+        installed = conn.execute(text(
+            "SELECT 1 FROM pg_trigger WHERE tgname = :name"
+        ), {"name": f"{ROLLUP_TRIGGER}_update"}).first()
+        if installed:
+            return
+
+        conn.execute(text("LOCK TABLE broadcast_history IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text(ROLLUP_TRIGGERS))
+        conn.execute(text("DELETE FROM broadcast_daily_rollups"))
+        conn.execute(text(REBUILD_ROLLUPS))
+        logger.info("Installed broadcast rollup triggers and rebuilt rollups")
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from live history (history archived since is lost)."""
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE broadcast_history IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text("DELETE FROM broadcast_daily_rollups"))
+        conn.execute(text(REBUILD_ROLLUPS))
+
+
+def _rates(sent: int, failed: int, delay_sum: float, delay_count: int) -> dict:
+    finished = sent + failed
+    return {
+        "failure_rate": round(failed / finished, 4) if finished else 0.0,
+        "avg_delay_seconds": round(delay_sum / delay_count, 3) if delay_count else None,
+    }
+
+
+def get_analytics(db: Session, tenant_id: int, since: date, until: date, bucket: str = "day", group_id: int = None) -> dict:
+    """
+    Aggregate a tenant's rollups for days in [since, until): overall totals,
+    per-group failure rates and per-day or per-week buckets.
+    """
+    r = BroadcastDailyRollup
+    # Rollups are per group; groups carry the tenant
+    tenant_groups = db.query(WhatsAppGroup.id).filter(WhatsAppGroup.tenant_id == tenant_id)
+    filters = [r.day >= since, r.day < until, r.group_id.in_(tenant_groups.scalar_subquery())]
+    if group_id:
+        filters.append(r.group_id == group_id)
+
+    sums = [
+        func.coalesce(func.sum(r.total), 0).label("total"),
+        func.coalesce(func.sum(r.pending), 0).label("pending"),
+        func.coalesce(func.sum(r.sent), 0).label("sent"),
+        func.coalesce(func.sum(r.failed), 0).label("failed"),
+        func.coalesce(func.sum(r.delay_seconds_sum), 0).label("delay_sum"),
+        func.coalesce(func.sum(r.delay_count), 0).label("delay_count"),
+    ]
+
+    totals = db.query(*sums).filter(*filters).one()
+
+    per_group = db.query(
+        r.group_id,
+        WhatsAppGroup.group_name,
+        *sums
+    ).outerjoin(WhatsAppGroup, WhatsAppGroup.id == r.group_id).filter(*filters).group_by(
+        r.group_id, WhatsAppGroup.group_name
+    ).order_by(
+        (func.sum(r.failed) * 1.0 / func.nullif(func.sum(r.sent) + func.sum(r.failed), 0)).desc().nullslast(),
+        r.group_id
+    ).all()
+
+    bucket_start = r.day if bucket == "day" else func.date_trunc("week", r.day).cast(r.day.type)
+    buckets = db.query(
+        bucket_start.label("bucket_start"),
+        *sums
+    ).filter(*filters).group_by(bucket_start).order_by(bucket_start).all()
+
+    def counts(row) -> dict:
+        return {
+            "total": int(row.total),
+            "pending": int(row.pending),
+            "sent": int(row.sent),
+            "failed": int(row.failed),
+            **_rates(int(row.sent), int(row.failed), float(row.delay_sum), int(row.delay_count)),
+        }
+
+    return {
+        "since": since,
+        "until": until,
+        "bucket": bucket,
+        "totals": counts(totals),
+        "groups": [
+            {"group_id": row.group_id, "group_name": row.group_name, **counts(row)}
+            for row in per_group
+        ],
+        "buckets": [
+            {"bucket_start": row.bucket_start, **counts(row)}
+            for row in buckets
+        ],
+    }
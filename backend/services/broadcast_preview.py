@@ -0,0 +1,116 @@
+import math
+import threading
+from collections import OrderedDict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+from services.message_generator import load_catalog, format_sections, format_footer
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def catalog_version(db: Session, tenant_id: int, table_group_ids: list) -> tuple:
+    """
+    Cheap fingerprint of the selected tables: item count plus the latest
+    table and item change. Any edit, insert or delete moves at least one of them.
+    """
+    row = db.query(
+        func.count(YarnItem.id),
+        func.max(func.coalesce(YarnItem.updated_at, YarnItem.created_at)),
+        func.max(func.coalesce(TableGroup.updated_at, TableGroup.created_at))
+    ).select_from(TableGroup).outerjoin(
+        YarnItem, YarnItem.table_group_id == TableGroup.id
+    ).filter(TableGroup.tenant_id == tenant_id, TableGroup.id.in_(table_group_ids)).one()
+    return tuple(row)
+
+
+def _split_long_block(block: str, limit: int) -> list:
+    chunks, current = [], ""
+    for line in block.splitlines(keepends=True):
+        if current and len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_message(header: str, blocks: list, footer: str, limit: int) -> list:
+    """
+    Pack table blocks into as few messages as fit within `limit`, only
+    breaking inside a table when that table alone is over the limit.
+    """
+    parts = []
+    current, has_block = header, False
+    for block in blocks:
+        pieces = _split_long_block(block, limit) if len(block) > limit else [block]
+        for piece in pieces:
+            if has_block and len(current) + len(piece) > limit:
+                parts.append(current.rstrip("\n"))
+                current = ""
+            current += piece
+            has_block = True
+    if has_block and len(current) + len(footer) > limit:
+        parts.append(current.rstrip("\n"))
+        current = ""
+    parts.append(current + footer)
+    return parts
+
+
+def _describe(message: str, parts: list, cached: bool) -> dict:
+    limit = settings.WHATSAPP_MESSAGE_LIMIT
+    characters = len(message)
+    exceeds = characters > limit
+    return {
+        "message": message,
+        "characters": characters,
+        "segments": max(1, math.ceil(characters / limit)),
+        "limit": limit,
+        "exceeds_limit": exceeds,
+        "warning": (
+            f"Message is {characters} characters, over the {limit} character limit; "
+            f"it will need to be sent as {len(parts)} messages"
+        ) if exceeds else None,
+        "parts": parts,
+        "cached": cached,
+    }
+
+
+def preview_tables(db: Session, tenant_id: int, table_group_ids: list) -> dict:
+    """
+    Render the auto-generated message without creating any history. The
+    header and table blocks are memoized by (tenant, table ids, catalog
+    version), so only the version query runs while the catalog is unchanged;
+    the footer carries the render time and is added fresh each call, as a send would.
+    """
+    key = (tenant_id, tuple(table_group_ids), catalog_version(db, tenant_id, table_group_ids))
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+    cached = entry is not None
+
+    if not cached:
+        header, blocks, _ = format_sections(load_catalog(db, tenant_id, table_group_ids))
+        entry = (header, tuple(blocks))
+        with _cache_lock:
+            _cache[key] = entry
+            while len(_cache) > settings.PREVIEW_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    header, blocks = entry
+    footer = format_footer()
+    message = header + "".join(blocks) + footer
+    return _describe(message, split_message(header, blocks, footer, settings.WHATSAPP_MESSAGE_LIMIT), cached=cached)
+
+
+def preview_custom(message: str) -> dict:
+    """Size accounting for a custom message; split at blank lines where needed."""
+    paragraphs = [p + "\n\n" for p in message.split("\n\n")]
+    paragraphs[-1] = paragraphs[-1][:-2]
+    parts = split_message("", paragraphs, "", settings.WHATSAPP_MESSAGE_LIMIT)
+    return _describe(message, [part for part in parts if part], cached=False)
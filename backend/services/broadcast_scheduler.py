@@ -0,0 +1,534 @@
+import heapq
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, text, update
+from core.config import settings
+from core.database import SessionLocal, engine
+from core.log import log_context
+from models.broadcast_history import BroadcastHistory
+from models.broadcast_message import BroadcastMessage
+from models.whatsapp_group import WhatsAppGroup
+from models.tenant import Tenant
+from services.price_sheets import attachment_path
+from services.whatsapp_service import send_to_group
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key Postgres advisory lock; the second key is the shard number
+SCHEDULER_LOCK_KEY = 7301
+
+SPREAD_POLICIES = ("fixed", "rate", "window")
+
+# Rows in these states are owned by a scheduler process through a lease
+CLAIMED_STATUSES = ("sending", "in_progress")
+
+
+def compute_send_times(
+    base_time: datetime,
+    count: int,
+    policy: str = None,
+    interval_seconds: float = None,
+    rate_per_minute: float = None,
+    window_minutes: float = None
+) -> list:
+    """
+    Spread `count` sends starting at `base_time`.
+
+    - fixed:  one send every `interval_seconds`
+    - rate:   `rate_per_minute` sends per minute
+    - window: evenly across `window_minutes`, whatever the group count
+    """
+    policy = policy or settings.BROADCAST_SPREAD_POLICY
+
+    if policy == "fixed":
+        step = interval_seconds if interval_seconds is not None else settings.BROADCAST_INTERVAL_SECONDS
+    elif policy == "rate":
+        rate = rate_per_minute or settings.BROADCAST_RATE_PER_MINUTE
+        step = 60.0 / rate
+    elif policy == "window":
+        window = window_minutes if window_minutes is not None else settings.BROADCAST_WINDOW_MINUTES
+        step = window * 60.0 / count if count else 0
+    else:
+        raise ValueError(f"Unknown spread policy: {policy}")
+
+    return [base_time + timedelta(seconds=idx * step) for idx in range(count)]
+
+
+def recover_stale_claims(lease_seconds: float = None) -> dict:
+    """
+    Hand back rows whose scheduler died (or stopped heartbeating) mid-claim.
+
+    - `sending`: claimed but the send never started, so it goes back to
+      `pending` and is sent once by whoever picks it up next.
+    - `in_progress`: the send may or may not have reached WhatsApp. It is
+      marked failed rather than retried so a group never gets the same
+      message twice; the error message says delivery is unknown.
+
+    Rows claimed before leases existed have no lease; they count as stale
+    once they are a lease period past their send time.
+    """
+    lease = timedelta(seconds=lease_seconds or settings.SCHEDULER_LEASE_SECONDS)
+    stale = or_(
+        BroadcastHistory.lease_expires_at < func.now(),
+        (BroadcastHistory.lease_expires_at.is_(None)) & (BroadcastHistory.scheduled_for < func.now() - lease)
+    )
+    released = {"claimed_by": None, "lease_expires_at": None}
+
+    with engine.begin() as conn:
+        requeued = conn.execute(
+            update(BroadcastHistory)
+            .where(BroadcastHistory.status == "sending", stale)
+            .values(status="pending", **released)
+        ).rowcount
+        interrupted = conn.execute(
+            update(BroadcastHistory)
+            .where(BroadcastHistory.status == "in_progress", stale)
+            .values(status="failed", error_message="Interrupted during send; delivery unknown", **released)
+        ).rowcount
+
+    summary = {"requeued": requeued, "interrupted": interrupted}
+    if requeued or interrupted:
+        logger.warning("Recovered stale broadcast claims", extra=summary)
+    return summary
+
+
+class BroadcastScheduler:
+    """
+    Dispatches pending `BroadcastHistory` rows at their `scheduled_for` time.
+
+    Due rows are kept in a heap ordered by send time. Only rows inside the
+    look-ahead horizon are loaded, capped at `max_queue`, so memory stays
+    bounded however many sends are scheduled. Pending rows live in the
+    database, so a restarted process simply reloads them.
+
+    Processes coordinate through Postgres session advisory locks: rows are
+    partitioned into `shards` by id and a process only dispatches the shards it
+    holds the lock for. A process first takes one free shard, then every
+    recovery interval also takes any shard still free by then, so shards no
+    process picked (more shards than processes, or a holder that died) are
+    dispatched too. Processes without a shard stay on standby. Independently
+    of the locks, a row is claimed with a
+    conditional `pending -> sending` UPDATE, so it can never be sent twice.
+    Advisory locks need a session-mode connection (not a transaction pooler).
+
+    Each tenant's sends pass through its own token bucket (its rate split
+    evenly across shards, times the shards held), so one tenant's large broadcast only delays its
+    own rows instead of everyone queued behind it.
+
+    Claims carry a lease (`claimed_by`, `lease_expires_at`) that the owning
+    process keeps extending while the send is queued or running. A row goes
+    `sending` (claimed) -> `in_progress` (send started) -> `sent`/`failed`;
+    `recover_stale_claims` runs at startup and periodically to pick up rows
+    whose owner disappeared. `stop()` drains: queued sends are handed back,
+    running ones get `SHUTDOWN_DRAIN_SECONDS` to finish.
+    """
+
+    def __init__(
+        self,
+        shards: int = None,
+        poll_seconds: float = None,
+        horizon_seconds: float = None,
+        max_queue: int = None,
+        batch_size: int = None,
+        send_concurrency: int = None
+    ):
+        self.shards = shards or settings.SCHEDULER_SHARDS
+        self.poll_seconds = poll_seconds or settings.SCHEDULER_POLL_SECONDS
+        self.horizon_seconds = horizon_seconds or settings.SCHEDULER_HORIZON_SECONDS
+        self.max_queue = max_queue or settings.SCHEDULER_MAX_QUEUE
+        self.batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        self.send_concurrency = send_concurrency or settings.SCHEDULER_SEND_CONCURRENCY
+        self.lease_seconds = settings.SCHEDULER_LEASE_SECONDS
+        self.worker_id = None
+        self.draining = False
+
+        self.owned_shards = set()
+        self._heap = []          # (due timestamp, history id, tenant id)
+        self._tenant_rates = {}  # tenant id -> sends per minute
+        self._buckets = {}       # tenant id -> [tokens, last refill timestamp]
+        self._queued = set()
+        self._in_flight = set()
+        self._futures = {}       # send future -> history id
+        self._results = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._reload = True
+        self._lock_conn = None
+        self._lock_checked = 0.0
+        self._thread = None
+        self._executor = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.draining = False
+        # Set here rather than at import so forked workers each get their own
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=self.send_concurrency, thread_name_prefix="broadcast-send")
+        self._thread = threading.Thread(target=self._run, name="broadcast-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None, drain_seconds: float = None):
+        """
+        Stop dispatching, hand queued sends back to `pending` and give running
+        sends up to `drain_seconds` to finish. Sends still running after that
+        keep their lease; if the process exits first, recovery marks them failed.
+        """
+        if self._thread is None:
+            return
+        self.draining = True
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+        futures = self._futures.copy()
+        unstarted = [history_id for future, history_id in futures.items() if future.cancel()]
+        self._executor.shutdown(wait=False)
+        running = [future for future in futures if not future.cancelled()]
+        _, still_running = wait(running, timeout=settings.SHUTDOWN_DRAIN_SECONDS if drain_seconds is None else drain_seconds)
+        if still_running:
+            logger.warning("Shutdown drain deadline passed with sends in flight", extra={"in_flight": len(still_running)})
+
+        try:
+            self._flush_results()
+            self._release_claims(unstarted)
+        except Exception:
+            logger.exception("Could not record broadcast outcomes on shutdown")
+        self._release_shards()
+        self._thread = None
+
+    def notify(self):
+        """Wake the scheduler after new pending rows were committed."""
+        self._reload = True
+        self._wake.set()
+
+    def _run(self):
+        next_load = 0.0
+        next_heartbeat = 0.0
+        next_recovery = 0.0
+        next_takeover = 0.0
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                # Every process sweeps, standby ones included; the updates are idempotent
+                if time.time() >= next_recovery:
+                    recover_stale_claims(self.lease_seconds)
+                    next_recovery = time.time() + settings.SCHEDULER_RECOVERY_SECONDS
+
+                if not self.owned_shards:
+                    if not self._acquire_shards(limit=1):
+                        self._wake.wait(self.poll_seconds)
+                        continue
+                    next_takeover = time.time() + settings.SCHEDULER_RECOVERY_SECONDS
+                elif time.time() >= next_takeover:
+                    # Shards still free a full interval later have no process of their own
+                    self._acquire_shards()
+                    next_takeover = time.time() + settings.SCHEDULER_RECOVERY_SECONDS
+                self._check_lock()
+
+                self._flush_results()
+                now = time.time()
+                if now >= next_heartbeat:
+                    self._heartbeat()
+                    next_heartbeat = now + self.lease_seconds / 3
+                if self._reload or now >= next_load:
+                    self._reload = False
+                    self._load()
+                    next_load = now + self.poll_seconds
+                self._dispatch_due()
+
+                timeout = next_load - time.time()
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - time.time())
+                self._wake.wait(max(timeout, 0))
+            except Exception:
+                logger.exception("Broadcast scheduler iteration failed")
+                self._release_shards()
+                self._wake.wait(self.poll_seconds)
+
+    def _acquire_shards(self, limit: int = None) -> bool:
+        """Lock free shards (at most `limit`) on the lock connection; True if any shard is held."""
+        if len(self.owned_shards) >= self.shards:
+            return True
+        conn = self._lock_conn or engine.connect()
+        acquired = []
+        try:
+            for shard in range(self.shards):
+                if limit is not None and len(acquired) >= limit:
+                    break
+                if shard in self.owned_shards:
+                    continue
+                locked = conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key, :shard)"),
+                    {"key": SCHEDULER_LOCK_KEY, "shard": shard}
+                ).scalar()
+                conn.commit()
+                if locked:
+                    acquired.append(shard)
+        except Exception:
+            if conn is not self._lock_conn:
+                conn.close()
+            raise
+        if not acquired:
+            if conn is not self._lock_conn:
+                conn.close()
+            return bool(self.owned_shards)
+
+        if self.owned_shards:
+            logger.warning("Broadcast scheduler took over unclaimed shards", extra={"taken": acquired, "shards": self.shards})
+        else:
+            logger.info("Broadcast scheduler acquired shard", extra={"shard": acquired[0], "shards": self.shards})
+        self._lock_conn = conn
+        self.owned_shards.update(acquired)
+        self._lock_checked = time.time()
+        self._reload = True
+        return True
+
+    def _check_lock(self):
+        """Advisory locks die with their connection; verify it periodically."""
+        if time.time() - self._lock_checked < 30:
+            return
+        self._lock_conn.execute(text("SELECT 1"))
+        self._lock_conn.commit()
+        self._lock_checked = time.time()
+
+    def _release_shards(self):
+        if self._lock_conn is not None:
+            try:
+                for shard in self.owned_shards:
+                    self._lock_conn.execute(
+                        text("SELECT pg_advisory_unlock(:key, :shard)"),
+                        {"key": SCHEDULER_LOCK_KEY, "shard": shard}
+                    )
+                self._lock_conn.commit()
+            except Exception:
+                logger.warning("Could not release scheduler advisory lock", exc_info=True)
+            finally:
+                self._lock_conn.close()
+        self._lock_conn = None
+        self.owned_shards = set()
+        self._heap = []
+        self._queued = set()
+
+    def _load(self):
+        capacity = self.max_queue - len(self._heap)
+        if capacity <= 0:
+            return
+
+        horizon = datetime.now() + timedelta(seconds=self.horizon_seconds)
+        db = SessionLocal()
+        try:
+            self._tenant_rates = {
+                row.id: row.broadcast_rate_per_minute or settings.TENANT_BROADCAST_RATE_PER_MINUTE
+                for row in db.query(Tenant.id, Tenant.broadcast_rate_per_minute)
+            }
+            query = db.query(BroadcastHistory.id, BroadcastHistory.scheduled_for, BroadcastHistory.tenant_id).filter(
+                BroadcastHistory.status == "pending",
+                BroadcastHistory.scheduled_for <= horizon
+            )
+            if len(self.owned_shards) < self.shards:
+                query = query.filter((BroadcastHistory.id % self.shards).in_(sorted(self.owned_shards)))
+            rows = query.order_by(BroadcastHistory.scheduled_for).limit(capacity + len(self._queued)).all()
+        finally:
+            db.close()
+
+        for row in rows:
+            if row.id in self._queued or row.id in self._in_flight:
+                continue
+            if len(self._heap) >= self.max_queue:
+                break
+            heapq.heappush(self._heap, (row.scheduled_for.timestamp(), row.id, row.tenant_id))
+            self._queued.add(row.id)
+
+    def _dispatch_due(self):
+        # Leave headroom so the executor queue cannot grow without bound
+        room = self.send_concurrency * 4 - len(self._in_flight)
+        now = time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < min(self.batch_size, room):
+            _, history_id, tenant_id = heapq.heappop(self._heap)
+            wait = self._take_token(tenant_id, now)
+            if wait:
+                # Over the tenant's rate: retry when its next token is available
+                heapq.heappush(self._heap, (now + wait, history_id, tenant_id))
+                continue
+            self._queued.discard(history_id)
+            due.append(history_id)
+        if not due:
+            return
+
+        for row in self._claim(due):
+            self._in_flight.add(row.id)
+            future = self._executor.submit(self._send, row)
+            self._futures[future] = row.id
+            future.add_done_callback(self._on_sent)
+
+    def _take_token(self, tenant_id: int, now: float) -> float:
+        """Take one send from the tenant's bucket; returns 0 or the seconds until one is available."""
+        rate = self._tenant_rates.get(tenant_id, settings.TENANT_BROADCAST_RATE_PER_MINUTE) / 60.0 * len(self.owned_shards) / self.shards
+        capacity = max(1.0, rate * 10)  # Allow ten seconds' worth of burst
+        bucket = self._buckets.setdefault(tenant_id, [capacity, now])
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / rate
+
+    def _claim(self, history_ids: list) -> list:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                update(BroadcastHistory)
+                .where(
+                    BroadcastHistory.id.in_(history_ids),
+                    BroadcastHistory.status == "pending",
+                    BroadcastHistory.group_id == WhatsAppGroup.id,
+                    BroadcastHistory.message_hash == BroadcastMessage.hash
+                )
+                .values(
+                    status="sending",
+                    claimed_by=self.worker_id,
+                    lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds)
+                )
+                .returning(
+                    BroadcastHistory.id,
+                    BroadcastMessage.body.label("message_text"),
+                    WhatsAppGroup.group_invite_id,
+                    BroadcastHistory.attachment,
+                    BroadcastHistory.tenant_id
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+            return rows
+        finally:
+            db.close()
+
+    def _mark_started(self, history_id: int) -> bool:
+        """
+        Move our claim to `in_progress` right before sending. Fails if the
+        lease was lost and the row recovered, in which case we must not send.
+        """
+        db = SessionLocal()
+        try:
+            started = db.execute(
+                update(BroadcastHistory)
+                .where(
+                    BroadcastHistory.id == history_id,
+                    BroadcastHistory.status == "sending",
+                    BroadcastHistory.claimed_by == self.worker_id
+                )
+                .values(status="in_progress", lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return started == 1
+        finally:
+            db.close()
+
+    def _heartbeat(self):
+        """Extend the leases of every row this process has claimed and not finished."""
+        history_ids = self._in_flight.copy()
+        if not history_ids:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(BroadcastHistory)
+                .where(
+                    BroadcastHistory.id.in_(history_ids),
+                    BroadcastHistory.status.in_(CLAIMED_STATUSES),
+                    BroadcastHistory.claimed_by == self.worker_id
+                )
+                .values(lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _release_claims(self, history_ids: list):
+        """Return claimed rows whose send never started to `pending`."""
+        if not history_ids:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(BroadcastHistory)
+                .where(
+                    BroadcastHistory.id.in_(history_ids),
+                    BroadcastHistory.status == "sending",
+                    BroadcastHistory.claimed_by == self.worker_id
+                )
+                .values(status="pending", claimed_by=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _send(self, row) -> dict:
+        # Everything logged during the send (including by send_to_group) carries the row
+        with log_context(history_id=row.id, tenant_id=row.tenant_id):
+            if not self._mark_started(row.id):
+                logger.warning("Broadcast claim lost before sending; skipped")
+                return {"id": row.id, "status": None}
+            try:
+                attachment = attachment_path(row.attachment) if row.attachment else None
+                result = send_to_group(row.group_invite_id, row.message_text, attachment=attachment)
+                error = None if result.get("status") == "success" else result.get("error", "Send failed")
+            except Exception as exc:
+                logger.exception("Broadcast send failed")
+                error = str(exc)
+
+        return {
+            "id": row.id,
+            "status": "failed" if error else "sent",
+            "sent_at": None if error else datetime.now(),
+            "error_message": error,
+            "claimed_by": None,
+            "lease_expires_at": None,
+        }
+
+    def _on_sent(self, future):
+        history_id = self._futures.pop(future, None)
+        self._in_flight.discard(history_id)
+        # Cancelled sends are handed back by stop(); a None status means the claim was lost
+        if not future.cancelled() and future.exception() is None:
+            result = future.result()
+            if result["status"] is not None:
+                self._results.put(result)
+        self._wake.set()
+
+    def _flush_results(self):
+        updates = []
+        while True:
+            try:
+                updates.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        if not updates:
+            return
+
+        db = SessionLocal()
+        try:
+            db.execute(update(BroadcastHistory), updates)
+            db.commit()
+        except Exception:
+            # Keep the outcomes for the next attempt rather than losing them
+            for item in updates:
+                self._results.put(item)
+            raise
+        finally:
+            db.close()
+
+
+broadcast_scheduler = BroadcastScheduler()
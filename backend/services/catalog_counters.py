@@ -0,0 +1,121 @@
+import logging
+from sqlalchemy import text
+from core.database import engine
+
+logger = logging.getLogger(__name__)
+
+COUNTER_TRIGGER = "yarn_items_table_counts"
+
+# Transaction-level advisory lock so concurrent workers install triggers once
+COUNTER_LOCK_KEY = 7306
+
+# Tables created before the counters existed get them here; create_all only builds missing tables
+COUNTER_COLUMNS = """
+ALTER TABLE table_groups
+    ADD COLUMN IF NOT EXISTS item_count integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS visible_item_count integer NOT NULL DEFAULT 0
+"""
+
+# Statement-level triggers with transition tables: a bulk insert, reorder or
+# cascade delete of N items costs one UPDATE per affected table group rather
+# than N. Updates that move no item between groups or visibility leave
+# table_groups untouched (the HAVING), so rate edits do not write it at all.
+COUNTER_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION table_group_counts_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE table_groups g SET
+            item_count = g.item_count + d.items,
+            visible_item_count = g.visible_item_count + d.visible
+        FROM (
+            SELECT table_group_id, count(*) AS items, count(*) FILTER (WHERE show_on_homepage) AS visible
+            FROM new_rows GROUP BY table_group_id
+        ) d
+        WHERE g.id = d.table_group_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE table_groups g SET
+            item_count = g.item_count - d.items,
+            visible_item_count = g.visible_item_count - d.visible
+        FROM (
+            SELECT table_group_id, count(*) AS items, count(*) FILTER (WHERE show_on_homepage) AS visible
+            FROM old_rows GROUP BY table_group_id
+        ) d
+        WHERE g.id = d.table_group_id;
+    ELSE
+        UPDATE table_groups g SET
+            item_count = g.item_count + d.items,
+            visible_item_count = g.visible_item_count + d.visible
+        FROM (
+            SELECT table_group_id, sum(items) AS items, sum(visible) AS visible
+            FROM (
+                SELECT table_group_id, -1 AS items, -(COALESCE(show_on_homepage, false))::integer AS visible FROM old_rows
+                UNION ALL
+                SELECT table_group_id, 1, (COALESCE(show_on_homepage, false))::integer FROM new_rows
+            ) moved
+            GROUP BY table_group_id
+            HAVING sum(items) <> 0 OR sum(visible) <> 0
+        ) d
+        WHERE g.id = d.table_group_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Transition tables cannot be combined with a column list, so UPDATE fires on any update
+COUNTER_TRIGGERS = f"""
+CREATE TRIGGER {COUNTER_TRIGGER}_insert
+    AFTER INSERT ON yarn_items REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION table_group_counts_apply();
+
+CREATE TRIGGER {COUNTER_TRIGGER}_update
+    AFTER UPDATE ON yarn_items REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION table_group_counts_apply();
+
+CREATE TRIGGER {COUNTER_TRIGGER}_delete
+    AFTER DELETE ON yarn_items REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION table_group_counts_apply();
+"""
+
+REBUILD_COUNTS = """
+UPDATE table_groups g SET
+    item_count = COALESCE(c.items, 0),
+    visible_item_count = COALESCE(c.visible, 0)
+FROM table_groups t
+LEFT JOIN (
+    SELECT table_group_id, count(*) AS items, count(*) FILTER (WHERE show_on_homepage) AS visible
+    FROM yarn_items GROUP BY table_group_id
+) c ON c.table_group_id = t.id
+WHERE g.id = t.id
+  AND (g.item_count, g.visible_item_count) IS DISTINCT FROM (COALESCE(c.items, 0), COALESCE(c.visible, 0))
+"""
+
+
+def install_item_count_triggers():
+    """
+    Add the `table_groups` counter columns and the triggers that maintain them
+    if missing. On first install the counts are rebuilt from `yarn_items`
+    while item writes are blocked, so no change is missed or double counted.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": COUNTER_LOCK_KEY})
+        conn.execute(text(COUNTER_FUNCTIONS))
+
+        installed = conn.execute(text(
+            "SELECT 1 FROM pg_trigger WHERE tgname = :name"
+        ), {"name": f"{COUNTER_TRIGGER}_update"}).first()
+        if installed:
+            return
+
+        conn.execute(text("LOCK TABLE yarn_items IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text(COUNTER_COLUMNS))
+        conn.execute(text(COUNTER_TRIGGERS))
+        conn.execute(text(REBUILD_COUNTS))
+        logger.info("Installed table group item count triggers and rebuilt counts")
+
+
+def rebuild_item_counts():
+    """Recompute every table group's counters from `yarn_items`; only rows that drifted are written."""
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE yarn_items IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text(REBUILD_COUNTS))
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, tuple_, func
+from core.config import settings
+from core.database import engine
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+COLUMNS = [
+    "table_group_id", "table_name", "table_display_order", "table_show_on_homepage",
+    "item_id", "count", "quality", "rate", "item_display_order", "item_show_on_homepage",
+    "updated_at",
+]
+
+ARROW_SCHEMA = pa.schema([
+    ("table_group_id", pa.int32()),
+    ("table_name", pa.string()),
+    ("table_display_order", pa.int32()),
+    ("table_show_on_homepage", pa.bool_()),
+    ("item_id", pa.int32()),
+    ("count", pa.string()),
+    ("quality", pa.string()),
+    ("rate", pa.decimal128(10, 2)),
+    ("item_display_order", pa.int32()),
+    ("item_show_on_homepage", pa.bool_()),
+    ("updated_at", pa.timestamp("us", tz="UTC")),
+])
+
+# Catalog order, also the keyset used to resume between pages
+ORDER_KEY = (TableGroup.display_order, TableGroup.id, YarnItem.display_order, YarnItem.id)
+
+
+def _page_query(tenant_id: int, after: tuple, limit: int):
+    query = select(
+        TableGroup.id,
+        TableGroup.table_name,
+        TableGroup.display_order,
+        TableGroup.show_on_homepage,
+        YarnItem.id,
+        YarnItem.count,
+        YarnItem.quality,
+        YarnItem.rate,
+        YarnItem.display_order,
+        YarnItem.show_on_homepage,
+        func.coalesce(YarnItem.updated_at, YarnItem.created_at),
+    ).join(YarnItem, YarnItem.table_group_id == TableGroup.id).where(
+        TableGroup.tenant_id == tenant_id
+    ).order_by(*ORDER_KEY).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(*ORDER_KEY) > tuple_(*after))
+    return query
+
+
+def iter_catalog_batches(tenant_id: int, page_size: int = None, fetch_size: int = None):
+    """
+    Yield a tenant's catalog as lists of row tuples (COLUMNS order), in display order.
+
+    Each page of `page_size` rows is read over a server-side cursor in its own
+    short transaction and the next page resumes by keyset, so neither memory
+    nor transaction length grows with the catalog. Pages are not one snapshot:
+    edits made during a long export show up in pages read after them.
+    """
+    page_size = page_size or settings.EXPORT_PAGE_SIZE
+    fetch_size = fetch_size or settings.EXPORT_FETCH_SIZE
+    after = None
+
+    while True:
+        read = 0
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=fetch_size).execute(
+                _page_query(tenant_id, after, page_size)
+            )
+            for batch in result.partitions():
+                read += len(batch)
+                last = batch[-1]
+                yield [tuple(row) for row in batch]
+        if read < page_size:
+            return
+        after = (last[2], last[0], last[8], last[4])
+
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(
+            row[:-1] + (row[-1].isoformat() if row[-1] else "",) for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(batches):
+    for batch in batches:
+        lines = []
+        for row in batch:
+            record = dict(zip(COLUMNS, row))
+            record["rate"] = float(record["rate"])
+            record["updated_at"] = record["updated_at"].isoformat() if record["updated_at"] else None
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that hands whatever pyarrow wrote back to the
+    response generator, instead of buffering the whole file.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _record_batch(batch) -> pa.RecordBatch:
+    columns = list(zip(*batch))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, ARROW_SCHEMA)],
+        schema=ARROW_SCHEMA
+    )
+
+
+def arrow_chunks(batches):
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), ARROW_SCHEMA) as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch))
+            yield sink.drain()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def parquet_chunks(batches):
+    # One row group per fetched batch; the footer is written on close
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), ARROW_SCHEMA, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch))
+            yield sink.drain()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+CHUNK_WRITERS = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "arrow": arrow_chunks,
+    "parquet": parquet_chunks,
+}
+
+
+def export_catalog(tenant_id: int, fmt: str):
+    """Byte chunks of a tenant's whole catalog in the given export format."""
+    return CHUNK_WRITERS[fmt](iter_catalog_batches(tenant_id))
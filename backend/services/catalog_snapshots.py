@@ -0,0 +1,140 @@
+import hashlib
+import json
+import zlib
+from decimal import Decimal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.broadcast_history import BroadcastHistory
+from models.catalog_snapshot import CatalogSnapshot
+from services.message_generator import load_catalog, format_sections, format_delta
+
+
+def build_snapshot(sections: list) -> dict:
+    """
+    Compact catalog state from `load_catalog` sections: table names by id and
+    `[table id, count, quality, rate]` by item id. Keys are strings (JSON).
+    """
+    return {
+        "tables": {str(section["table_group_id"]): section["table_name"] for section in sections},
+        "items": {
+            str(item_id): [section["table_group_id"], count, quality, str(rate)]
+            for section in sections
+            for item_id, (count, quality, rate) in zip(section["item_ids"], section["items"])
+        },
+    }
+
+
+def merge_snapshot(baseline: dict, current: dict, table_group_ids: list) -> dict:
+    """
+    What a group holds after receiving `current` for `table_group_ids`: the
+    baseline's other tables are kept so a later delta for them still has a base.
+    """
+    scope = set(table_group_ids)
+    items = {key: item for key, item in baseline["items"].items() if item[0] not in scope}
+    items.update(current["items"])
+    return {"tables": {**baseline["tables"], **current["tables"]}, "items": items}
+
+
+def diff_snapshots(baseline: dict, current: dict, table_group_ids: list) -> list:
+    """
+    Keyed diff of the selected tables as `(table_name, rows)` pairs in table
+    order, each row `(kind, count, quality, old_rate, new_rate)`. One dict
+    lookup per item, so 10k-item catalogs diff in a few milliseconds.
+    """
+    scope = set(table_group_ids)
+    old_items, new_items = baseline["items"], current["items"]
+    changes = {}
+
+    for key, (table_id, count, quality, rate) in new_items.items():
+        previous = old_items.get(key)
+        if previous is None or previous[0] not in scope:
+            changes.setdefault(table_id, []).append(("added", count, quality, None, rate))
+        elif previous[3] != rate:
+            kind = "up" if Decimal(rate) > Decimal(previous[3]) else "down"
+            changes.setdefault(table_id, []).append((kind, count, quality, previous[3], rate))
+
+    for key, (table_id, count, quality, rate) in old_items.items():
+        if table_id in scope and key not in new_items:
+            changes.setdefault(table_id, []).append(("removed", count, quality, rate, None))
+
+    tables = {**baseline["tables"], **current["tables"]}
+    return [
+        (tables.get(str(table_id), ""), changes[table_id])
+        for table_id in dict.fromkeys(table_group_ids) if table_id in changes
+    ]
+
+
+def _encode(snapshot: dict) -> bytes:
+    return json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def store_snapshot(db: Session, snapshot: dict) -> str:
+    """
+    Store a snapshot once and return its hash for use as `BroadcastHistory.snapshot_hash`.
+    """
+    encoded = _encode(snapshot)
+    digest = hashlib.sha256(encoded).hexdigest()
+    db.execute(
+        insert(CatalogSnapshot)
+        .values(hash=digest, data=zlib.compress(encoded))
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    return digest
+
+
+def load_snapshots(db: Session, hashes: set) -> dict:
+    rows = db.query(CatalogSnapshot.hash, CatalogSnapshot.data).filter(CatalogSnapshot.hash.in_(hashes))
+    return {row.hash: json.loads(zlib.decompress(row.data)) for row in rows}
+
+
+def last_sent_snapshots(db: Session, tenant_id: int, group_ids: list) -> dict:
+    """
+    Group id -> hash of the latest snapshot actually sent to it.
+    """
+    rows = db.query(BroadcastHistory.group_id, BroadcastHistory.snapshot_hash).filter(
+        BroadcastHistory.tenant_id == tenant_id,
+        BroadcastHistory.group_id.in_(group_ids),
+        BroadcastHistory.status == "sent",
+        BroadcastHistory.snapshot_hash.isnot(None)
+    ).distinct(BroadcastHistory.group_id).order_by(
+        BroadcastHistory.group_id, BroadcastHistory.sent_at.desc()
+    )
+    return {row.group_id: row.snapshot_hash for row in rows}
+
+
+def plan_catalog_messages(db: Session, tenant_id: int, group_ids: list, table_group_ids: list, delta: bool) -> dict:
+    """
+    Group id -> (message, snapshot hash) for an auto_generate or delta
+    broadcast, or None for a delta group that has nothing new to hear.
+
+    The catalog is loaded once and each distinct baseline is diffed and
+    stored once, however many groups share it. Delta groups that never
+    received a catalog get the full message.
+    """
+    sections = load_catalog(db, tenant_id, table_group_ids)
+    current = build_snapshot(sections)
+    baselines = last_sent_snapshots(db, tenant_id, group_ids)
+    snapshots = load_snapshots(db, set(baselines.values())) if baselines else {}
+
+    full_message = None
+    plans, by_baseline = {}, {}
+    for group_id in group_ids:
+        baseline_hash = baselines.get(group_id)
+        if baseline_hash not in by_baseline:
+            baseline = snapshots.get(baseline_hash)
+            changes = diff_snapshots(baseline, current, table_group_ids) if delta and baseline else None
+            if changes == []:
+                plan = None
+            else:
+                if changes:
+                    message = format_delta(changes)
+                else:
+                    if full_message is None:
+                        header, blocks, footer = format_sections(sections)
+                        full_message = header + "".join(blocks) + footer
+                    message = full_message
+                sent = merge_snapshot(baseline, current, table_group_ids) if baseline else current
+                plan = (message, store_snapshot(db, sent))
+            by_baseline[baseline_hash] = plan
+        plans[group_id] = by_baseline[baseline_hash]
+    return plans
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, date, time
+from typing import Iterator
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# (name, minimum, maximum) for the five standard fields
+FIELDS = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+]
+
+# Stop searching when an expression can never match (e.g. "0 0 30 2 *")
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(value: str, name: str, minimum: int, maximum: int) -> set:
+    values = set()
+    for part in value.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ValueError(f"Invalid step in {name} field: {value}")
+            step = int(step_text)
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            if not start_text.isdigit() or not end_text.isdigit():
+                raise ValueError(f"Invalid range in {name} field: {value}")
+            start, end = int(start_text), int(end_text)
+        elif part.isdigit():
+            start = int(part)
+            end = maximum if step > 1 else start
+        else:
+            raise ValueError(f"Invalid {name} field: {value}")
+
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"{name} field out of range: {value}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """
+    Standard five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports `*`, lists, ranges, steps and the common `@daily`-style macros.
+    As in cron, when both day fields are restricted a day matches either one.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = MACROS.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError("Cron expression must have 5 fields: minute hour day month weekday")
+
+        minutes, hours, days, months, weekdays = [
+            _parse_field(value, *spec) for value, spec in zip(fields, FIELDS)
+        ]
+        if 7 in weekdays:
+            weekdays = (weekdays - {7}) | {0}
+
+        self.minutes = sorted(minutes)
+        self.hours = sorted(hours)
+        self.days = days
+        self.months = months
+        self.weekdays = weekdays
+        self._day_restricted = fields[2] != "*"
+        self._weekday_restricted = fields[4] != "*"
+
+    def _matches_day(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        # Python: Monday=0; cron: Sunday=0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def occurrences(self, after: datetime) -> Iterator[datetime]:
+        """
+        Lazily yield every matching time strictly after `after`, in order.
+        Only one day's candidates are considered at a time, so callers can
+        expand arbitrarily far ahead without building a list.
+        """
+        day = after.date()
+        misses = 0
+        while misses < MAX_SEARCH_DAYS:
+            if self._matches_day(day):
+                misses = 0
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime.combine(day, time(hour, minute), tzinfo=after.tzinfo)
+                        if candidate > after:
+                            yield candidate
+            else:
+                misses += 1
+            day += timedelta(days=1)
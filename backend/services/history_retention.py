@@ -0,0 +1,244 @@
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from core.config import settings
+from core.database import engine
+from services.price_sheets import prune_price_sheets
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "broadcast_history"
+DEFAULT_PARTITION = "broadcast_history_default"
+PARTITION_NAME = re.compile(r"^broadcast_history_(\d{4})_(\d{2})$")
+
+# Transaction-level advisory lock so only one process runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 7303
+
+# Rows fetched per round trip when streaming a partition to its archive
+ARCHIVE_FETCH_SIZE = 1000
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def list_partitions(conn: Connection) -> list:
+    """
+    Monthly partitions of broadcast_history as (month, table name), oldest first.
+    """
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(conn: Connection, month: date):
+    """
+    Create the partition for one month. Rows that already landed in the
+    default partition for that range are moved into it, through the parent
+    table so row triggers (analytics rollups) see a matching delete and insert.
+    """
+    name = partition_name(month)
+    start, end = month.isoformat(), _add_months(month, 1).isoformat()
+    bounds = {"start": start, "end": end}
+    in_range = "scheduled_for >= :start AND scheduled_for < :end"
+
+    conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN SHARE ROW EXCLUSIVE MODE"))
+    stray = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"), bounds).scalar()
+    if stray:
+        conn.execute(text(
+            f"CREATE TEMP TABLE moved_history ON COMMIT DROP AS SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"
+        ), bounds)
+        conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+
+    if stray:
+        conn.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM moved_history"))
+        conn.execute(text("DROP TABLE moved_history"))
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = None, since: date = None):
+    """
+    Make sure the default partition and monthly partitions from `since`
+    (default: this month) through `months_ahead` months exist.
+    """
+    months_ahead = settings.HISTORY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+    existing = {month for month, _ in list_partitions(conn)}
+    this_month = date.today().replace(day=1)
+    month = (since or this_month).replace(day=1)
+    last = _add_months(this_month, months_ahead)
+    while month <= last:
+        if month not in existing:
+            create_partition(conn, month)
+            logger.info("Created history partition", extra={"partition": partition_name(month)})
+        month = _add_months(month, 1)
+
+
+def prepare_partitions():
+    """
+    Called at startup, after create_all, so inserts always have a partition.
+    Blocks on the maintenance lock so concurrent workers do not race.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        ensure_partitions(conn)
+
+
+def _write_jsonl_gz(path: str, rows) -> int:
+    tmp_path = path + ".tmp"
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(row._mapping), default=str))
+            f.write("\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def archive_partition(conn: Connection, name: str, archive_dir: str) -> int:
+    """
+    Stream one partition and the message bodies it references to gzip JSONL
+    files, then detach and drop it. Returns the number of archived rows.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    stream = conn.execution_options(stream_results=True, yield_per=ARCHIVE_FETCH_SIZE)
+
+    rows = stream.execute(text(f"SELECT * FROM {name} ORDER BY scheduled_for, id"))
+    count = _write_jsonl_gz(os.path.join(archive_dir, f"{name}.jsonl.gz"), rows)
+
+    messages = stream.execute(text(
+        f"SELECT m.hash, m.body FROM broadcast_messages m "
+        f"WHERE m.hash IN (SELECT DISTINCT message_hash FROM {name})"
+    ))
+    _write_jsonl_gz(os.path.join(archive_dir, f"{name}.messages.jsonl.gz"), messages)
+
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    return count
+
+
+def delete_orphan_messages(conn: Connection) -> int:
+    """
+    Remove message bodies no history row references any more. Recent bodies
+    are kept because their history rows may not be committed yet.
+    """
+    result = conn.execute(text("""
+        DELETE FROM broadcast_messages m
+        WHERE m.created_at < now() - interval '1 day'
+        AND NOT EXISTS (SELECT 1 FROM broadcast_history h WHERE h.message_hash = m.hash)
+    """))
+    return result.rowcount
+
+
+def delete_orphan_snapshots(conn: Connection) -> int:
+    """
+    Remove catalog snapshots no history row references any more, with the
+    same grace period as message bodies.
+    """
+    result = conn.execute(text("""
+        DELETE FROM catalog_snapshots s
+        WHERE s.created_at < now() - interval '1 day'
+        AND NOT EXISTS (SELECT 1 FROM broadcast_history h WHERE h.snapshot_hash = s.hash)
+    """))
+    return result.rowcount
+
+
+def run_maintenance(retention_months: int = None, archive_dir: str = None) -> dict:
+    """
+    Create upcoming partitions, archive and drop partitions older than the
+    retention period and clean up unreferenced message bodies, snapshots and
+    cached price sheets.
+    """
+    retention_months = settings.HISTORY_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or settings.HISTORY_ARCHIVE_DIR
+    summary = {"archived_partitions": [], "archived_rows": 0, "deleted_messages": 0, "deleted_snapshots": 0, "deleted_price_sheets": 0}
+
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar():
+            return summary
+        ensure_partitions(conn)
+
+    if retention_months > 0:
+        cutoff = _add_months(date.today().replace(day=1), -retention_months)
+        with engine.connect() as conn:
+            partitions = [name for month, name in list_partitions(conn) if month < cutoff]
+        for name in partitions:
+            # One transaction per partition keeps each one short
+            with engine.begin() as conn:
+                if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar():
+                    return summary
+                summary["archived_rows"] += archive_partition(conn, name, archive_dir)
+                summary["archived_partitions"].append(name)
+                logger.info("Archived and dropped history partition", extra={"partition": name})
+
+    with engine.begin() as conn:
+        summary["deleted_messages"] = delete_orphan_messages(conn)
+        summary["deleted_snapshots"] = delete_orphan_snapshots(conn)
+        summary["deleted_price_sheets"] = prune_price_sheets(conn)
+
+    return summary
+
+
+class HistoryMaintenanceWorker:
+    """
+    Background thread that runs history partition maintenance periodically.
+    """
+
+    def __init__(self, interval_hours: float = None):
+        self.interval_seconds = (interval_hours or settings.HISTORY_MAINTENANCE_INTERVAL_HOURS) * 3600
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                summary = run_maintenance()
+                if any(summary[key] for key in ("archived_partitions", "deleted_messages", "deleted_snapshots", "deleted_price_sheets")):
+                    logger.info("History maintenance finished", extra=summary)
+            except Exception:
+                logger.exception("History maintenance failed")
+            self._stop.wait(self.interval_seconds)
+
+
+history_maintenance_worker = HistoryMaintenanceWorker()
@@ -0,0 +1,231 @@
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import brotli
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import SessionLocal
+from models.table_group import TableGroup
+from models.yarn_item import YarnItem
+
+logger = logging.getLogger(__name__)
+
+# First key of the transaction advisory lock serializing publishes; the second is the tenant id
+PUBLISH_LOCK_KEY = 7305
+
+# Pointer names inside a tenant's directory; each is a symlink to the current hashed file
+LATEST = "latest.json"
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def load_homepage(db: Session, tenant_id: int) -> dict:
+    """
+    Visible table groups with their items, read in one query over the
+    (tenant_id, ...) display-order indexes.
+    """
+    rows = db.query(
+        TableGroup.id.label("table_group_id"),
+        TableGroup.table_name,
+        TableGroup.display_order.label("table_display_order"),
+        func.coalesce(TableGroup.updated_at, TableGroup.created_at).label("table_updated_at"),
+        YarnItem.id,
+        YarnItem.count,
+        YarnItem.quality,
+        YarnItem.rate
+    ).outerjoin(YarnItem, and_(
+        YarnItem.tenant_id == tenant_id,
+        YarnItem.table_group_id == TableGroup.id,
+        YarnItem.show_on_homepage == True
+    )).filter(
+        TableGroup.tenant_id == tenant_id,
+        TableGroup.show_on_homepage == True
+    ).order_by(TableGroup.display_order, TableGroup.id, YarnItem.display_order).all()
+
+    result = []
+    tables = {}
+    for row in rows:
+        table = tables.get(row.table_group_id)
+        if table is None:
+            table = tables[row.table_group_id] = {
+                "id": row.table_group_id,
+                "table_name": row.table_name,
+                "display_order": row.table_display_order,
+                "items": [],
+                "updated_at": row.table_updated_at
+            }
+            result.append(table)
+        if row.id is not None:
+            table["items"].append({
+                "id": row.id,
+                "serial_number": len(table["items"]) + 1,
+                "count": row.count,
+                "quality": row.quality,
+                "rate": float(row.rate)
+            })
+
+    last_updated = max([table.pop("updated_at") for table in result], default=None)
+
+    return {
+        "tables": result,
+        "last_updated": last_updated
+    }
+
+
+def tenant_dir(tenant_id: int) -> str:
+    return os.path.join(settings.HOMEPAGE_SNAPSHOT_DIR, str(tenant_id))
+
+
+def current_snapshot(tenant_id: int):
+    """Path of the tenant's published JSON, or None if nothing was published yet."""
+    directory = tenant_dir(tenant_id)
+    try:
+        return os.path.join(directory, os.readlink(os.path.join(directory, LATEST)))
+    except OSError:
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _point(directory: str, name: str, target: str):
+    """Swap a symlink in one rename, so readers see the old or the new file, never neither."""
+    tmp_link = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, os.path.join(directory, name))
+
+
+def _prune(directory: str, keep: int):
+    # Hashed files stay around for a few versions so cached redirects keep resolving
+    current = sorted(glob.glob(os.path.join(directory, "homepage.*.json")), key=os.path.getmtime, reverse=True)
+    for path in current[keep:]:
+        for suffix in ("", *ENCODINGS.values()):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def publish_homepage(tenant_id: int) -> str:
+    """
+    Write the tenant's homepage payload as `homepage.<hash>.json` plus gzip
+    and brotli variants, then repoint `latest.json` (and `.gz`/`.br`) at it.
+    Runs under a per-tenant advisory lock so the last publish always reflects
+    the latest committed catalog. Returns the published file name.
+    """
+    directory = tenant_dir(tenant_id)
+    os.makedirs(directory, exist_ok=True)
+
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key, :tenant)"), {"key": PUBLISH_LOCK_KEY, "tenant": tenant_id})
+        payload = jsonable_encoder(load_homepage(db, tenant_id))
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        name = f"homepage.{hashlib.sha256(body).hexdigest()[:16]}.json"
+
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            _write_atomic(path + ENCODINGS["gzip"], gzip.compress(body, compresslevel=9, mtime=0))
+            _write_atomic(path + ENCODINGS["br"], brotli.compress(body, quality=11))
+            _write_atomic(path, body)
+        for suffix in ENCODINGS.values():
+            _point(directory, LATEST + suffix, name + suffix)
+        _point(directory, LATEST, name)
+        db.commit()
+    finally:
+        db.close()
+
+    _prune(directory, settings.HOMEPAGE_SNAPSHOT_KEEP)
+    return name
+
+
+class HomepagePublisher:
+    """
+    Background thread that publishes homepage snapshots after catalog writes.
+
+    `request()` is debounced per tenant: a publish happens once writes have
+    been quiet for `debounce_seconds`, or at the latest `max_delay_seconds`
+    after the first of them, so a burst of edits costs one publish.
+    """
+
+    def __init__(self, debounce_seconds: float = None, max_delay_seconds: float = None):
+        self.debounce_seconds = debounce_seconds or settings.HOMEPAGE_PUBLISH_DEBOUNCE_SECONDS
+        self.max_delay_seconds = max_delay_seconds or settings.HOMEPAGE_PUBLISH_MAX_DELAY_SECONDS
+        self._pending = {}  # tenant id -> [due, deadline]
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="homepage-publisher", daemon=True)
+        self._thread.start()
+        # Catch up on writes made while no publisher was running (scripts, other deployments)
+        if os.path.isdir(settings.HOMEPAGE_SNAPSHOT_DIR):
+            for name in os.listdir(settings.HOMEPAGE_SNAPSHOT_DIR):
+                if name.isdigit():
+                    self.request(int(name))
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        # Do not leave the last edits unpublished
+        self._publish_due(force=True)
+
+    def request(self, tenant_id: int):
+        if self._thread is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(tenant_id)
+            if entry is None:
+                self._pending[tenant_id] = [now + self.debounce_seconds, now + self.max_delay_seconds]
+            else:
+                entry[0] = min(now + self.debounce_seconds, entry[1])
+        self._wake.set()
+
+    def _publish_due(self, force: bool = False) -> float:
+        """Publish tenants whose time has come; returns seconds until the next one is due."""
+        now = time.monotonic()
+        with self._lock:
+            due = [tenant_id for tenant_id, (at, _) in self._pending.items() if force or at <= now]
+            for tenant_id in due:
+                del self._pending[tenant_id]
+            next_due = min((at for at, _ in self._pending.values()), default=None)
+
+        for tenant_id in due:
+            try:
+                name = publish_homepage(tenant_id)
+                logger.info("Published homepage snapshot", extra={"tenant_id": tenant_id, "file": name})
+            except Exception:
+                logger.exception("Homepage snapshot publish failed", extra={"tenant_id": tenant_id})
+                if not force:
+                    # Try again later rather than leave a stale snapshot in place
+                    self.request(tenant_id)
+        return None if next_due is None else max(next_due - now, 0.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            timeout = self._publish_due()
+            self._wake.wait(timeout)
+
+
+homepage_publisher = HomepagePublisher()
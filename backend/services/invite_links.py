@@ -0,0 +1,248 @@
+import asyncio
+import csv
+import io
+import logging
+import threading
+import time
+import httpx
+from datetime import timedelta
+from sqlalchemy import Integer, String, case, cast, column, func, or_, select, text, update, values
+from core.config import settings
+from core.database import engine
+from models.whatsapp_group import WhatsAppGroup
+
+logger = logging.getLogger(__name__)
+
+# Session-level advisory lock so only one process checks links at a time
+LINK_CHECK_LOCK_KEY = 7307
+
+# Seconds before retrying when another process is mid-check
+LOCK_RETRY_SECONDS = 60
+
+# Runs with fewer results than this are too small for the dead fraction guard to mean anything
+MIN_GUARDED_RUN = 10
+
+
+def parse_import_csv(data: str) -> list:
+    """
+    (link, name) pairs from CSV text. The cell mentioning chat.whatsapp.com is
+    the link and the first other non-empty cell the name, in either order; a
+    first row without a link is taken as a header.
+    """
+    rows = []
+    for number, cells in enumerate(csv.reader(io.StringIO(data))):
+        cells = [cell.strip() for cell in cells if cell.strip()]
+        if not cells:
+            continue
+        link = next((cell for cell in cells if "chat.whatsapp.com" in cell), None)
+        if link is None:
+            if number == 0:
+                continue
+            link = cells[0]
+        name = next((cell for cell in cells if cell is not link), None)
+        rows.append((link, name))
+    return rows
+
+
+def classify(response: httpx.Response) -> str:
+    if response.status_code in (404, 410):
+        return "dead"
+    if response.is_success:
+        if any(marker in response.text for marker in settings.WHATSAPP_LINK_DEAD_MARKERS):
+            return "dead"
+        return "ok"
+    # Rate limits and server errors say nothing about the link
+    return "unknown"
+
+
+async def check_invite_links(invite_ids: list, transport: httpx.AsyncBaseTransport = None) -> dict:
+    """
+    Invite id -> ok | dead | unknown, with at most
+    WHATSAPP_LINK_CHECK_CONCURRENCY requests in flight. Pass a transport
+    (httpx.MockTransport, or ASGITransport over a fake app) to check against
+    something other than WHATSAPP_LINK_CHECK_URL's host.
+    """
+    semaphore = asyncio.Semaphore(settings.WHATSAPP_LINK_CHECK_CONCURRENCY)
+    limits = httpx.Limits(max_connections=settings.WHATSAPP_LINK_CHECK_CONCURRENCY)
+
+    async with httpx.AsyncClient(
+        transport=transport, limits=limits, timeout=settings.WHATSAPP_LINK_CHECK_TIMEOUT, follow_redirects=True
+    ) as client:
+        async def check(invite_id: str) -> tuple:
+            async with semaphore:
+                try:
+                    response = await client.get(settings.WHATSAPP_LINK_CHECK_URL.format(invite_id=invite_id))
+                except httpx.HTTPError as e:
+                    logger.debug("Invite link check failed", extra={"invite_id": invite_id, "error": str(e)})
+                    return invite_id, "unknown"
+            return invite_id, classify(response)
+
+        return dict(await asyncio.gather(*(check(invite_id) for invite_id in invite_ids)))
+
+
+def run_link_check(group_ids: list = None, checked_before: timedelta = None, transport: httpx.AsyncBaseTransport = None,
+                   tenant_id: int = None) -> dict:
+    """
+    Check the invite links of active groups (all of them, or `group_ids`, or
+    those of `tenant_id`; with `checked_before`, only those not checked that
+    recently) and record the
+    results. A group is deactivated after WHATSAPP_LINK_DEAD_AFTER
+    consecutive dead checks, unless the run found implausibly many dead links
+    (the page format probably changed). Returns a summary, or None when
+    another process is already checking.
+    """
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LINK_CHECK_LOCK_KEY}).scalar():
+            return None
+        lock_conn.commit()
+        try:
+            with engine.connect() as conn:
+                query = select(WhatsAppGroup.id, WhatsAppGroup.group_invite_id).where(WhatsAppGroup.is_active == True)
+                if group_ids is not None:
+                    query = query.where(WhatsAppGroup.id.in_(group_ids))
+                if tenant_id is not None:
+                    query = query.where(WhatsAppGroup.tenant_id == tenant_id)
+                if checked_before is not None:
+                    query = query.where(or_(
+                        WhatsAppGroup.link_checked_at.is_(None),
+                        WhatsAppGroup.link_checked_at < func.now() - checked_before
+                    ))
+                groups = conn.execute(query).all()
+            if not groups:
+                return {"checked": 0, "ok": 0, "dead": 0, "unknown": 0, "deactivated": []}
+
+            results = asyncio.run(check_invite_links([group.group_invite_id for group in groups], transport))
+            summary = {status: sum(1 for result in results.values() if result == status) for status in ("ok", "dead", "unknown")}
+            conclusive = summary["ok"] + summary["dead"]
+            deactivate = not (
+                conclusive >= MIN_GUARDED_RUN
+                and summary["dead"] > conclusive * settings.WHATSAPP_LINK_MAX_DEAD_FRACTION
+            )
+            if not deactivate:
+                logger.error("Invite link check found too many dead links, not deactivating any", extra=summary)
+
+            checked = values(
+                column("id", Integer),
+                column("status", String),
+                name="checked"
+            ).data([(group.id, results[group.group_invite_id]) for group in groups])
+            failures = case(
+                (checked.c.status == "dead", WhatsAppGroup.link_failures + 1),
+                (checked.c.status == "ok", 0),
+                else_=WhatsAppGroup.link_failures
+            )
+            changes = {"link_status": checked.c.status, "link_checked_at": func.now(), "link_failures": failures}
+            if deactivate:
+                dead_enough = (checked.c.status == "dead") & (WhatsAppGroup.link_failures + 1 >= settings.WHATSAPP_LINK_DEAD_AFTER)
+                changes["is_active"] = case((dead_enough, False), else_=WhatsAppGroup.is_active)
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    update(WhatsAppGroup)
+                    .where(WhatsAppGroup.id == cast(checked.c.id, Integer))
+                    .values(**changes)
+                    .returning(WhatsAppGroup.id, WhatsAppGroup.tenant_id, WhatsAppGroup.is_active)
+                ).all()
+
+            deactivated = [row.id for row in rows if not row.is_active]
+            for row in rows:
+                if not row.is_active:
+                    logger.warning("Deactivated WhatsApp group with a dead invite link", extra={"group_id": row.id, "tenant_id": row.tenant_id})
+            return {"checked": len(groups), **summary, "deactivated": deactivated}
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LINK_CHECK_LOCK_KEY})
+            lock_conn.commit()
+
+
+class InviteLinkChecker:
+    """
+    Background thread that checks every active group's invite link each
+    `interval_hours`, and newly imported groups or a tenant's groups as soon
+    as `request()` names them.
+    Each process runs one, but a periodic run skips links another process
+    checked within the interval, so every link is checked about once per interval.
+    """
+
+    def __init__(self, interval_hours: float = None):
+        self.interval_seconds = (interval_hours or settings.WHATSAPP_LINK_CHECK_INTERVAL_HOURS) * 3600
+        self._pending = set()
+        self._tenants = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="invite-link-checker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def request(self, group_ids: list = None, tenant_id: int = None):
+        """Check these groups, or every active group of a tenant (of all tenants when both are None), soon."""
+        if self._thread is None:
+            return
+        self._requeue(group_ids, {tenant_id} if tenant_id is not None else ())
+        self._wake.set()
+
+    def _requeue(self, group_ids, tenant_ids=()):
+        with self._lock:
+            if self._pending is None:
+                return
+            if group_ids is None and not tenant_ids:
+                self._pending, self._tenants = None, set()
+            else:
+                self._pending.update(group_ids or ())
+                self._tenants.update(tenant_ids)
+
+    def _check(self, group_ids, checked_before: timedelta = None, tenant_id: int = None) -> bool:
+        """False when another process holds the check lock."""
+        try:
+            summary = run_link_check(group_ids, checked_before, tenant_id=tenant_id)
+            if summary and summary["checked"]:
+                logger.info("Invite link check finished", extra=summary)
+            return summary is not None
+        except Exception:
+            logger.exception("Invite link check failed")
+            return True
+
+    def _run(self):
+        next_full = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, set()
+                tenants, self._tenants = self._tenants, set()
+            timeout = None
+            if pending is None:
+                if not self._check(None):
+                    self._requeue(None)
+                    timeout = LOCK_RETRY_SECONDS
+            else:
+                if time.monotonic() >= next_full:
+                    # Also covers anything pending: new groups have never been checked
+                    if self._check(None, timedelta(seconds=self.interval_seconds * 0.9)):
+                        next_full = time.monotonic() + self.interval_seconds
+                    else:
+                        next_full = time.monotonic() + LOCK_RETRY_SECONDS
+                    pending = set()
+                retry_tenants = {tenant_id for tenant_id in sorted(tenants) if not self._check(None, tenant_id=tenant_id)}
+                retry_groups = pending if pending and not self._check(sorted(pending)) else set()
+                if retry_groups or retry_tenants:
+                    # Another process is mid-check; try these again shortly
+                    self._requeue(retry_groups, retry_tenants)
+                    timeout = LOCK_RETRY_SECONDS
+            if timeout is None:
+                timeout = max(next_full - time.monotonic(), 0.0)
+            self._wake.wait(timeout)
+
+
+invite_link_checker = InviteLinkChecker()
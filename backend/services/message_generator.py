@@ -1,35 +1,97 @@
 from datetime import datetime
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models.table_group import TableGroup
 from models.yarn_item import YarnItem
 
-def generate_from_tables(db: Session, table_group_ids: list) -> str:
+def load_catalog(db: Session, tenant_id: int, table_group_ids: list) -> list:
     """
-    Generate formatted WhatsApp message from selected table groups.
+    Visible items of the given table groups in one query, as sections in the
+    requested table order. Tables that are missing or have no visible items are skipped.
+    `item_ids` runs parallel to `items`.
     """
-    message = "🧵 *Stock Update* 🧵\n\n"
+    rows = db.query(
+        YarnItem.id,
+        YarnItem.table_group_id,
+        TableGroup.table_name,
+        YarnItem.count,
+        YarnItem.quality,
+        YarnItem.rate,
+        func.coalesce(YarnItem.updated_at, YarnItem.created_at).label("item_updated_at"),
+        func.coalesce(TableGroup.updated_at, TableGroup.created_at).label("table_updated_at")
+    ).join(TableGroup, TableGroup.id == YarnItem.table_group_id).filter(
+        YarnItem.tenant_id == tenant_id,
+        YarnItem.table_group_id.in_(table_group_ids),
+        YarnItem.show_on_homepage == True
+    ).order_by(YarnItem.table_group_id, YarnItem.display_order).all()
     
-    for table_group_id in table_group_ids:
-        table_group = db.query(TableGroup).filter(TableGroup.id == table_group_id).first()
-        if not table_group:
-            continue
-        
-        items = db.query(YarnItem).filter(
-            YarnItem.table_group_id == table_group_id,
-            YarnItem.show_on_homepage == True
-        ).order_by(YarnItem.display_order).all()
+    sections = {}
+    for row in rows:
+        section = sections.setdefault(row.table_group_id, {
+            "table_group_id": row.table_group_id,
+            "table_name": row.table_name,
+            "items": [],
+            "item_ids": [],
+            "updated_at": row.table_updated_at,
+        })
+        section["items"].append((row.count, row.quality, row.rate))
+        section["item_ids"].append(row.id)
+        if row.item_updated_at and (section["updated_at"] is None or row.item_updated_at > section["updated_at"]):
+            section["updated_at"] = row.item_updated_at
+    
+    # dict.fromkeys keeps the first occurrence of repeated ids
+    return [sections[tg_id] for tg_id in dict.fromkeys(table_group_ids) if tg_id in sections]
+
+def format_sections(sections: list) -> tuple:
+    """
+    The message as (header, one block per table, footer), so callers can
+    split it at table boundaries.
+    """
+    header = "🧵 *Stock Update* 🧵\n\n"
+    
+    blocks = []
+    for section in sections:
+        block = f"📋 *{section['table_name']}*\n"
         
-        if not items:
-            continue
+        for idx, (count, quality, rate) in enumerate(section["items"], start=1):
+            block += f"{idx}. {count} - {quality} - ₹{rate}/kg\n"
         
-        message += f"📋 *{table_group.table_name}*\n"
+        blocks.append(block + "\n")
+    
+    return header, blocks, format_footer()
+
+def format_footer() -> str:
+    """Closing lines, stamped with the time of rendering."""
+    footer = "📞 For orders: Reply or call\n"
+    footer += f"⏰ Updated: {datetime.now().strftime('%d %b %Y, %I:%M %p')}"
+    return footer
+
+def format_delta(changes: list) -> str:
+    """
+    Change-only message from `(table_name, rows)` pairs, where each row is
+    `(kind, count, quality, old_rate, new_rate)` and kind is added, removed, up or down.
+    """
+    message = "🧵 *Rate Changes* 🧵\n\n"
+    
+    for table_name, rows in changes:
+        message += f"📋 *{table_name}*\n"
         
-        for idx, item in enumerate(items, start=1):
-            message += f"{idx}. {item.count} - {item.quality} - ₹{item.rate}/kg\n"
+        for kind, count, quality, old_rate, new_rate in rows:
+            if kind == "added":
+                message += f"🆕 {count} - {quality} - ₹{new_rate}/kg\n"
+            elif kind == "removed":
+                message += f"❌ {count} - {quality} - no longer available\n"
+            else:
+                arrow = "🔺" if kind == "up" else "🔻"
+                message += f"{arrow} {count} - {quality} - ₹{old_rate} → ₹{new_rate}/kg\n"
         
         message += "\n"
     
-    message += "📞 For orders: Reply or call\n"
-    message += f"⏰ Updated: {datetime.now().strftime('%d %b %Y, %I:%M %p')}"
-    
-    return message
+    return message + format_footer()
+
+def generate_from_tables(db: Session, tenant_id: int, table_group_ids: list) -> str:
+    """
+    Generate formatted WhatsApp message from selected table groups.
+    """
+    header, blocks, footer = format_sections(load_catalog(db, tenant_id, table_group_ids))
+    return header + "".join(blocks) + footer
@@ -0,0 +1,24 @@
+import hashlib
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.broadcast_message import BroadcastMessage
+
+
+def message_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def store_message(db: Session, body: str) -> str:
+    """
+    Store a message body once and return its hash for use as `BroadcastHistory.message_hash`.
+    Reusing a stored body restarts its orphan grace period and row-locks it until
+    commit, so history maintenance cannot delete it before the history row exists.
+    """
+    digest = message_hash(body)
+    db.execute(
+        insert(BroadcastMessage)
+        .values(hash=digest, body=body)
+        .on_conflict_do_update(index_elements=["hash"], set_={"created_at": func.now()})
+    )
+    return digest
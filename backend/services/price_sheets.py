@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.table_group import TableGroup
+from services.message_generator import load_catalog
+from services.sheet_renderer import render_sheet
+
+logger = logging.getLogger(__name__)
+
+SHEET_FORMATS = {
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+# Part of every cache key; bump when the sheet layout changes
+LAYOUT_VERSION = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+# Renders in progress by cache key, so concurrent requests for one sheet share it
+_in_flight = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads and DB connections is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PRICE_SHEET_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def sheet_content(sections: list) -> dict:
+    """
+    Everything that ends up on the sheet. The timestamp is the catalog's last
+    change rather than the render time, so unchanged catalogs hash the same.
+    """
+    updated = max((s["updated_at"] for s in sections if s["updated_at"]), default=None)
+    return {
+        "title": "Stock Update",
+        "tables": [
+            {
+                "name": section["table_name"],
+                "rows": [[count, quality, f"{rate:.2f}"] for count, quality, rate in section["items"]],
+            }
+            for section in sections
+        ],
+        "footer": "For orders: reply or call"
+                  + (f"  |  Updated: {updated.strftime('%d %b %Y, %I:%M %p')}" if updated else ""),
+    }
+
+
+def cache_key(tenant_id: int, content: dict, fmt: str) -> str:
+    """Content-addressed key, namespaced by tenant ("<tenant>/<sha256>.<fmt>")."""
+    payload = json.dumps([LAYOUT_VERSION, fmt, content], sort_keys=True, ensure_ascii=False)
+    return f"{tenant_id}/{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.{fmt}"
+
+
+def attachment_path(key: str) -> str:
+    """Path of a rendered sheet in the cache, e.g. for the broadcast sender."""
+    tenant, name = key.split("/")
+    return os.path.join(settings.PRICE_SHEET_CACHE_DIR, str(int(tenant)), os.path.basename(name))
+
+
+def _render_to_cache(key: str, content: dict, fmt: str):
+    with _pool_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = _get_pool().submit(
+                render_sheet, content, fmt,
+                font_path=settings.PRICE_SHEET_FONT,
+                currency=settings.PRICE_SHEET_CURRENCY
+            )
+            _in_flight[key] = future
+            future.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    data = future.result(timeout=settings.PRICE_SHEET_RENDER_TIMEOUT)
+
+    path = attachment_path(key)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def visible_table_ids(db: Session, tenant_id: int) -> list:
+    return [
+        row.id for row in db.query(TableGroup.id).filter(
+            TableGroup.tenant_id == tenant_id,
+            TableGroup.show_on_homepage == True
+        ).order_by(TableGroup.display_order).all()
+    ]
+
+
+def get_price_sheet(db: Session, tenant_id: int, table_group_ids: list, fmt: str) -> str:
+    """
+    Cache key of the price sheet for the given tables (in that order),
+    rendering it in the process pool on a cache miss. Returns None when
+    none of the tables has visible items.
+    """
+    sections = load_catalog(db, tenant_id, table_group_ids)
+    if not sections:
+        return None
+
+    content = sheet_content(sections)
+    key = cache_key(tenant_id, content, fmt)
+    try:
+        # A sheet's mtime is its last use, which is what prune_price_sheets goes by
+        os.utime(attachment_path(key))
+    except FileNotFoundError:
+        _render_to_cache(key, content, fmt)
+        logger.info("Rendered price sheet", extra={"key": key})
+    return key
+
+
+def prune_price_sheets(conn: Connection, max_age_days: float = None) -> int:
+    """
+    Delete cached sheets unused for `max_age_days` that no unsent broadcast
+    still attaches, and leftover temporary files. Returns the files removed.
+    """
+    max_age_days = settings.PRICE_SHEET_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    root = settings.PRICE_SHEET_CACHE_DIR
+    if max_age_days <= 0 or not os.path.isdir(root):
+        return 0
+
+    referenced = {
+        attachment_path(key) for key in conn.execute(text("""
+            SELECT DISTINCT attachment FROM broadcast_history
+            WHERE attachment IS NOT NULL AND status IN ('pending', 'sending', 'in_progress')
+        """)).scalars()
+    }
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            if path in referenced:
+                continue
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
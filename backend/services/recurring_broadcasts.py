@@ -0,0 +1,250 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator
+from sqlalchemy import ARRAY, DateTime, Integer, String, and_, column, exists, literal, select, text, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.database import SessionLocal
+from models.broadcast_history import BroadcastHistory
+from models.broadcast_schedule import BroadcastSchedule
+from models.whatsapp_group import WhatsAppGroup
+from services.broadcast_scheduler import broadcast_scheduler, compute_send_times
+from services.cron import CronExpression
+from services.catalog_snapshots import build_snapshot, store_snapshot
+from services.message_generator import load_catalog, format_sections
+from services.message_store import store_message
+
+logger = logging.getLogger(__name__)
+
+# Transaction-level advisory lock so only one process materializes at a time
+MATERIALIZE_LOCK_KEY = 7302
+
+# Materialized rows wait in this status, without a message, until the message
+# is rendered; then they become "pending" for the broadcast scheduler.
+QUEUED_STATUS = "queued"
+
+
+def occurrence_rows(schedule: BroadcastSchedule, group_ids: list, start: datetime, until: datetime) -> Iterator[dict]:
+    """
+    Lazily yield one history row per group for every occurrence in (start, until].
+    """
+    cron = CronExpression(schedule.cron_expression)
+    for occurrence in cron.occurrences(start):
+        if occurrence > until:
+            return
+        send_times = compute_send_times(
+            occurrence,
+            len(group_ids),
+            policy=schedule.spread_policy,
+            interval_seconds=schedule.interval_seconds,
+            rate_per_minute=schedule.rate_per_minute,
+            window_minutes=schedule.window_minutes
+        )
+        for group_id, send_time in zip(group_ids, send_times):
+            yield {
+                "tenant_id": schedule.tenant_id,
+                "group_id": group_id,
+                "message_hash": None,
+                "table_group_ids": schedule.table_group_ids if schedule.message_type == "auto_generate" else None,
+                "message_type": schedule.message_type,
+                "scheduled_for": send_time,
+                "status": QUEUED_STATUS,
+                "schedule_id": schedule.id,
+                "occurrence_at": occurrence,
+            }
+
+
+def _insert_occurrences(db: Session, batch: list) -> int:
+    """
+    INSERT ... SELECT one batch of occurrence rows, skipping any group that
+    already has a row for that occurrence whatever its send time. The unique
+    constraint has to include the partition key `scheduled_for`, so on its own
+    it would let an occurrence re-spread with new send times through twice.
+    """
+    first = batch[0]
+    occurrences = values(
+        column("group_id", Integer),
+        column("scheduled_for", DateTime),
+        column("occurrence_at", DateTime),
+        name="occurrences"
+    ).data([(row["group_id"], row["scheduled_for"], row["occurrence_at"]) for row in batch])
+    existing = exists().where(and_(
+        BroadcastHistory.schedule_id == first["schedule_id"],
+        BroadcastHistory.occurrence_at == occurrences.c.occurrence_at,
+        BroadcastHistory.group_id == occurrences.c.group_id
+    ))
+    statement = insert(BroadcastHistory).from_select(
+        ["tenant_id", "group_id", "table_group_ids", "message_type", "scheduled_for", "status", "schedule_id", "occurrence_at"],
+        select(
+            literal(first["tenant_id"], Integer),
+            occurrences.c.group_id,
+            literal(first["table_group_ids"], ARRAY(Integer)),
+            literal(first["message_type"], String),
+            occurrences.c.scheduled_for,
+            literal(first["status"], String),
+            literal(first["schedule_id"], Integer),
+            occurrences.c.occurrence_at
+        ).where(~existing)
+    ).on_conflict_do_nothing()
+    return db.execute(statement).rowcount
+
+
+def materialize_schedule(db: Session, schedule: BroadcastSchedule, until: datetime, batch_size: int = None) -> int:
+    """
+    Insert history rows for a schedule up to `until`, in batches.
+    Re-running is harmless: a (schedule, occurrence, group) that already has a
+    row, queued or rendered, is skipped.
+    """
+    batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+    now = datetime.now()
+    start = schedule.materialized_until or now
+    if start.tzinfo is not None:
+        start = start.astimezone().replace(tzinfo=None)
+    start = max(start, now)
+
+    group_ids = [
+        row.id for row in db.query(WhatsAppGroup.id).filter(
+            WhatsAppGroup.id.in_(schedule.group_ids),
+            WhatsAppGroup.tenant_id == schedule.tenant_id,
+            WhatsAppGroup.is_active == True
+        ).order_by(WhatsAppGroup.id)
+    ]
+
+    created = 0
+    if group_ids:
+        rows = occurrence_rows(schedule, group_ids, start, until)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            created += _insert_occurrences(db, batch)
+
+    schedule.materialized_until = until
+    return created
+
+
+def materialize_due(db: Session) -> int:
+    """
+    Materialize every active schedule up to the look-ahead window.
+    """
+    locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MATERIALIZE_LOCK_KEY}).scalar()
+    if not locked:
+        return 0
+
+    until = datetime.now() + timedelta(hours=settings.RECURRING_MATERIALIZE_AHEAD_HOURS)
+    created = 0
+    schedules = db.query(BroadcastSchedule).filter(BroadcastSchedule.is_active == True).all()
+    for schedule in schedules:
+        created += materialize_schedule(db, schedule, until)
+    db.commit()
+    return created
+
+
+def render_due(db: Session) -> int:
+    """
+    Render messages for occurrences about to be sent and hand them to the scheduler.
+    Each occurrence is rendered once and applied to all its group rows in one UPDATE.
+    """
+    lead = datetime.now() + timedelta(seconds=settings.RECURRING_RENDER_LEAD_SECONDS)
+    occurrences = db.query(
+        BroadcastHistory.schedule_id,
+        BroadcastHistory.occurrence_at
+    ).filter(
+        BroadcastHistory.status == QUEUED_STATUS,
+        BroadcastHistory.scheduled_for <= lead
+    ).distinct().all()
+
+    rendered = 0
+    schedules = {}
+    for schedule_id, occurrence_at in occurrences:
+        if schedule_id not in schedules:
+            schedules[schedule_id] = db.query(BroadcastSchedule).filter(BroadcastSchedule.id == schedule_id).first()
+        schedule = schedules[schedule_id]
+        if schedule is None:
+            continue
+
+        snapshot_hash = None
+        if schedule.message_type == "auto_generate":
+            sections = load_catalog(db, schedule.tenant_id, schedule.table_group_ids)
+            header, blocks, footer = format_sections(sections)
+            message = header + "".join(blocks) + footer
+            # Recorded so a later delta broadcast to these groups has a baseline
+            snapshot_hash = store_snapshot(db, build_snapshot(sections))
+        else:
+            message = schedule.custom_message
+        message_hash = store_message(db, message)
+
+        result = db.execute(
+            update(BroadcastHistory)
+            .where(
+                BroadcastHistory.schedule_id == schedule_id,
+                BroadcastHistory.occurrence_at == occurrence_at,
+                BroadcastHistory.status == QUEUED_STATUS
+            )
+            .values(message_hash=message_hash, snapshot_hash=snapshot_hash, status="pending")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        rendered += result.rowcount
+
+    if rendered:
+        broadcast_scheduler.notify()
+    return rendered
+
+
+def discard_queued(db: Session, schedule: BroadcastSchedule):
+    """
+    Drop not-yet-rendered occurrences so they are re-materialized from the
+    schedule's current settings.
+    """
+    db.query(BroadcastHistory).filter(
+        BroadcastHistory.schedule_id == schedule.id,
+        BroadcastHistory.status == QUEUED_STATUS
+    ).delete(synchronize_session=False)
+    schedule.materialized_until = None
+
+
+class RecurringBroadcastWorker:
+    """
+    Background thread that periodically materializes and renders recurring broadcasts.
+    """
+
+    def __init__(self, poll_seconds: float = None):
+        self.poll_seconds = poll_seconds or settings.RECURRING_POLL_SECONDS
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="recurring-broadcasts", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                created = materialize_due(db)
+                rendered = render_due(db)
+                if created or rendered:
+                    logger.info("Recurring broadcasts processed", extra={"materialized": created, "rendered": rendered})
+            except Exception:
+                db.rollback()
+                logger.exception("Recurring broadcast iteration failed")
+            finally:
+                db.close()
+            self._stop.wait(self.poll_seconds)
+
+
+recurring_broadcast_worker = RecurringBroadcastWorker()
@@ -0,0 +1,112 @@
+from decimal import Decimal
+from sqlalchemy import select, update, func, literal, Numeric
+from sqlalchemy.orm import Session
+from models.yarn_item import YarnItem
+from models.table_group import TableGroup
+from models.repricing_run import RepricingRun
+from schemas.repricing import RepricingFilter, RepricingRule
+from services.audit_log import record
+
+RATE_TYPE = Numeric(10, 2)
+
+
+def _like_pattern(pattern: str) -> str:
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%")
+
+
+def filter_conditions(tenant_id: int, item_filter: RepricingFilter) -> list:
+    conditions = [YarnItem.tenant_id == tenant_id]
+    if item_filter.table_group_ids:
+        conditions.append(YarnItem.table_group_id.in_(item_filter.table_group_ids))
+    if item_filter.quality:
+        conditions.append(YarnItem.quality.ilike(_like_pattern(item_filter.quality), escape="\\"))
+    if item_filter.count:
+        conditions.append(YarnItem.count.ilike(_like_pattern(item_filter.count), escape="\\"))
+    return conditions
+
+
+def new_rate_expression(rule: RepricingRule):
+    """
+    SQL expression for an item's repriced rate: percentage, then delta, then
+    rounding, then clamps. Rates never go below zero.
+    """
+    rate = YarnItem.rate * literal(1 + rule.percent / 100, Numeric) + literal(rule.delta, Numeric)
+    if rule.round_to:
+        step = literal(rule.round_to, Numeric)
+        rate = func.round(rate / step) * step
+    if rule.min_rate is not None:
+        rate = func.greatest(rate, literal(rule.min_rate, Numeric))
+    if rule.max_rate is not None:
+        rate = func.least(rate, literal(rule.max_rate, Numeric))
+    rate = func.greatest(rate, literal(Decimal("0"), Numeric))
+    return func.round(rate, 2).cast(RATE_TYPE)
+
+
+def reprice(db: Session, tenant_id: int, item_filter: RepricingFilter, rule: RepricingRule, dry_run: bool, admin_id: int = None) -> dict:
+    """
+    Reprice every matching item in one set-based statement. Dry runs compute
+    the same expression in a SELECT and change nothing.
+    """
+    conditions = filter_conditions(tenant_id, item_filter)
+    new_rate = new_rate_expression(rule)
+
+    if dry_run:
+        rows = db.execute(
+            select(
+                YarnItem.id, YarnItem.table_group_id, YarnItem.count, YarnItem.quality,
+                YarnItem.rate.label("old_rate"), new_rate.label("new_rate")
+            )
+            .where(*conditions, YarnItem.rate != new_rate)
+            .order_by(YarnItem.table_group_id, YarnItem.display_order, YarnItem.id)
+        ).all()
+        changes = [dict(row._mapping) for row in rows]
+        return {"dry_run": True, "changed_count": len(changes), "run_id": None, "changes": changes}
+
+    # Lock and capture the old rates in the same statement, since RETURNING only sees new values
+    before = (
+        select(YarnItem.id, YarnItem.rate.label("old_rate"))
+        .where(*conditions)
+        .with_for_update()
+        .subquery("before")
+    )
+    rows = db.execute(
+        update(YarnItem)
+        .where(YarnItem.id == before.c.id, YarnItem.rate != new_rate)
+        .values(rate=new_rate, version=YarnItem.version + 1)
+        .returning(
+            YarnItem.id, YarnItem.table_group_id, YarnItem.count, YarnItem.quality,
+            before.c.old_rate, YarnItem.rate.label("new_rate")
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    changes = sorted((dict(row._mapping) for row in rows), key=lambda c: (c["table_group_id"], c["id"]))
+    for change in changes:
+        record(db, tenant_id, "yarn_item", change["id"], "update", {"rate": (change["old_rate"], change["new_rate"])})
+
+    run_id = None
+    if changes:
+        run = RepricingRun(
+            tenant_id=tenant_id,
+            admin_id=admin_id,
+            filters=item_filter.dict(exclude_none=True),
+            rule={k: str(v) for k, v in rule.dict(exclude_none=True).items()},
+            changed_count=len(changes),
+            changes=[
+                {"id": c["id"], "old_rate": str(c["old_rate"]), "new_rate": str(c["new_rate"])}
+                for c in changes
+            ]
+        )
+        db.add(run)
+        # Bump the affected tables once so the homepage's last_updated moves
+        db.execute(
+            update(TableGroup)
+            .where(TableGroup.id.in_({c["table_group_id"] for c in changes}), TableGroup.tenant_id == tenant_id)
+            .values(updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.flush()
+        run_id = run.id
+    db.commit()
+
+    return {"dry_run": False, "changed_count": len(changes), "run_id": run_id, "changes": changes}
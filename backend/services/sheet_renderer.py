@@ -0,0 +1,91 @@
+"""
+Price sheet rasterization. Runs inside the price sheet process pool, so this
+module only depends on Pillow and never touches the database or settings.
+"""
+import io
+from PIL import Image, ImageDraw, ImageFont
+
+WIDTH = 1080
+MARGIN = 48
+ROW_HEIGHT = 46
+# Rows per PDF page at this row height (A4 proportions at WIDTH)
+PDF_LINES_PER_PAGE = 30
+
+BACKGROUND = (255, 255, 255)
+TEXT = (33, 33, 33)
+MUTED = (110, 110, 110)
+ACCENT = (18, 94, 74)
+STRIPE = (242, 247, 245)
+
+# x offsets of the #, count, quality and rate columns
+COLUMNS = (MARGIN, MARGIN + 70, MARGIN + 290, WIDTH - MARGIN)
+
+
+def _fonts(font_path: str = None) -> dict:
+    def load(size):
+        if font_path:
+            return ImageFont.truetype(font_path, size)
+        return ImageFont.load_default(size=size)
+    return {"title": load(40), "table": load(30), "header": load(22), "row": load(24), "footer": load(20)}
+
+
+def _lines(content: dict) -> list:
+    lines = [("title", content["title"])]
+    for table in content["tables"]:
+        lines.append(("table", table["name"]))
+        lines.append(("header", None))
+        for idx, row in enumerate(table["rows"], start=1):
+            lines.append(("row", (idx, *row)))
+    lines.append(("footer", content["footer"]))
+    return lines
+
+
+def _draw_page(lines: list, fonts: dict, currency: str) -> Image.Image:
+    image = Image.new("RGB", (WIDTH, MARGIN * 2 + ROW_HEIGHT * len(lines)), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    y = MARGIN
+    for kind, value in lines:
+        if kind == "title":
+            draw.text((MARGIN, y), value, font=fonts["title"], fill=ACCENT)
+        elif kind == "table":
+            draw.text((MARGIN, y + 8), value, font=fonts["table"], fill=ACCENT)
+        elif kind == "header":
+            for x, label in zip(COLUMNS, ("#", "Count", "Quality")):
+                draw.text((x, y + 12), label, font=fonts["header"], fill=MUTED)
+            draw.text((COLUMNS[3], y + 12), f"Rate ({currency}/kg)", font=fonts["header"], fill=MUTED, anchor="ra")
+            draw.line((MARGIN, y + ROW_HEIGHT - 4, WIDTH - MARGIN, y + ROW_HEIGHT - 4), fill=MUTED)
+        elif kind == "row":
+            idx, count, quality, rate = value
+            if idx % 2 == 0:
+                draw.rectangle((MARGIN, y, WIDTH - MARGIN, y + ROW_HEIGHT), fill=STRIPE)
+            draw.text((COLUMNS[0], y + 10), str(idx), font=fonts["row"], fill=MUTED)
+            draw.text((COLUMNS[1], y + 10), count, font=fonts["row"], fill=TEXT)
+            draw.text((COLUMNS[2], y + 10), quality, font=fonts["row"], fill=TEXT)
+            draw.text((COLUMNS[3], y + 10), rate, font=fonts["row"], fill=TEXT, anchor="ra")
+        elif kind == "footer":
+            draw.text((MARGIN, y + 12), value, font=fonts["footer"], fill=MUTED)
+        y += ROW_HEIGHT
+    return image
+
+
+def render_sheet(content: dict, fmt: str, font_path: str = None, currency: str = "Rs") -> bytes:
+    """
+    Render sheet content (title, tables of [count, quality, rate] rows, footer)
+    as a single PNG or a paginated PDF.
+    """
+    fonts = _fonts(font_path)
+    lines = _lines(content)
+    buffer = io.BytesIO()
+
+    if fmt == "png":
+        _draw_page(lines, fonts, currency).save(buffer, "PNG", optimize=True)
+    elif fmt == "pdf":
+        pages = [
+            _draw_page(lines[start:start + PDF_LINES_PER_PAGE], fonts, currency)
+            for start in range(0, len(lines), PDF_LINES_PER_PAGE)
+        ]
+        pages[0].save(buffer, "PDF", save_all=True, append_images=pages[1:], resolution=150)
+    else:
+        raise ValueError(f"Unknown sheet format: {fmt}")
+
+    return buffer.getvalue()